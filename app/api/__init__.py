@@ -1,5 +1,5 @@
 """API routers initialization"""
 
-from app.api import records, corefile, coredns, auth
+from app.api import records, corefile, coredns, auth, events, metrics, profiles
 
-__all__ = ["records", "corefile", "coredns", "auth"]
+__all__ = ["records", "corefile", "coredns", "auth", "events", "metrics", "profiles"]
@@ -1,30 +1,48 @@
 """Corefile API routes"""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime, timezone
+from typing import Iterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 
 from app.config import settings
-from app.database import get_session
+from app.database import get_read_session, get_write_session
 from app.schemas.backup import (
     BackupDetailResponse,
     BackupListResponse,
     DeleteBackupResponse,
     RestoreResponse,
 )
-from app.schemas.corefile import CorefileGenerateResponse, CorefilePreviewResponse
+from app.schemas.corefile import (
+    CorefileGenerateResponse,
+    CorefileGenerationListResponse,
+)
 from app.services.backup_service import BackupService
 from app.services.corefile_service import CorefileService
+from app.utils.data_version import (
+    apply_etag,
+    data_version,
+    etag_matches,
+    not_modified_response,
+)
 
 router = APIRouter(prefix="/api/corefile", tags=["Corefile"])
 
 
 @router.post("/generate", response_model=CorefileGenerateResponse)
-async def generate_corefile(session: Session = Depends(get_session)):
+async def generate_corefile(
+    include_content: bool = Query(False, description="在响应中附带完整的 Corefile 内容"),
+    session: Session = Depends(get_write_session),
+):
     service = CorefileService()
     try:
         result = service.generate_corefile(
             session=session,
             output_path=settings.corefile_path,
+            trigger="api",
+            include_content=include_content,
         )
         return {
             "success": True,
@@ -35,14 +53,85 @@ async def generate_corefile(session: Session = Depends(get_session)):
         raise HTTPException(status_code=500, detail=str(exc))
 
 
-@router.get("/preview", response_model=CorefilePreviewResponse)
-async def preview_corefile(session: Session = Depends(get_session)):
+@router.get("/preview")
+async def preview_corefile(
+    request: Request,
+    zone: str | None = Query(None, description="只预览指定 zone"),
+    offset: int = Query(0, ge=0, description="起始字节偏移"),
+    limit: int | None = Query(None, ge=1, description="最多返回的字节数"),
+    session: Session = Depends(get_read_session),
+):
+    """
+    以 text/plain 流式返回 Corefile 预览
+
+    边渲染边输出，不在内存中拼接完整内容；统计信息放在 X-Corefile-* 响应头中
+    """
     service = CorefileService()
-    result = service.generate_corefile(session=session)
-    return {
-        "success": True,
-        "data": result,
-    }
+    # 数据与模板任一变化都使预览失效
+    etag = data_version.etag(f"corefile-preview-{service.template_version}", session)
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+
+    stats = service.count_records(session, zone=zone)
+    if zone is not None and not stats["total_zones"]:
+        raise HTTPException(status_code=404, detail=f"Zone {zone} not found")
+
+    generated_at = datetime.now(timezone.utc).isoformat()
+    response = StreamingResponse(
+        _render_preview(service, session.get_bind(), zone, generated_at, offset, limit),
+        media_type="text/plain; charset=utf-8",
+        headers={
+            "X-Generated-At": generated_at,
+            "X-Corefile-Zones": str(stats["total_zones"]),
+            "X-Corefile-Records": str(stats["total_records"]),
+        },
+    )
+    apply_etag(response, etag)
+    return response
+
+
+def _render_preview(
+    service: CorefileService,
+    bind,
+    zone: str | None,
+    generated_at: str,
+    offset: int,
+    limit: int | None,
+) -> Iterator[bytes]:
+    """
+    在独立会话中边读取记录边渲染
+
+    记录在响应发送过程中才分批读取，此时请求的会话可能已经关闭
+    """
+    with Session(bind) as session:
+        context, _ = service.prepare(session, zone=zone)
+        context["generated_at"] = generated_at
+        yield from _byte_window(service.stream(context), offset, limit)
+
+
+def _byte_window(chunks: Iterator[str], offset: int, limit: int | None) -> Iterator[bytes]:
+    """按字节偏移截取渲染输出，截取完成后停止渲染"""
+    position = 0
+    end = offset + limit if limit is not None else None
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        start, position = position, position + len(data)
+        if position <= offset:
+            continue
+        yield data[max(offset - start, 0) : None if end is None else end - start]
+        if end is not None and position >= end:
+            return
+
+
+@router.get("/generations", response_model=CorefileGenerationListResponse)
+async def list_generations(
+    limit: int = Query(50, ge=1, le=500),
+    before: int | None = Query(None, ge=1, description="上一页返回的 next_cursor"),
+    session: Session = Depends(get_read_session),
+):
+    """Corefile 生成历史，按生成序号倒序，使用 next_cursor 翻页"""
+    items, next_cursor = CorefileService.list_generations(session, limit=limit, before=before)
+    return {"success": True, "data": {"items": items, "next_cursor": next_cursor}}
 
 
 @router.post("/backups", response_model=BackupDetailResponse)
@@ -87,6 +176,30 @@ async def get_backup(backup_id: str):
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+@router.get("/backups/{backup_id}/diff/{other_id}")
+async def diff_backups(
+    backup_id: str,
+    other_id: str,
+    context: int = Query(3, ge=0, le=100, description="每个 hunk 的上下文行数"),
+):
+    """
+    比较两个备份（任一方可以是 current，即当前 Corefile）
+
+    返回 unified diff 文本（text/x-diff），按 hunk 流式输出；内容相同时响应体为空
+    """
+    service = BackupService(settings.corefile_path)
+    try:
+        cached, chunks = service.diff_backups(backup_id, other_id, context=context)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+    return StreamingResponse(
+        (chunk.encode("utf-8") for chunk in chunks),
+        media_type="text/x-diff; charset=utf-8",
+        headers={"X-Diff-Cache": "hit" if cached else "miss"},
+    )
+
+
 @router.post("/restore/{backup_id}", response_model=RestoreResponse)
 async def restore_backup(backup_id: str):
     service = BackupService(settings.corefile_path)
@@ -0,0 +1,89 @@
+"""Server-Sent Events change feed"""
+
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.services.event_service import EventBus, get_event_bus
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+
+
+def _parse_event_id(value: Optional[str]) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+@router.get("")
+async def stream_events(
+    request: Request,
+    last_event_id: Optional[str] = Query(
+        None, description="断点续传的事件 ID（EventSource 重连时自动携带 Last-Event-ID 头）"
+    ),
+    types: Optional[str] = Query(
+        None, description="事件类型过滤，逗号分隔（如 record.created,corefile.generated）"
+    ),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    bus: EventBus = Depends(get_event_bus),
+):
+    """
+    订阅变更事件流（text/event-stream）
+
+    事件类型:
+    - record.created / record.updated / record.deleted
+    - records.restored: 记录集被恢复到某一时间点
+    - zone.created / zone.updated / zone.deleted
+    - corefile.generated
+    - coredns.reloaded / coredns.reload_failed
+    - stream.reset: 请求的事件已超出缓冲区，客户端需要重新全量同步
+    """
+    resume_from = _parse_event_id(last_event_id_header or last_event_id)
+    wanted = {item.strip() for item in types.split(",") if item.strip()} if types else None
+
+    async def event_stream():
+        # 先订阅再回放，保证回放与实时事件之间不丢失
+        subscription = bus.subscribe()
+        sent_id = resume_from or 0
+        try:
+            yield "retry: 3000\n\n"
+
+            backlog, complete = bus.events_since(resume_from)
+            if not complete:
+                sent_id = min(sent_id, bus.last_id)
+                yield f"event: stream.reset\ndata: {{\"last_event_id\": {bus.last_id}}}\n\n"
+            for event in backlog:
+                sent_id = event.id
+                if wanted is None or event.type in wanted:
+                    yield event.to_sse()
+
+            while not subscription.overflowed:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.event_heartbeat_interval
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if event.id <= sent_id:
+                    continue
+                sent_id = event.id
+                if wanted is None or event.type in wanted:
+                    yield event.to_sse()
+        finally:
+            bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,48 @@
+"""Prometheus metrics endpoint"""
+
+from pathlib import Path
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlmodel import Session, func, select
+
+from app.config import settings
+from app.database import get_read_session
+from app.models.dns_record import DNSRecord
+from app.schemas.dns_record import ALLOWED_STATUSES
+from app.utils.metrics import BACKUP_DISK_USAGE, BACKUP_FILES, DNS_RECORDS, REGISTRY
+
+router = APIRouter(tags=["System"])
+
+
+def _collect_record_counts(session: Session) -> None:
+    counts = dict(
+        session.exec(
+            select(DNSRecord.status, func.count()).group_by(DNSRecord.status)
+        ).all()
+    )
+    for status in ALLOWED_STATUSES:
+        DNS_RECORDS.set(counts.get(status, 0), status=status)
+
+
+def _collect_backup_usage() -> None:
+    backup_dir = Path(settings.corefile_backup_dir)
+    total_size = 0
+    total_files = 0
+    if backup_dir.exists():
+        for path in backup_dir.rglob("*"):
+            if path.is_file():
+                total_size += path.stat().st_size
+                total_files += 1
+    BACKUP_DISK_USAGE.set(total_size)
+    BACKUP_FILES.set(total_files)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(session: Session = Depends(get_read_session)):
+    """以 Prometheus text exposition format 输出指标"""
+    _collect_record_counts(session)
+    _collect_backup_usage()
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,28 @@
+"""Request profiling trace API"""
+
+from fastapi import APIRouter, HTTPException
+
+from app.utils.profiling import profile_store
+
+router = APIRouter(prefix="/api/profiles", tags=["Profiling"])
+
+
+@router.get("")
+async def list_profiles():
+    """列出最近保存的剖析 trace（不含 SQL 明细）"""
+    return {
+        "success": True,
+        "data": [
+            {key: value for key, value in item.to_dict().items() if key != "queries"}
+            for item in profile_store.list()
+        ],
+    }
+
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str):
+    """获取单个请求的完整 JSON trace"""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return {"success": True, "data": profile.to_dict()}
@@ -5,26 +5,40 @@ DNS Records API Router
 """
 
 import math
+from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 
-from app.database import get_session
+from app.database import get_read_session, get_write_session
 from app.schemas.dns_record import (
     DNSRecordCreate,
     DNSRecordCreateResponse,
     DNSRecordDeleteResponse,
+    DNSRecordExportParams,
     DNSRecordListResponse,
     DNSRecordPatch,
+    DNSRecordRestoreResponse,
     DNSRecordSearchParams,
     DNSRecordSearchResponse,
+    DNSRecordSnapshotResponse,
     DNSRecordUpdate,
     DNSRecordUpdateResponse,
+    DNSRecordUpsert,
     DNSZoneListResponse,
     PaginationInfo,
 )
 from app.services.dns_service import DNSService
+from app.services.export_service import ExportService
+from app.services.journal_service import JournalService
+from app.utils.data_version import (
+    apply_etag,
+    data_version,
+    etag_matches,
+    not_modified_response,
+)
 
 router = APIRouter(prefix="/api/records", tags=["DNS Records"])
 
@@ -32,7 +46,7 @@ router = APIRouter(prefix="/api/records", tags=["DNS Records"])
 @router.post("", response_model=DNSRecordCreateResponse, status_code=201)
 async def create_record(
     record: DNSRecordCreate,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_write_session),
 ):
     """创建新的 DNS 记录"""
 
@@ -53,7 +67,7 @@ async def create_record(
 async def update_record(
     record_id: int,
     record: DNSRecordUpdate,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_write_session),
 ):
     """完整更新 DNS 记录"""
 
@@ -76,7 +90,7 @@ async def update_record(
 async def patch_record(
     record_id: int,
     record: DNSRecordPatch,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_write_session),
 ):
     """部分更新 DNS 记录"""
 
@@ -95,6 +109,43 @@ async def patch_record(
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+@router.put("/by-name/{zone}/{hostname}", response_model=DNSRecordUpdateResponse)
+async def upsert_record(
+    zone: str,
+    hostname: str,
+    record: DNSRecordUpsert,
+    response: Response,
+    session: Session = Depends(get_write_session),
+):
+    """按 zone 和主机名创建或更新 DNS 记录（新建返回 201）"""
+
+    # 与创建接口使用相同的字段校验
+    try:
+        DNSRecordCreate(zone=zone, hostname=hostname, **record.model_dump())
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    try:
+        db_record, created = DNSService.upsert_record(
+            session=session, zone=zone, hostname=hostname, record_data=record
+        )
+        if created:
+            response.status_code = 201
+        return {
+            "success": True,
+            "data": db_record,
+            "message": (
+                "DNS record created successfully"
+                if created
+                else "DNS record updated successfully"
+            ),
+        }
+    except HTTPException as exc:
+        raise exc
+    except Exception as exc:  # pragma: no cover - unexpected errors
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
 @router.delete("/{record_id}", response_model=DNSRecordDeleteResponse)
 async def delete_record(
     record_id: int,
@@ -103,7 +154,7 @@ async def delete_record(
         pattern="^(soft|hard)$",
         description="删除模式：soft（软删除）或 hard（硬删除）",
     ),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_write_session),
 ):
     """删除 DNS 记录"""
 
@@ -121,6 +172,8 @@ async def delete_record(
 
 @router.get("", response_model=DNSRecordListResponse)
 async def list_records(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页记录数"),
     zone: Optional[str] = Query(None, description="Zone 过滤"),
@@ -129,7 +182,7 @@ async def list_records(
     sort_by: str = Query("created_at", description="排序字段（zone, hostname, ip_address, created_at）"),
     order: str = Query("desc", pattern="^(asc|desc)$", description="排序方向"),
     include_deleted: bool = Query(False, description="是否包含已删除的记录"),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
     """
     获取 DNS 记录列表
@@ -143,7 +196,14 @@ async def list_records(
     - success: 请求是否成功
     - data: DNS 记录列表
     - pagination: 分页信息（total, page, page_size, pages）
+
+    支持 ETag / If-None-Match，数据未变化时返回 304
     """
+    etag = data_version.etag("records", session)
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    apply_etag(response, etag)
+
     records, total = DNSService.list_records(
         session=session,
         page=page,
@@ -172,12 +232,19 @@ async def list_records(
 
 @router.get("/zones", response_model=DNSZoneListResponse)
 async def list_zones(
+    request: Request,
+    response: Response,
     search: Optional[str] = Query(None, description="Zone 名称搜索"),
     include_deleted: bool = Query(False, description="是否包含已删除状态的记录"),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
     """获取 Zone 列表，用于前端快速过滤"""
 
+    etag = data_version.etag("zones", session)
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    apply_etag(response, etag)
+
     zones = DNSService.list_zones(
         session=session,
         search=search,
@@ -190,10 +257,33 @@ async def list_zones(
     }
 
 
+@router.get("/export")
+async def export_records(
+    params: DNSRecordExportParams = Depends(),
+    session: Session = Depends(get_read_session),
+):
+    """
+    流式导出 DNS 记录
+
+    支持的格式:
+    - ndjson: 每行一个 JSON 对象
+    - csv: 带表头的 CSV
+    - hosts: /etc/hosts 格式（仅 active 记录）
+
+    过滤条件与 /api/records/search 相同，compress=true 时输出 gzip 文件
+    """
+    service = ExportService(params)
+    return StreamingResponse(
+        service.stream(session),
+        media_type=service.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{service.filename}"'},
+    )
+
+
 @router.get("/search", response_model=DNSRecordSearchResponse)
 async def search_records(
     params: DNSRecordSearchParams = Depends(),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
     """高级搜索 DNS 记录"""
 
@@ -212,3 +302,45 @@ async def search_records(
         ),
         "filters_applied": filters_applied,
     }
+
+
+@router.get("/as-of", response_model=DNSRecordSnapshotResponse)
+async def records_as_of(
+    timestamp: datetime = Query(..., description="时间点（ISO 8601，未带时区按 UTC）"),
+    session: Session = Depends(get_read_session),
+):
+    """根据变更日志重建某一时间点的完整记录集"""
+
+    try:
+        state = JournalService.state_at(session, timestamp)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    records = [{"id": record_id, **data} for record_id, data in sorted(state.items())]
+    return {
+        "success": True,
+        "timestamp": timestamp,
+        "total": len(records),
+        "data": records,
+    }
+
+
+@router.post("/restore", response_model=DNSRecordRestoreResponse)
+async def restore_records(
+    timestamp: datetime = Query(..., description="恢复到的时间点（ISO 8601，未带时区按 UTC）"),
+    dry_run: bool = Query(False, description="只统计将要发生的改动，不写入"),
+    session: Session = Depends(get_write_session),
+):
+    """
+    将 DNS 记录恢复到某一时间点
+
+    与 Corefile 备份恢复不同，这里回滚的是数据库中的记录本身，
+    之后重新生成的 Corefile 与恢复结果保持一致
+    """
+
+    summary = DNSService.restore_records(session=session, timestamp=timestamp, dry_run=dry_run)
+    return {
+        "success": True,
+        "data": summary,
+        "message": "Dry run completed" if dry_run else "DNS records restored successfully",
+    }
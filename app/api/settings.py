@@ -3,8 +3,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session
 
-from app.database import get_session
+from app.database import get_read_session, get_write_session
 from app.schemas.settings import (
+    CorefilePluginSettings,
+    CorefilePluginSettingsResponse,
     UpdateUpstreamDNSRequest,
     UpstreamDNSResponse,
     UpstreamDNSSettings,
@@ -15,7 +17,7 @@ router = APIRouter(prefix="/api/settings", tags=["Settings"])
 
 
 @router.get("/upstream-dns", response_model=UpstreamDNSResponse)
-async def get_upstream_dns(session: Session = Depends(get_session)):
+async def get_upstream_dns(session: Session = Depends(get_read_session)):
     """获取上级 DNS 配置"""
     try:
         service = SettingsService(session)
@@ -35,7 +37,7 @@ async def get_upstream_dns(session: Session = Depends(get_session)):
 @router.put("/upstream-dns", response_model=UpstreamDNSResponse)
 async def update_upstream_dns(
     request: UpdateUpstreamDNSRequest,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_write_session),
 ):
     """更新上级 DNS 配置"""
     try:
@@ -56,3 +58,28 @@ async def update_upstream_dns(
         raise HTTPException(status_code=400, detail=str(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.get("/corefile-plugins", response_model=CorefilePluginSettingsResponse)
+async def get_corefile_plugins(session: Session = Depends(get_read_session)):
+    """获取 Corefile 性能插件配置（cache、forward、loadbalance、log）"""
+    service = SettingsService(session)
+    return {
+        "success": True,
+        "data": service.get_plugin_settings(),
+        "message": "Corefile plugin settings retrieved successfully",
+    }
+
+
+@router.put("/corefile-plugins", response_model=CorefilePluginSettingsResponse)
+async def update_corefile_plugins(
+    request: CorefilePluginSettings,
+    session: Session = Depends(get_write_session),
+):
+    """更新 Corefile 性能插件配置，未提供的项恢复默认值，随后重新生成 Corefile"""
+    service = SettingsService(session)
+    return {
+        "success": True,
+        "data": service.set_plugin_settings(request),
+        "message": "Corefile plugin settings updated successfully",
+    }
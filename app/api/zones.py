@@ -0,0 +1,59 @@
+"""
+Zone API Router
+管理生成 Corefile 时使用的每个 zone 的选项（fallthrough、log、forward、cache）
+"""
+
+from fastapi import APIRouter, Depends
+from sqlmodel import Session
+
+from app.database import get_read_session, get_write_session
+from app.schemas.zone import (
+    ZoneCreate,
+    ZoneDeleteResponse,
+    ZoneDetailResponse,
+    ZoneListResponse,
+    ZonePatch,
+)
+from app.services.zone_service import ZoneService
+
+router = APIRouter(prefix="/api/zones", tags=["Zones"])
+
+
+@router.get("", response_model=ZoneListResponse)
+async def list_zones(session: Session = Depends(get_read_session)):
+    """列出全部 Zone 配置"""
+    return {"success": True, "data": ZoneService.list_zones(session)}
+
+
+@router.get("/{zone_id}", response_model=ZoneDetailResponse)
+async def get_zone(zone_id: int, session: Session = Depends(get_read_session)):
+    return {"success": True, "data": ZoneService.get_zone(session, zone_id)}
+
+
+@router.post("", response_model=ZoneDetailResponse, status_code=201)
+async def create_zone(zone: ZoneCreate, session: Session = Depends(get_write_session)):
+    """创建 Zone 配置，随后重新生成 Corefile"""
+    return {
+        "success": True,
+        "data": ZoneService.create_zone(session, zone),
+        "message": "Zone created successfully",
+    }
+
+
+@router.patch("/{zone_id}", response_model=ZoneDetailResponse)
+async def patch_zone(
+    zone_id: int, zone: ZonePatch, session: Session = Depends(get_write_session)
+):
+    """部分更新 Zone 配置，随后重新生成 Corefile"""
+    return {
+        "success": True,
+        "data": ZoneService.patch_zone(session, zone_id, zone),
+        "message": "Zone updated successfully",
+    }
+
+
+@router.delete("/{zone_id}", response_model=ZoneDeleteResponse)
+async def delete_zone(zone_id: int, session: Session = Depends(get_write_session)):
+    """删除 Zone 配置，该 zone 的记录恢复默认选项"""
+    ZoneService.delete_zone(session, zone_id)
+    return {"success": True, "message": "Zone deleted successfully"}
@@ -2,38 +2,153 @@
 数据库连接和会话管理
 """
 
+import logging
 import os
-from sqlmodel import SQLModel, create_engine, Session
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.pool import QueuePool
+from sqlmodel import create_engine, Session
 from app.config import settings
 
-# 确保数据库目录存在
-db_path = settings.database_url.replace("sqlite:///", "")
-os.makedirs(os.path.dirname(db_path), exist_ok=True)
+logger = logging.getLogger(__name__)
+
+
+def _is_sqlite_file(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def engine_options(database_url: str, pool_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    按数据库类型生成 create_engine 参数
+
+    SQLite 允许跨线程使用连接（FastAPI 在线程池中执行同步依赖）；
+    PostgreSQL 等服务端数据库使用 QueuePool，连接数与回收策略来自配置。
+    pool_size 用于覆盖默认连接池大小（只读连接池）
+    """
+    url = make_url(database_url)
+    options: Dict[str, Any] = {"echo": settings.debug}
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if pool_size is not None and _is_sqlite_file(url):
+            options.update(pool_size=pool_size, max_overflow=settings.db_max_overflow)
+        return options
+
+    options.update(
+        poolclass=QueuePool,
+        pool_size=pool_size or settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    return options
+
+
+def _enable_wal(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+def build_engine(database_url: str, pool_size: Optional[int] = None) -> Engine:
+    """
+    创建数据库引擎
+
+    SQLite 文件数据库会先创建所在目录，并切换到 WAL 模式，
+    使只读连接可以在写事务进行时继续读取
+    """
+    url = make_url(database_url)
+    if _is_sqlite_file(url):
+        directory = os.path.dirname(url.database)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    engine = create_engine(database_url, **engine_options(database_url, pool_size))
+    if _is_sqlite_file(url) and settings.sqlite_wal:
+        event.listen(engine, "connect", _enable_wal)
+    return engine
+
+
+def build_read_engine(database_url: str, write_engine: Engine, read_url: Optional[str] = None) -> Engine:
+    """
+    创建只读查询使用的引擎
+
+    - 配置了 read_url（如 PostgreSQL 只读副本）时连接该地址
+    - SQLite 文件数据库使用 mode=ro 的 URI 连接（独立的连接池）
+    - 其他情况与写引擎共用
+    """
+    if read_url:
+        return build_engine(read_url, pool_size=settings.db_read_pool_size)
+
+    url = make_url(database_url)
+    if not _is_sqlite_file(url) or url.database.startswith("file:"):
+        return write_engine
+
+    path = os.path.abspath(url.database)
+    read_only_url = f"sqlite:///file:{path}?mode=ro&uri=true"
+    return create_engine(
+        read_only_url, **engine_options(read_only_url, pool_size=settings.db_read_pool_size)
+    )
 
-# 创建数据库引擎
-engine = create_engine(
-    settings.database_url,
-    echo=settings.debug,
-    connect_args={"check_same_thread": False},  # SQLite 特定配置
-)
+
+# 创建数据库引擎：写入与只读查询使用不同的连接池
+engine = build_engine(settings.database_url)
+read_engine = build_read_engine(settings.database_url, engine, settings.database_read_url)
 
 
 def create_db_and_tables():
-    """创建所有数据库表"""
-    SQLModel.metadata.create_all(engine)
+    """
+    创建或升级数据库结构
+
+    结构版本已是最新时只执行一次版本查询，不再对全部表做 create_all 反射
+    """
+    from app.migrations import MigrationError, MigrationRunner
 
+    runner = MigrationRunner(engine)
+    if runner.is_current():
+        return
+    if not settings.migrate_on_startup:
+        logger.warning(
+            "Database schema is behind (version %d, expected %d); "
+            "run `python -m app.migrations upgrade`",
+            runner.current_version(),
+            runner.head,
+        )
+        return
+    try:
+        runner.upgrade()
+    except MigrationError as exc:
+        # 迁移失败时中止启动，避免在只升级了一半的结构上继续提供服务；修复数据后重启即可
+        logger.error(str(exc))
+        raise
 
-def get_session():
+
+def get_write_session():
     """
-    获取数据库会话（用于依赖注入）
+    获取写入使用的数据库会话（用于依赖注入）
 
     使用方式：
     ```python
-    @app.get("/items")
-    def get_items(session: Session = Depends(get_session)):
-        items = session.query(Item).all()
-        return items
+    @app.post("/items")
+    def create_item(session: Session = Depends(get_write_session)):
+        ...
     ```
     """
     with Session(engine) as session:
         yield session
+
+
+# 兼容原有名称：未区分读写的依赖仍然使用写引擎
+get_session = get_write_session
+
+
+def get_read_session():
+    """
+    获取只读查询使用的数据库会话（用于依赖注入）
+
+    列表、搜索、导出、预览等只读接口使用独立的连接池，
+    频繁的轮询不会占用写入所需的连接
+    """
+    with Session(read_engine) as session:
+        yield session
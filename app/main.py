@@ -6,21 +6,30 @@ CoreDNS Manager - FastAPI 应用入口
 import asyncio
 import logging
 from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
+from sqlmodel import Session
 from starlette.middleware.sessions import SessionMiddleware
 
 from app import models  # noqa: F401
-from app.api import auth, corefile, coredns, records
+from app.api import auth, corefile, coredns, events, metrics, profiles, records, zones
 from app.api import settings as settings_api
 from app.config import settings
-from app.database import create_db_and_tables
+from app.database import create_db_and_tables, engine
+from app.migrations import MigrationRunner
 from app.routes import pages
+from app.services.audit_service import AuditMiddleware, audit_writer, prune_operation_logs
 from app.services.auth_service import AuthService, get_auth_service
+from app.services.cluster_service import generation_coordinator
+from app.services.journal_service import JournalService
+from app.services.settings_service import SettingsService
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiling import ProfilingMiddleware
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +46,57 @@ async def token_refresh_task(auth_service: AuthService):
             logger.error(f"Error in token refresh task: {e}")
 
 
+def compact_record_journal() -> int:
+    """压缩超出保留期的记录变更日志"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.record_journal_retention_days)
+    with Session(engine) as session:
+        return JournalService.compact(session, cutoff)
+
+
+async def journal_compaction_task():
+    """定期压缩记录变更日志的后台任务"""
+    while True:
+        try:
+            await asyncio.to_thread(compact_record_journal)
+        except Exception as e:
+            logger.error(f"Error in journal compaction task: {e}")
+        await asyncio.sleep(settings.record_journal_compaction_interval)
+
+
+def prune_audit_logs() -> int:
+    """按 log_retention_days 系统设置清理审计日志"""
+    with Session(engine) as session:
+        retention_days = SettingsService(session).get_log_retention_days()
+    return prune_operation_logs(engine, retention_days)
+
+
+async def log_retention_task():
+    """定期清理过期审计日志的后台任务"""
+    while True:
+        try:
+            await asyncio.to_thread(prune_audit_logs)
+        except Exception as e:
+            logger.error(f"Error in log retention task: {e}")
+        await asyncio.sleep(settings.log_retention_interval)
+
+
+async def data_migration_task():
+    """
+    后台执行未完成的数据回填
+
+    每批在线程中执行并单独提交，批次之间让出事件循环和数据库，
+    回填期间 API 保持可用；进程重启后从上次提交的位置继续
+    """
+    runner = MigrationRunner(engine)
+    try:
+        backfills = await asyncio.to_thread(runner.pending_backfills)
+        for backfill in backfills:
+            while not await asyncio.to_thread(runner.run_batch, backfill):
+                await asyncio.sleep(settings.migration_batch_pause)
+    except Exception as e:
+        logger.error(f"Error in data migration task: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app_instance: FastAPI):
     """应用生命周期管理"""
@@ -52,6 +112,9 @@ async def lifespan(app_instance: FastAPI):
     create_db_and_tables()
     print("✅ Database initialized successfully")
 
+    # 数据回填在后台分批执行
+    migration_task = asyncio.create_task(data_migration_task())
+
     # 启动 Token 刷新后台任务
     auth_service = get_auth_service()
     refresh_task = None
@@ -59,16 +122,38 @@ async def lifespan(app_instance: FastAPI):
         print(f"⏱️  Starting token refresh task (interval: {settings.oauth2_token_refresh_interval}s)")
         refresh_task = asyncio.create_task(token_refresh_task(auth_service))
 
+    compaction_task = None
+    if settings.record_journal_retention_days > 0:
+        compaction_task = asyncio.create_task(journal_compaction_task())
+
+    # 多副本部署时竞选 Corefile 生成领导者并同步生成结果
+    cluster_task = None
+    if settings.cluster_enabled:
+        print(f"🛰️  Cluster mode enabled (node: {generation_coordinator.node_id})")
+        cluster_task = asyncio.create_task(generation_coordinator.run())
+
+    # 审计日志批量写入与保留期清理
+    audit_task = asyncio.create_task(audit_writer.run())
+    retention_task = asyncio.create_task(log_retention_task())
+
     yield
 
     # 关闭
     print("👋 CoreDNS Manager shutting down...")
-    if refresh_task:
-        refresh_task.cancel()
-        try:
-            await refresh_task
-        except asyncio.CancelledError:
-            pass
+    for task in (
+        refresh_task,
+        compaction_task,
+        retention_task,
+        audit_task,
+        migration_task,
+        cluster_task,
+    ):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
 
 
 # 创建 FastAPI 应用实例
@@ -89,11 +174,15 @@ application.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 审计中间件需要位于 SessionMiddleware 内层以读取登录用户
+application.add_middleware(AuditMiddleware)
 application.add_middleware(
     SessionMiddleware,
     secret_key=settings.secret_key,
     session_cookie="coredns_session",
 )
+application.add_middleware(ProfilingMiddleware)
+application.add_middleware(MetricsMiddleware)
 
 static_dir = Path(__file__).resolve().parent / "static"
 application.mount("/static", StaticFiles(directory=static_dir), name="static")
@@ -101,9 +190,13 @@ application.mount("/static", StaticFiles(directory=static_dir), name="static")
 # 注册 API 路由
 application.include_router(auth.router)
 application.include_router(records.router)
+application.include_router(zones.router)
 application.include_router(corefile.router)
 application.include_router(coredns.router)
 application.include_router(settings_api.router)
+application.include_router(events.router)
+application.include_router(metrics.router)
+application.include_router(profiles.router)
 application.include_router(pages.router)
 
 
@@ -0,0 +1,18 @@
+"""
+数据库结构迁移
+
+结构迁移按版本号顺序执行并记录在 schema_migrations 表中；耗时的数据
+回填按主键分批执行，进度记录在 data_migrations 表中，可中断后继续。
+命令行入口：python -m app.migrations {status,upgrade,backfill}
+"""
+
+from app.migrations.runner import Backfill, Migration, MigrationError, MigrationRunner
+from app.migrations.versions import MIGRATIONS
+
+__all__ = [
+    "Backfill",
+    "Migration",
+    "MigrationError",
+    "MigrationRunner",
+    "MIGRATIONS",
+]
@@ -0,0 +1,59 @@
+"""
+迁移命令行
+
+    python -m app.migrations status
+    python -m app.migrations upgrade [--target N]
+    python -m app.migrations backfill [--batch-size N] [--max-batches N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+
+from app.database import engine
+from app.migrations.runner import MigrationError, MigrationRunner
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Database migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="Show schema version and backfill progress")
+
+    upgrade = commands.add_parser("upgrade", help="Apply pending schema migrations")
+    upgrade.add_argument("--target", type=int, default=None, help="Stop after this version")
+
+    backfill = commands.add_parser("backfill", help="Run pending data backfills")
+    backfill.add_argument("--batch-size", type=int, default=None)
+    backfill.add_argument("--max-batches", type=int, default=None)
+    backfill.add_argument("--pause", type=float, default=None, help="Seconds between batches")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    runner = MigrationRunner(engine)
+
+    if args.command == "status":
+        print(json.dumps(runner.status(), indent=2))
+        return 0
+
+    if args.command == "upgrade":
+        try:
+            applied = runner.upgrade(target=args.target)
+        except MigrationError as exc:
+            print(f"error: {exc}", file=sys.stderr)
+            return 1
+        print(f"applied: {applied or 'none'}; current version: {runner.current_version()}")
+        return 0
+
+    completed = runner.run_backfills(
+        batch_size=args.batch_size, max_batches=args.max_batches, pause=args.pause
+    )
+    print("backfills completed" if completed else "backfills paused; run again to resume")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""Versioned schema migrations and resumable data backfills"""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from app.config import settings
+from app.models.migration import DataMigration, SchemaMigration
+
+logger = logging.getLogger(__name__)
+
+_schema_table = SchemaMigration.__table__
+_data_table = DataMigration.__table__
+
+
+class MigrationError(RuntimeError):
+    """结构迁移执行失败"""
+
+
+class Backfill:
+    """
+    按主键分批执行的数据回填
+
+    batch(connection, after_id, limit) 处理主键大于 after_id 的至多 limit 行，
+    返回 (处理的行数, 本批最大主键)；行数小于 limit 表示已处理完
+    """
+
+    def __init__(self, name: str, batch: Callable[[Connection, int, int], Tuple[int, int]]):
+        self.name = name
+        self.batch = batch
+
+
+class Migration:
+    """
+    一个结构版本
+
+    upgrade(connection) 在单个事务中执行，必须可重复执行（基线迁移会按
+    当前模型创建全部表，新建的数据库上后续迁移的改动往往已经存在）
+    """
+
+    def __init__(
+        self,
+        version: int,
+        name: str,
+        upgrade: Callable[[Connection], None],
+        backfill: Optional[Backfill] = None,
+    ):
+        self.version = version
+        self.name = name
+        self.upgrade = upgrade
+        self.backfill = backfill
+
+
+class MigrationRunner:
+    """执行结构迁移与数据回填"""
+
+    def __init__(self, engine: Engine, migrations: Optional[Sequence[Migration]] = None):
+        if migrations is None:
+            from app.migrations.versions import MIGRATIONS
+
+            migrations = MIGRATIONS
+        self.engine = engine
+        self.migrations = sorted(migrations, key=lambda migration: migration.version)
+
+    @property
+    def head(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    def current_version(self) -> int:
+        """数据库当前的结构版本，尚未引入迁移的数据库为 0"""
+        try:
+            with self.engine.connect() as connection:
+                return connection.execute(select(func.max(_schema_table.c.version))).scalar() or 0
+        except (OperationalError, ProgrammingError):
+            return 0
+
+    def is_current(self) -> bool:
+        return self.current_version() >= self.head
+
+    def pending(self) -> List[Migration]:
+        current = self.current_version()
+        return [migration for migration in self.migrations if migration.version > current]
+
+    def upgrade(self, target: Optional[int] = None) -> List[int]:
+        """依次执行未应用的迁移，返回本次应用的版本号；某个版本失败时停止"""
+        applied: List[int] = []
+        for migration in self.pending():
+            if target is not None and migration.version > target:
+                break
+            logger.info("Applying migration %d: %s", migration.version, migration.name)
+            try:
+                with self.engine.begin() as connection:
+                    migration.upgrade(connection)
+                    connection.execute(
+                        insert(_schema_table).values(
+                            version=migration.version,
+                            name=migration.name,
+                            applied_at=datetime.now(timezone.utc),
+                        )
+                    )
+            except Exception as exc:
+                raise MigrationError(
+                    f"Migration {migration.version} ({migration.name}) failed: {exc}"
+                ) from exc
+            applied.append(migration.version)
+        return applied
+
+    # ------------------------------------------------------------------
+    # 数据回填
+    # ------------------------------------------------------------------
+
+    def _progress(self) -> Dict[str, Dict]:
+        try:
+            with self.engine.connect() as connection:
+                rows = connection.execute(select(_data_table)).mappings().all()
+        except (OperationalError, ProgrammingError):
+            return {}
+        return {row["name"]: dict(row) for row in rows}
+
+    def pending_backfills(self) -> List[Backfill]:
+        """已应用的迁移中尚未完成的回填"""
+        current = self.current_version()
+        progress = self._progress()
+        return [
+            migration.backfill
+            for migration in self.migrations
+            if migration.version <= current
+            and migration.backfill is not None
+            and not (progress.get(migration.backfill.name) or {}).get("completed_at")
+        ]
+
+    def run_batch(self, backfill: Backfill, batch_size: Optional[int] = None) -> bool:
+        """
+        执行一批回填，返回是否已全部完成
+
+        本批数据与进度在同一事务中提交，中断后从上次提交的位置继续
+        """
+        batch_size = batch_size or settings.migration_batch_size
+        now = datetime.now(timezone.utc)
+        with self.engine.begin() as connection:
+            state = connection.execute(
+                select(_data_table).where(_data_table.c.name == backfill.name)
+            ).mappings().first()
+            if state is None:
+                connection.execute(insert(_data_table).values(name=backfill.name, updated_at=now))
+                last_id, processed = 0, 0
+            elif state["completed_at"] is not None:
+                return True
+            else:
+                last_id, processed = state["last_id"], state["processed"]
+
+            count, max_id = backfill.batch(connection, last_id, batch_size)
+            done = count < batch_size
+            connection.execute(
+                update(_data_table)
+                .where(_data_table.c.name == backfill.name)
+                .values(
+                    last_id=max(last_id, max_id),
+                    processed=processed + count,
+                    completed_at=now if done else None,
+                    updated_at=now,
+                )
+            )
+        if done:
+            logger.info("Backfill %s completed (%d rows)", backfill.name, processed + count)
+        return done
+
+    def run_backfills(
+        self,
+        batch_size: Optional[int] = None,
+        max_batches: Optional[int] = None,
+        pause: Optional[float] = None,
+    ) -> bool:
+        """同步执行所有未完成的回填（命令行使用），返回是否全部完成"""
+        pause = settings.migration_batch_pause if pause is None else pause
+        batches = 0
+        for backfill in self.pending_backfills():
+            while not self.run_batch(backfill, batch_size):
+                batches += 1
+                if max_batches is not None and batches >= max_batches:
+                    return False
+                time.sleep(pause)
+        return True
+
+    def status(self) -> Dict:
+        """当前版本、待执行迁移与回填进度"""
+        progress = self._progress()
+        return {
+            "current_version": self.current_version(),
+            "head": self.head,
+            "pending": [
+                {"version": migration.version, "name": migration.name}
+                for migration in self.pending()
+            ],
+            "backfills": [
+                {
+                    "name": migration.backfill.name,
+                    "processed": (progress.get(migration.backfill.name) or {}).get("processed", 0),
+                    "completed": bool(
+                        (progress.get(migration.backfill.name) or {}).get("completed_at")
+                    ),
+                }
+                for migration in self.migrations
+                if migration.backfill is not None
+            ],
+        }
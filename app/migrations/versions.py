@@ -0,0 +1,157 @@
+"""
+迁移版本列表
+
+新增迁移时追加到 MIGRATIONS 末尾，版本号递增，已发布的迁移不再修改
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+from sqlalchemy import bindparam, func, inspect, select, text, update
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+import app.models  # noqa: F401  注册全部表
+from app.migrations.runner import Backfill, Migration
+from app.models.cluster import ClusterCounter, ClusterLease, CorefileArtifact
+from app.models.dns_record import DNSRecord, ip_sort_key
+from app.models.generation import CorefileGeneration
+
+_records = DNSRecord.__table__
+
+# PostgreSQL 上建立 trigram 索引、支持子串搜索的列
+TRIGRAM_COLUMNS = ("zone", "hostname", "ip_address", "description")
+
+
+def _index(name: str):
+    return next(index for index in _records.indexes if index.name == name)
+
+
+def _baseline(connection: Connection) -> None:
+    """按当前模型创建缺失的表（已有的表不做修改）"""
+    SQLModel.metadata.create_all(connection)
+
+
+def _add_ip_sort_key(connection: Connection) -> None:
+    columns = {column["name"] for column in inspect(connection).get_columns("dns_records")}
+    if "ip_sort_key" not in columns:
+        connection.execute(text("ALTER TABLE dns_records ADD COLUMN ip_sort_key VARCHAR(41)"))
+    _index("ix_dns_records_ip_sort_key").create(connection, checkfirst=True)
+
+
+def _backfill_ip_sort_key(connection: Connection, after_id: int, limit: int) -> Tuple[int, int]:
+    rows = connection.execute(
+        select(_records.c.id, _records.c.ip_address)
+        .where(_records.c.id > after_id)
+        .order_by(_records.c.id)
+        .limit(limit)
+    ).all()
+    if not rows:
+        return 0, after_id
+    connection.execute(
+        update(_records)
+        .where(_records.c.id == bindparam("row_id"))
+        .values(ip_sort_key=bindparam("key")),
+        [{"row_id": row.id, "key": ip_sort_key(row.ip_address)} for row in rows],
+    )
+    return len(rows), rows[-1].id
+
+
+def _duplicate_active_records(connection: Connection, limit: int = 20) -> str:
+    """列出未删除记录中重复的 (zone, hostname) 及其记录 ID，没有重复时返回空字符串"""
+    duplicates = (
+        select(_records.c.zone, _records.c.hostname)
+        .where(_records.c.status != "deleted")
+        .group_by(_records.c.zone, _records.c.hostname)
+        .having(func.count() > 1)
+        .limit(limit)
+        .subquery()
+    )
+    rows = connection.execute(
+        select(_records.c.zone, _records.c.hostname, _records.c.id)
+        .join(
+            duplicates,
+            (_records.c.zone == duplicates.c.zone) & (_records.c.hostname == duplicates.c.hostname),
+        )
+        .where(_records.c.status != "deleted")
+        .order_by(_records.c.zone, _records.c.hostname, _records.c.id)
+    ).all()
+    groups = {}
+    for row in rows:
+        groups.setdefault(f"{row.hostname}.{row.zone}", []).append(str(row.id))
+    return "; ".join(f"{name} (ids {', '.join(ids)})" for name, ids in groups.items())
+
+
+def _unique_active_zone_hostname(connection: Connection) -> None:
+    """
+    未删除记录的 (zone, hostname) 唯一索引
+
+    存量数据中有重复时先列出冲突的记录并停止，不自动删除数据；
+    将多余的记录标记为 deleted 后重新执行迁移
+    """
+    duplicates = _duplicate_active_records(connection)
+    if duplicates:
+        raise RuntimeError(
+            f"duplicate active records must be resolved first: {duplicates}"
+        )
+    _index("uq_active_zone_hostname").create(connection, checkfirst=True)
+
+
+def _postgres_trigram_search(connection: Connection) -> None:
+    """
+    PostgreSQL 上为子串搜索的列建立 pg_trgm GIN 索引，使 ILIKE '%q%' 不再全表扫描
+
+    SQLite 上不做任何操作。数据量很大时可以先手动执行
+    CREATE INDEX CONCURRENTLY 创建同名索引，这里的 IF NOT EXISTS 会跳过
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for column in TRIGRAM_COLUMNS:
+        connection.execute(
+            text(
+                f"CREATE INDEX IF NOT EXISTS ix_dns_records_{column}_trgm "
+                f"ON dns_records USING gin ({column} gin_trgm_ops)"
+            )
+        )
+
+
+def _cluster_tables(connection: Connection) -> None:
+    """多节点协调使用的租约、计数器与生成结果表"""
+    SQLModel.metadata.create_all(
+        connection,
+        tables=[ClusterLease.__table__, ClusterCounter.__table__, CorefileArtifact.__table__],
+    )
+
+
+def _generation_history(connection: Connection) -> None:
+    SQLModel.metadata.create_all(connection, tables=[CorefileGeneration.__table__])
+
+
+def _zone_cache_ttl(connection: Connection) -> None:
+    columns = {column["name"] for column in inspect(connection).get_columns("zones")}
+    if "cache_ttl" not in columns:
+        connection.execute(text("ALTER TABLE zones ADD COLUMN cache_ttl INTEGER"))
+
+
+def _render_index(connection: Connection) -> None:
+    """Corefile 生成查询的覆盖索引，避免每次生成都对全部 active 记录排序"""
+    _index("idx_status_zone_hostname").create(connection, checkfirst=True)
+
+
+MIGRATIONS = [
+    Migration(1, "baseline", _baseline),
+    Migration(
+        2,
+        "dns_records_ip_sort_key",
+        _add_ip_sort_key,
+        backfill=Backfill("dns_records_ip_sort_key", _backfill_ip_sort_key),
+    ),
+    Migration(3, "unique_active_zone_hostname", _unique_active_zone_hostname),
+    Migration(4, "postgres_trigram_search", _postgres_trigram_search),
+    Migration(5, "cluster_coordination", _cluster_tables),
+    Migration(6, "corefile_generation_history", _generation_history),
+    Migration(7, "zone_cache_ttl", _zone_cache_ttl),
+    Migration(8, "dns_records_render_index", _render_index),
+]
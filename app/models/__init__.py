@@ -3,15 +3,26 @@
 """
 
 from app.models.dns_record import DNSRecord
+from app.models.generation import CorefileGeneration
 from app.models.zone import Zone
 from app.models.backup import CorefileBackup
+from app.models.cluster import ClusterCounter, ClusterLease, CorefileArtifact
 from app.models.log import OperationLog
+from app.models.migration import DataMigration, SchemaMigration
+from app.models.record_change import RecordChange
 from app.models.setting import SystemSetting
 
 __all__ = [
     "DNSRecord",
     "Zone",
     "CorefileBackup",
+    "ClusterCounter",
+    "ClusterLease",
+    "CorefileArtifact",
+    "CorefileGeneration",
     "OperationLog",
+    "DataMigration",
+    "SchemaMigration",
+    "RecordChange",
     "SystemSetting",
 ]
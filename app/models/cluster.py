@@ -0,0 +1,58 @@
+"""
+多节点协调数据模型
+"""
+
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime, timezone
+
+
+class ClusterLease(SQLModel, table=True):
+    """
+    领导者租约
+
+    持有者需要在 expires_at 之前续约，过期后其他节点可以接管
+    """
+
+    __tablename__ = "cluster_leases"
+
+    name: str = Field(primary_key=True, max_length=100, description="租约名称")
+    holder: str = Field(max_length=255, description="持有租约的节点 ID")
+    expires_at: datetime = Field(description="租约到期时间")
+    renewed_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="最后续约时间",
+    )
+
+
+class ClusterCounter(SQLModel, table=True):
+    """
+    跨节点共享的计数器
+
+    如 Corefile 生成请求序号：任意节点上的写操作递增，领导者据此判断是否需要重新生成
+    """
+
+    __tablename__ = "cluster_counters"
+
+    name: str = Field(primary_key=True, max_length=100, description="计数器名称")
+    value: int = Field(default=0, description="当前值")
+
+
+class CorefileArtifact(SQLModel, table=True):
+    """
+    领导者生成的 Corefile
+
+    sequence 为全局递增的生成序号，其他节点发现更大的序号时拉取内容写入本地
+    """
+
+    __tablename__ = "corefile_artifacts"
+
+    sequence: Optional[int] = Field(default=None, primary_key=True, description="生成序号")
+    request_seq: int = Field(default=0, description="生成时已处理到的请求序号")
+    digest: str = Field(max_length=64, description="内容 SHA-256")
+    content: str = Field(description="Corefile 内容")
+    node_id: str = Field(max_length=255, description="生成该版本的节点")
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="生成时间",
+    )
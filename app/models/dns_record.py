@@ -2,11 +2,32 @@
 DNS 记录数据模型
 """
 
+import ipaddress
+
+from sqlalchemy import event, text
 from sqlmodel import SQLModel, Field, Index
 from typing import Optional
 from datetime import datetime, timezone
 
 
+def ip_sort_key(value: Optional[str]) -> Optional[str]:
+    """
+    IP 地址的可排序形式
+
+    IPv4 每段补零到 3 位、IPv6 展开为完整形式，使字符串顺序与数值顺序
+    一致（10.0.0.2 排在 10.0.0.10 之前）；IPv4 排在 IPv6 之前
+    """
+    if value is None:
+        return None
+    try:
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return f"9-{value.lower()}"
+    if address.version == 4:
+        return "4-" + ".".join(f"{int(part):03d}" for part in str(address).split("."))
+    return f"6-{address.exploded}"
+
+
 class DNSRecord(SQLModel, table=True):
     """
     DNS 记录模型
@@ -30,6 +51,9 @@ class DNSRecord(SQLModel, table=True):
         description="记录类型（A, AAAA, CNAME 等）",
         index=True,
     )
+    ip_sort_key: Optional[str] = Field(
+        default=None, max_length=41, index=True, description="按数值排序用的 IP 形式"
+    )
     description: Optional[str] = Field(
         default=None, max_length=500, description="记录说明"
     )
@@ -53,6 +77,25 @@ class DNSRecord(SQLModel, table=True):
     __table_args__ = (
         Index("idx_zone_hostname", "zone", "hostname"),
         Index("idx_status_created", "status", "created_at"),
+        # 生成 Corefile 时按 (zone, hostname) 顺序读取 active 记录：覆盖查询用到的全部列，
+        # 按索引顺序返回，不需要回表也不需要对全部记录排序
+        Index(
+            "idx_status_zone_hostname",
+            "status",
+            "zone",
+            "hostname",
+            "ip_address",
+            "record_type",
+        ),
+        # 未删除的记录中 (zone, hostname) 唯一，由数据库保证而不是写入前查询
+        Index(
+            "uq_active_zone_hostname",
+            "zone",
+            "hostname",
+            unique=True,
+            sqlite_where=text("status != 'deleted'"),
+            postgresql_where=text("status != 'deleted'"),
+        ),
     )
 
     class Config:
@@ -66,3 +109,9 @@ class DNSRecord(SQLModel, table=True):
                 "status": "active",
             }
         }
+
+
+@event.listens_for(DNSRecord, "before_insert")
+@event.listens_for(DNSRecord, "before_update")
+def _set_ip_sort_key(mapper, connection, target: DNSRecord) -> None:
+    target.ip_sort_key = ip_sort_key(target.ip_address)
@@ -0,0 +1,42 @@
+"""
+Corefile 生成历史数据模型
+"""
+
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime, timezone
+
+
+class CorefileGeneration(SQLModel, table=True):
+    """
+    Corefile 生成历史
+
+    每次生成并写入 Corefile 记录一行：生成时的数据规模、各阶段耗时、
+    触发来源与重载结果，用于跟踪生成吞吐并与数据增长对照
+    """
+
+    __tablename__ = "corefile_generations"
+
+    id: Optional[int] = Field(default=None, primary_key=True, description="生成序号")
+    digest: str = Field(max_length=64, description="内容 SHA-256")
+    record_count: int = Field(default=0, description="写入的记录数")
+    zone_count: int = Field(default=0, description="Zone 数量")
+    size_bytes: int = Field(default=0, description="内容大小（字节）")
+    query_ms: float = Field(default=0, description="查询耗时（毫秒）")
+    render_ms: float = Field(default=0, description="渲染耗时（毫秒）")
+    write_ms: float = Field(default=0, description="备份与写入耗时（毫秒）")
+    reload_ms: Optional[float] = Field(default=None, description="重载耗时（毫秒），未重载时为空")
+    trigger: str = Field(
+        max_length=50,
+        description="触发来源（records, zones, settings, api, cluster）",
+    )
+    node_id: Optional[str] = Field(default=None, max_length=255, description="执行生成的节点")
+    reload_status: str = Field(
+        default="skipped", max_length=20, description="重载结果（success, failed, skipped）"
+    )
+    reload_detail: Optional[str] = Field(default=None, description="重载返回信息或错误")
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="生成时间",
+        index=True,
+    )
@@ -34,7 +34,7 @@ class OperationLog(SQLModel, table=True):
         default=None, max_length=45, description="操作 IP"
     )
     created_at: datetime = Field(
-        default_factory=lambda: datetime.now(timezone.utc), description="操作时间"
+        default_factory=lambda: datetime.now(timezone.utc), description="操作时间", index=True
     )
 
     class Config:
@@ -0,0 +1,44 @@
+"""
+数据库迁移状态模型
+"""
+
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime, timezone
+
+
+class SchemaMigration(SQLModel, table=True):
+    """
+    已应用的结构迁移
+
+    每个版本一行，最大的 version 即当前数据库结构版本
+    """
+
+    __tablename__ = "schema_migrations"
+
+    version: int = Field(primary_key=True, description="迁移版本号")
+    name: str = Field(max_length=100, description="迁移名称")
+    applied_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="应用时间",
+    )
+
+
+class DataMigration(SQLModel, table=True):
+    """
+    数据回填进度
+
+    回填按主键分批执行，每批提交后记录处理到的最后一个 ID，
+    进程重启后从该位置继续
+    """
+
+    __tablename__ = "data_migrations"
+
+    name: str = Field(primary_key=True, max_length=100, description="回填名称")
+    last_id: int = Field(default=0, description="已处理的最大主键")
+    processed: int = Field(default=0, description="已处理的行数")
+    completed_at: Optional[datetime] = Field(default=None, description="完成时间")
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="最后更新时间",
+    )
@@ -0,0 +1,34 @@
+"""
+DNS 记录变更日志数据模型
+"""
+
+from sqlmodel import SQLModel, Field, Index
+from typing import Optional
+from datetime import datetime, timezone
+
+
+class RecordChange(SQLModel, table=True):
+    """
+    DNS 记录变更日志
+
+    每次记录写入在同一事务中追加一条，保存变更前后的记录快照（JSON），
+    用于按时间点重建和恢复整个记录集
+    """
+
+    __tablename__ = "record_changes"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    record_id: int = Field(description="DNS 记录 ID")
+    operation: str = Field(
+        max_length=20,
+        description="操作类型（create, update, delete, restore, checkpoint）",
+    )
+    before: Optional[str] = Field(default=None, description="变更前快照（JSON），不存在时为空")
+    after: Optional[str] = Field(default=None, description="变更后快照（JSON），已删除时为空")
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        description="变更时间",
+        index=True,
+    )
+
+    __table_args__ = (Index("idx_record_changes_record_id", "record_id", "id"),)
@@ -11,7 +11,9 @@ class Zone(SQLModel, table=True):
     """
     DNS Zone 配置模型
 
-    存储 DNS Zone 的配置信息，包括名称、上游 DNS 等
+    存储 DNS Zone 的配置信息，包括名称、上游 DNS 等。
+    生成 Corefile 时按 name 与记录的 zone 关联；没有配置的 zone 使用默认值
+    （fallthrough、log 开启，不单独转发、不缓存），inactive 的 zone 不生成
     """
 
     __tablename__ = "zones"
@@ -26,7 +28,12 @@ class Zone(SQLModel, table=True):
     fallthrough: bool = Field(default=True, description="是否启用 fallthrough")
     log_enabled: bool = Field(default=True, description="是否启用日志")
     upstream_dns: Optional[str] = Field(
-        default=None, max_length=255, description="上游 DNS 服务器地址"
+        default=None,
+        max_length=255,
+        description="上游 DNS 服务器地址，多个以空格分隔（为空则不单独转发）",
+    )
+    cache_ttl: Optional[int] = Field(
+        default=None, description="cache 插件的最大 TTL（秒），为空则不启用缓存"
     )
     status: str = Field(
         default="active", max_length=20, description="状态（active, inactive）"
@@ -45,6 +52,7 @@ class Zone(SQLModel, table=True):
                 "fallthrough": True,
                 "log_enabled": True,
                 "upstream_dns": "223.5.5.5",
+                "cache_ttl": 30,
                 "status": "active",
             }
         }
@@ -9,6 +9,10 @@ class BackupInfo(BaseModel):
     id: str
     filename: str
     size: int
+    stored_size: int | None = None
+    storage: str | None = None
+    digest: str | None = None
+    reason: str | None = None
     created_at: str
     is_latest: bool = False
     content: str | None = None
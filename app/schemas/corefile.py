@@ -1,7 +1,7 @@
 """Schemas for Corefile API"""
 
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List
 
 from pydantic import BaseModel, ConfigDict
 
@@ -13,10 +13,13 @@ class CorefileStats(BaseModel):
 
 
 class CorefileData(BaseModel):
-    content: str
+    content: str | None = None
     stats: CorefileStats
+    digest: str | None = None
+    size_bytes: int | None = None
     generated_at: datetime
     corefile_path: str | None = None
+    generation_id: int | None = None
 
 
 class CorefileGenerateResponse(BaseModel):
@@ -25,6 +28,31 @@ class CorefileGenerateResponse(BaseModel):
     message: str
 
 
-class CorefilePreviewResponse(BaseModel):
+
+class CorefileGenerationInfo(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    digest: str
+    record_count: int
+    zone_count: int
+    size_bytes: int
+    query_ms: float
+    render_ms: float
+    write_ms: float
+    reload_ms: float | None = None
+    trigger: str
+    node_id: str | None = None
+    reload_status: str
+    reload_detail: str | None = None
+    created_at: datetime
+
+
+class CorefileGenerationPage(BaseModel):
+    items: List[CorefileGenerationInfo]
+    next_cursor: int | None = None
+
+
+class CorefileGenerationListResponse(BaseModel):
     success: bool = True
-    data: CorefileData
+    data: CorefileGenerationPage
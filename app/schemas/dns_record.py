@@ -11,6 +11,7 @@ from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 ALLOWED_RECORD_TYPES = ["A", "AAAA", "CNAME"]
 ALLOWED_STATUSES = ["active", "inactive", "deleted"]
+EXPORT_FORMATS = ["ndjson", "csv", "hosts"]
 
 
 def _validate_ip(value: str) -> str:
@@ -147,6 +148,33 @@ class DNSRecordPatch(BaseModel):
         return _validate_status(value)
 
 
+class DNSRecordUpsert(BaseModel):
+    """按 (zone, hostname) 创建或更新 (PUT /by-name)"""
+
+    ip_address: str = Field(..., description="IP 地址")
+    record_type: str = Field("A", description="记录类型")
+    description: Optional[str] = Field(None, max_length=500, description="记录描述")
+    status: str = Field("active", description="状态 (active/inactive)")
+
+    @field_validator("ip_address")
+    @classmethod
+    def validate_ip(cls, value: str) -> str:
+        return _validate_ip(value)
+
+    @field_validator("record_type")
+    @classmethod
+    def validate_record_type(cls, value: str) -> str:
+        return _validate_record_type(value)
+
+    @field_validator("status")
+    @classmethod
+    def validate_status(cls, value: str) -> str:
+        value = _validate_status(value)
+        if value == "deleted":
+            raise ValueError("Use DELETE to remove a record")
+        return value
+
+
 class DNSRecordResponse(BaseModel):
     """DNS 记录响应模型"""
 
@@ -220,8 +248,8 @@ class DNSZoneListResponse(BaseModel):
     data: List[DNSZoneInfo]
 
 
-class DNSRecordSearchParams(BaseModel):
-    """搜索参数模型"""
+class DNSRecordFilterParams(BaseModel):
+    """搜索 / 导出共用的过滤条件"""
 
     q: Optional[str] = Field(None, description="全文搜索关键词")
     zone: Optional[str] = Field(None, description="Zone 精确匹配")
@@ -235,6 +263,10 @@ class DNSRecordSearchParams(BaseModel):
     updated_after: Optional[datetime] = Field(None, description="更新时间晚于")
     updated_before: Optional[datetime] = Field(None, description="更新时间早于")
 
+
+class DNSRecordSearchParams(DNSRecordFilterParams):
+    """搜索参数模型"""
+
     page: int = Field(1, ge=1, description="页码")
     page_size: int = Field(20, ge=1, le=100, description="每页数量")
 
@@ -249,3 +281,40 @@ class DNSRecordSearchResponse(BaseModel):
     data: List[DNSRecordResponse]
     pagination: PaginationInfo
     filters_applied: Dict[str, str]
+
+
+class DNSRecordExportParams(DNSRecordFilterParams):
+    """导出参数模型"""
+
+    format: str = Field(
+        "ndjson", pattern="^(ndjson|csv|hosts)$", description="导出格式（ndjson/csv/hosts）"
+    )
+    compress: bool = Field(False, description="是否使用 gzip 压缩输出")
+    include_deleted: bool = Field(False, description="是否包含已删除的记录")
+
+
+class DNSRecordSnapshotResponse(BaseModel):
+    """时间点记录集响应"""
+
+    success: bool = True
+    timestamp: datetime
+    total: int
+    data: List[DNSRecordResponse]
+
+
+class DNSRecordRestoreSummary(BaseModel):
+    """时间点恢复结果"""
+
+    timestamp: str
+    created: int
+    updated: int
+    deleted: int
+    dry_run: bool
+
+
+class DNSRecordRestoreResponse(BaseModel):
+    """时间点恢复响应"""
+
+    success: bool = True
+    data: DNSRecordRestoreSummary
+    message: str
@@ -1,6 +1,6 @@
 """Settings schemas"""
 
-from typing import Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field, validator
 
 from app.config import settings
@@ -70,3 +70,117 @@ class UpdateUpstreamDNSRequest(BaseModel):
         if "." not in v and ":" not in v:
             raise ValueError("Invalid DNS address format")
         return v.strip()
+
+
+# CoreDNS cache 插件 success / denial 的默认容量
+DEFAULT_CACHE_CAPACITY = 9984
+
+
+def _join(*parts) -> str:
+    return " ".join(str(part) for part in parts if part is not None)
+
+
+class CorefilePluginSettings(BaseModel):
+    """
+    Corefile 中与性能相关的插件配置
+
+    默认值生成的内容与引入该配置之前相同（cache 30、log、forward 不带选项）
+    """
+
+    cache_enabled: bool = Field(default=True, description="根块是否启用 cache")
+    cache_ttl: int = Field(default=30, ge=1, le=86400, description="缓存最大 TTL（秒）")
+    cache_success_capacity: Optional[int] = Field(
+        default=None, ge=1, le=10_000_000, description="正向应答缓存容量（条）"
+    )
+    cache_success_ttl: Optional[int] = Field(
+        default=None, ge=1, le=86400, description="正向应答最大 TTL（秒）"
+    )
+    cache_denial_capacity: Optional[int] = Field(
+        default=None, ge=1, le=10_000_000, description="否定应答缓存容量（条）"
+    )
+    cache_denial_ttl: Optional[int] = Field(
+        default=None, ge=1, le=86400, description="否定应答最大 TTL（秒）"
+    )
+    cache_prefetch: Optional[int] = Field(
+        default=None, ge=1, le=1000, description="在 prefetch_duration 内被查询多少次后预取"
+    )
+    cache_prefetch_duration: int = Field(default=60, ge=1, le=3600, description="预取统计窗口（秒）")
+    cache_prefetch_percentage: int = Field(
+        default=10, ge=0, le=100, description="剩余 TTL 低于该百分比时预取"
+    )
+    forward_policy: Optional[Literal["random", "round_robin", "sequential"]] = Field(
+        default=None, description="上游选择策略（为空使用 CoreDNS 默认 random）"
+    )
+    forward_max_concurrent: Optional[int] = Field(
+        default=None, ge=1, le=1_000_000, description="最大并发上游查询数"
+    )
+    forward_health_check_ms: Optional[int] = Field(
+        default=None, ge=100, le=3_600_000, description="上游健康检查间隔（毫秒）"
+    )
+    forward_expire: Optional[int] = Field(
+        default=None, ge=1, le=3600, description="到上游的空闲连接过期时间（秒）"
+    )
+    loadbalance: bool = Field(default=False, description="对 A/AAAA 应答随机排序（loadbalance）")
+    log_mode: Literal["all", "errors", "off"] = Field(
+        default="all", description="查询日志：全部、仅错误类、关闭（作用于所有块）"
+    )
+
+    def cache_options(self) -> List[str]:
+        """cache 块内的选项行"""
+        options = []
+        if self.cache_success_capacity or self.cache_success_ttl:
+            options.append(
+                _join(
+                    "success",
+                    self.cache_success_capacity or DEFAULT_CACHE_CAPACITY,
+                    self.cache_success_ttl,
+                )
+            )
+        if self.cache_denial_capacity or self.cache_denial_ttl:
+            options.append(
+                _join(
+                    "denial",
+                    self.cache_denial_capacity or DEFAULT_CACHE_CAPACITY,
+                    self.cache_denial_ttl,
+                )
+            )
+        if self.cache_prefetch:
+            options.append(
+                f"prefetch {self.cache_prefetch} {self.cache_prefetch_duration}s "
+                f"{self.cache_prefetch_percentage}%"
+            )
+        return options
+
+    def forward_options(self) -> List[str]:
+        """forward 块内的选项行"""
+        options = []
+        if self.forward_policy:
+            options.append(f"policy {self.forward_policy}")
+        if self.forward_max_concurrent:
+            options.append(f"max_concurrent {self.forward_max_concurrent}")
+        if self.forward_health_check_ms:
+            options.append(f"health_check {self.forward_health_check_ms}ms")
+        if self.forward_expire:
+            options.append(f"expire {self.forward_expire}s")
+        return options
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "cache_ttl": 300,
+                "cache_success_capacity": 100000,
+                "cache_prefetch": 10,
+                "forward_policy": "round_robin",
+                "forward_max_concurrent": 1000,
+                "loadbalance": True,
+                "log_mode": "errors",
+            }
+        }
+
+
+class CorefilePluginSettingsResponse(BaseModel):
+    """Corefile 插件配置响应"""
+
+    success: bool = True
+    data: CorefilePluginSettings
+    message: str = "Success"
@@ -0,0 +1,154 @@
+"""
+Zone configuration schemas for API request/response
+"""
+
+import ipaddress
+import re
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+ALLOWED_ZONE_STATUSES = ["active", "inactive"]
+MAX_CACHE_TTL = 86400
+
+
+def _validate_zone_name(value: str) -> str:
+    value = value.strip().rstrip(".").lower()
+    pattern = r"^[a-z0-9]([a-z0-9-]*[a-z0-9])?(\.[a-z0-9]([a-z0-9-]*[a-z0-9])?)*$"
+    if not re.match(pattern, value):
+        raise ValueError("Zone name can only contain letters, numbers, hyphens and dots")
+    return value
+
+
+def _validate_upstream(value: Optional[str]) -> Optional[str]:
+    """
+    校验并规范化上游地址列表
+
+    接受以空格或逗号分隔的 IP、IP:端口（IPv6 带端口写作 [addr]:port），
+    以及 tls:// 前缀；返回以单个空格分隔的字符串，空值返回 None
+    """
+    if value is None:
+        return None
+    upstreams = [item for item in re.split(r"[\s,]+", value) if item]
+    if not upstreams:
+        return None
+    for upstream in upstreams:
+        address = upstream.removeprefix("tls://")
+        port = None
+        if address.startswith("["):
+            address, _, port = address[1:].partition("]")
+            port = port.removeprefix(":") or None
+        elif address.count(":") == 1:
+            address, port = address.split(":")
+        try:
+            ipaddress.ip_address(address)
+        except ValueError:
+            raise ValueError(f"Invalid upstream DNS address: {upstream}")
+        if port is not None and not (port.isdigit() and 0 < int(port) < 65536):
+            raise ValueError(f"Invalid upstream DNS port: {upstream}")
+    return " ".join(upstreams)
+
+
+def _validate_status(value: str) -> str:
+    if value not in ALLOWED_ZONE_STATUSES:
+        raise ValueError(f"Status must be one of: {', '.join(ALLOWED_ZONE_STATUSES)}")
+    return value
+
+
+class ZoneCreate(BaseModel):
+    """请求模型：创建 Zone 配置"""
+
+    name: str = Field(..., min_length=1, max_length=255, description="Zone 名称")
+    fallthrough: bool = Field(True, description="hosts 未命中时是否交给后续插件")
+    log_enabled: bool = Field(True, description="是否记录查询日志")
+    upstream_dns: Optional[str] = Field(
+        None, max_length=255, description="该 zone 的上游 DNS，多个以空格分隔"
+    )
+    cache_ttl: Optional[int] = Field(
+        None, ge=1, le=MAX_CACHE_TTL, description="缓存最大 TTL（秒），为空则不缓存"
+    )
+    status: str = Field("active", description="状态 (active/inactive)")
+
+    @field_validator("name")
+    @classmethod
+    def validate_name(cls, value: str) -> str:
+        return _validate_zone_name(value)
+
+    @field_validator("upstream_dns")
+    @classmethod
+    def validate_upstream_dns(cls, value: Optional[str]) -> Optional[str]:
+        return _validate_upstream(value)
+
+    @field_validator("status")
+    @classmethod
+    def validate_status(cls, value: str) -> str:
+        return _validate_status(value)
+
+
+class ZonePatch(BaseModel):
+    """部分更新模型 (PATCH)"""
+
+    name: Optional[str] = Field(None, min_length=1, max_length=255)
+    fallthrough: Optional[bool] = None
+    log_enabled: Optional[bool] = None
+    upstream_dns: Optional[str] = Field(None, max_length=255)
+    cache_ttl: Optional[int] = Field(None, ge=1, le=MAX_CACHE_TTL)
+    status: Optional[str] = None
+
+    @field_validator("name")
+    @classmethod
+    def validate_name(cls, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return value
+        return _validate_zone_name(value)
+
+    @field_validator("upstream_dns")
+    @classmethod
+    def validate_upstream_dns(cls, value: Optional[str]) -> Optional[str]:
+        return _validate_upstream(value)
+
+    @field_validator("status")
+    @classmethod
+    def validate_status(cls, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return value
+        return _validate_status(value)
+
+
+class ZoneResponse(BaseModel):
+    """Zone 配置响应模型"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    fallthrough: bool
+    log_enabled: bool
+    upstream_dns: Optional[str] = None
+    cache_ttl: Optional[int] = None
+    status: str
+    created_at: datetime
+    updated_at: datetime
+
+
+class ZoneListResponse(BaseModel):
+    """Zone 配置列表响应"""
+
+    success: bool = True
+    data: List[ZoneResponse]
+
+
+class ZoneDetailResponse(BaseModel):
+    """Zone 配置创建 / 更新 / 详情响应"""
+
+    success: bool = True
+    data: ZoneResponse
+    message: str = "Success"
+
+
+class ZoneDeleteResponse(BaseModel):
+    """Zone 配置删除响应"""
+
+    success: bool = True
+    message: str
@@ -0,0 +1,271 @@
+"""Asynchronous, batched audit logging into OperationLog"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, insert
+from sqlmodel import Session, select
+
+from app.config import settings
+from app.models.log import OperationLog
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+AUDIT_ENTRIES = REGISTRY.counter(
+    "coredns_manager_audit_entries_total",
+    "Audit log entries by outcome (written, dropped, pruned)",
+)
+
+# HTTP 方法 → 操作类型
+METHOD_OPERATIONS = {"POST": "create", "PUT": "update", "PATCH": "update", "DELETE": "delete"}
+# 路由第二段 → 资源类型
+RESOURCE_TYPES = {
+    "records": "record",
+    "corefile": "corefile",
+    "coredns": "coredns",
+    "settings": "setting",
+    "zones": "zone",
+    "auth": "auth",
+}
+
+
+class AuditLogWriter:
+    """
+    审计日志批量写入器
+
+    请求路径上只把条目放入内存队列；后台任务在条目数达到 batch_size
+    或距上次写入超过 flush_interval 时，用一条批量 INSERT 写入数据库。
+    队列超过 max_queue 时丢弃新条目并计数，不阻塞请求。
+    """
+
+    def __init__(
+        self,
+        engine=None,
+        batch_size: int | None = None,
+        flush_interval: float | None = None,
+        max_queue: int | None = None,
+    ):
+        self._engine = engine
+        self.batch_size = batch_size or settings.audit_batch_size
+        self.flush_interval = flush_interval or settings.audit_flush_interval
+        self.max_queue = max_queue or settings.audit_max_queue
+        self._queue: deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from app.database import engine
+
+            self._engine = engine
+        return self._engine
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def record(
+        self,
+        operation_type: str,
+        resource_type: str,
+        resource_id: Optional[int] = None,
+        details: Optional[Dict[str, Any]] = None,
+        user: Optional[str] = None,
+        ip_address: Optional[str] = None,
+    ) -> None:
+        """登记一条审计日志（线程安全，不访问数据库）"""
+        row = {
+            "operation_type": operation_type,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "details": json.dumps(details or {}, ensure_ascii=False, default=str),
+            "user": user or "anonymous",
+            "ip_address": ip_address,
+            "created_at": datetime.now(timezone.utc),
+        }
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                AUDIT_ENTRIES.inc(outcome="dropped")
+                return
+            self._queue.append(row)
+            should_wake = len(self._queue) >= self.batch_size
+
+        if should_wake and self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def flush(self) -> int:
+        """把队列中的条目分批写入数据库，返回写入条数"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [
+                        self._queue.popleft()
+                        for _ in range(min(self.batch_size, len(self._queue)))
+                    ]
+                if not batch:
+                    return written
+                try:
+                    with Session(self.engine) as session:
+                        session.execute(insert(OperationLog), batch)
+                        session.commit()
+                except Exception as exc:
+                    # 写入失败时放回队首，下个周期重试
+                    with self._lock:
+                        self._queue.extendleft(reversed(batch))
+                    logger.error(f"Failed to write audit log batch: {exc}")
+                    return written
+                written += len(batch)
+                AUDIT_ENTRIES.inc(len(batch), outcome="written")
+
+    async def run(self) -> None:
+        """后台写入循环，由 lifespan 启动"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await asyncio.to_thread(self.flush)
+        finally:
+            # 关闭时写出剩余条目
+            await asyncio.to_thread(self.flush)
+            self._loop = None
+            self._wakeup = None
+
+
+audit_writer = AuditLogWriter()
+
+
+def prune_operation_logs(engine, retention_days: int, chunk_size: int | None = None) -> int:
+    """
+    删除超过保留期的审计日志
+
+    按主键分块删除，每块单独提交，避免长事务锁住日志表
+    """
+    if retention_days <= 0:
+        return 0
+    chunk_size = chunk_size or settings.log_retention_chunk_size
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+
+    removed = 0
+    while True:
+        with Session(engine) as session:
+            expired_ids = session.exec(
+                select(OperationLog.id)
+                .where(OperationLog.created_at < cutoff)
+                .order_by(OperationLog.id)
+                .limit(chunk_size)
+            ).all()
+            if not expired_ids:
+                break
+            session.execute(delete(OperationLog).where(OperationLog.id.in_(expired_ids)))
+            session.commit()
+        removed += len(expired_ids)
+        if len(expired_ids) < chunk_size:
+            break
+        # 让出数据库给正常请求
+        time.sleep(0.01)
+
+    if removed:
+        AUDIT_ENTRIES.inc(removed, outcome="pruned")
+        logger.info("Pruned %d operation log entries older than %d days", removed, retention_days)
+    return removed
+
+
+def _client_ip(scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"x-forwarded-for":
+            return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+def _describe(method: str, route_path: str) -> tuple[str, str]:
+    """由路由模板推导 (operation_type, resource_type)"""
+    segments = [segment for segment in route_path.split("/") if segment]
+    resource_segment = segments[1] if len(segments) > 1 else segments[0] if segments else ""
+    resource_type = RESOURCE_TYPES.get(resource_segment, resource_segment)
+
+    literals = [segment for segment in segments[2:] if not segment.startswith("{")]
+    if method == "POST" and literals:
+        # 动作型接口：/api/corefile/generate、/api/coredns/reload 等
+        return literals[-1], resource_type
+    return METHOD_OPERATIONS.get(method, method.lower()), resource_type
+
+
+class AuditMiddleware:
+    """
+    为 /api 下的写操作登记审计日志（纯 ASGI 中间件）
+
+    需要位于 SessionMiddleware 内层，以便读取登录用户
+    """
+
+    def __init__(self, app, writer: AuditLogWriter | None = None):
+        self.app = app
+        self._writer = writer
+
+    @property
+    def writer(self) -> AuditLogWriter:
+        return self._writer or audit_writer
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not settings.audit_enabled
+            or scope.get("method") not in METHOD_OPERATIONS
+            or not scope.get("path", "").startswith("/api/")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", scope.get("path", ""))
+            operation_type, resource_type = _describe(scope["method"], route_path)
+            path_params = scope.get("path_params") or {}
+            resource_id = next(
+                (int(value) for value in path_params.values() if str(value).isdigit()), None
+            )
+            session = scope.get("session") or {}
+            self.writer.record(
+                operation_type=operation_type,
+                resource_type=resource_type,
+                resource_id=resource_id,
+                details={
+                    "method": scope["method"],
+                    "path": scope.get("path"),
+                    "route": route_path,
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                },
+                user=session.get("user"),
+                ip_address=_client_ip(scope),
+            )
+
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import logging
+import time
 from datetime import datetime, timedelta
 from functools import lru_cache
 from hmac import compare_digest
@@ -17,6 +18,7 @@ from app.schemas.auth import (
     OAuth2RefreshRequest,
     UserInfo,
 )
+from app.utils.metrics import OAUTH2_REQUEST_DURATION
 
 logger = logging.getLogger(__name__)
 
@@ -110,8 +112,8 @@ class AuthService:
             }
 
             logger.info(f"Authenticating user {username} via OAuth2: {token_url}")
-            response = requests.post(
-                token_url, data=token_data, timeout=10
+            response = self._oauth2_request(
+                "token", "post", token_url, data=token_data, timeout=10
             )
 
             if response.status_code != 200:
@@ -159,6 +161,21 @@ class AuthService:
                 detail="Authentication error",
             )
 
+    def _oauth2_request(
+        self, endpoint: str, method: str, url: str, **kwargs
+    ) -> requests.Response:
+        """调用 OAuth2 服务器并记录耗时指标"""
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = getattr(requests, method)(url, **kwargs)
+            outcome = str(response.status_code)
+            return response
+        finally:
+            OAUTH2_REQUEST_DURATION.observe(
+                time.perf_counter() - start, endpoint=endpoint, status=outcome
+            )
+
     def _get_user_info(self, access_token: str) -> UserInfo:
         """使用 Access Token 获取用户信息"""
         try:
@@ -167,7 +184,9 @@ class AuthService:
             )
             headers = {"Authorization": f"Bearer {access_token}"}
 
-            response = requests.get(userinfo_url, headers=headers, timeout=10)
+            response = self._oauth2_request(
+                "userinfo", "get", userinfo_url, headers=headers, timeout=10
+            )
 
             if response.status_code != 200:
                 logger.error(f"Failed to get user info: {response.status_code}")
@@ -213,8 +232,8 @@ class AuthService:
             }
 
             logger.info(f"Refreshing token for user {username}")
-            response = requests.post(
-                refresh_url, data=refresh_data, timeout=10
+            response = self._oauth2_request(
+                "refresh", "post", refresh_url, data=refresh_data, timeout=10
             )
 
             if response.status_code != 200:
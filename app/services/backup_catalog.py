@@ -0,0 +1,289 @@
+"""Indexed catalog of Corefile backups"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+try:  # pragma: no cover - fcntl 仅在 POSIX 上可用
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+JOURNAL_NAME = "manifest.journal"
+LOCK_NAME = "manifest.lock"
+MANIFEST_VERSION = 2
+COMPACT_THRESHOLD = 1000
+
+
+class BackupCatalog:
+    """
+    备份目录的内存索引
+
+    manifest.json 保存某一时刻的完整快照，之后的增删以 JSON 行追加到
+    manifest.journal；追加超过 COMPACT_THRESHOLD 行后再合并回 manifest。
+    内存中按创建顺序维护 id → 备份条目的有序字典，并为每个内容对象
+    维护引用计数（被备份引用 + 被增量对象作为基线引用），因此：
+
+    - 列表分页只遍历请求的那一页
+    - 新增、删除、保留期清理的开销与变更条目数成正比
+    - 其他进程修改了目录时，通过文件签名（mtime + size）检测并重新加载
+    - 修改 journal / manifest 时持有 manifest.lock 上的 flock，多个 worker
+      共享同一备份目录时追加与合并不会交错
+    """
+
+    def __init__(self, backup_dir: Path, compact_threshold: int = COMPACT_THRESHOLD):
+        self.manifest_path = backup_dir / MANIFEST_NAME
+        self.journal_path = backup_dir / JOURNAL_NAME
+        self.lock_path = backup_dir / LOCK_NAME
+        self.compact_threshold = compact_threshold
+        self.lock = threading.RLock()
+        self.backups: "OrderedDict[str, Dict]" = OrderedDict()
+        self.objects: Dict[str, Dict] = {}
+        self._refs: Dict[str, int] = {}
+        self._journal_lines = 0
+        self._signature: Tuple | None = None
+        self._lock_depth = 0
+        self.legacy_imported = False
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> None:
+        """文件被其他进程修改过时重新加载"""
+        with self.lock:
+            signature = self._stat_signature()
+            if signature != self._signature:
+                self._load()
+
+    def __len__(self) -> int:
+        return len(self.backups)
+
+    def get(self, backup_id: str) -> Dict | None:
+        return self.backups.get(backup_id)
+
+    def latest(self) -> Dict | None:
+        if not self.backups:
+            return None
+        return next(reversed(self.backups.values()))
+
+    def page(self, offset: int, limit: int) -> List[Dict]:
+        """按创建时间倒序返回一页"""
+        return list(islice(reversed(self.backups.values()), offset, offset + limit))
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """
+        进程内（RLock）与进程间（flock）互斥，可重入
+
+        持有期间其他进程不会追加 journal 或合并 manifest
+        """
+        with self.lock:
+            if self._lock_depth or fcntl is None:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            with self.lock_path.open("a") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------
+    # 修改（调用方需持有 self.lock）
+    # ------------------------------------------------------------------
+
+    def add(self, entry: Dict, obj: Dict | None = None) -> None:
+        """登记新备份；obj 不为空表示同时登记了新的内容对象"""
+        with self.locked():
+            # 先合并其他进程在此之前的修改，再追加本条
+            self.refresh()
+            self._append({"op": "add", "entry": entry, "object": obj})
+            self._apply_add(entry, obj)
+            self._maybe_compact()
+
+    def remove(self, backup_ids: Iterable[str]) -> List[Tuple[str, Dict]]:
+        """删除备份，返回引用计数归零、可以从磁盘删除的对象"""
+        backup_ids = list(backup_ids)
+        if not backup_ids:
+            return []
+        with self.locked():
+            self.refresh()
+            self._append({"op": "remove", "ids": backup_ids})
+            released = self._apply_remove(backup_ids)
+            self._maybe_compact()
+        return released
+
+    def oldest_ids(self, count: int) -> List[str]:
+        return list(islice(self.backups.keys(), count))
+
+    def replace(self, entries: List[Dict], objects: Dict[str, Dict]) -> None:
+        """整体替换并立即写回 manifest（用于导入旧版备份，导入完成后不再重复检查）"""
+        with self.locked():
+            self._reset()
+            for entry in entries:
+                digest = entry["digest"]
+                obj = objects.get(digest) if digest not in self.objects else None
+                self._apply_add(entry, obj)
+            self.legacy_imported = True
+            self.compact()
+
+    def mark_legacy_imported(self) -> None:
+        """记录旧版备份已检查过（目录中没有需要导入的文件）"""
+        with self.locked():
+            self.refresh()
+            self.legacy_imported = True
+            self.compact()
+
+    def compact(self) -> None:
+        """将当前状态写回 manifest.json 并清空 journal"""
+        with self.locked():
+            payload = {
+                "version": MANIFEST_VERSION,
+                "legacy_imported": self.legacy_imported,
+                "objects": self.objects,
+                "backups": list(self.backups.values()),
+            }
+            tmp_path = self.manifest_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(payload, indent=1), encoding="utf-8")
+            os.replace(tmp_path, self.manifest_path)
+            self.journal_path.unlink(missing_ok=True)
+            self._journal_lines = 0
+            self._signature = self._stat_signature()
+
+    # ------------------------------------------------------------------
+    # 内部实现
+    # ------------------------------------------------------------------
+
+    def _stat_signature(self) -> Tuple:
+        signature = []
+        for path in (self.manifest_path, self.journal_path):
+            try:
+                stat = path.stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _reset(self) -> None:
+        self.backups = OrderedDict()
+        self.objects = {}
+        self._refs = {}
+        self._journal_lines = 0
+        self.legacy_imported = False
+
+    def _load(self) -> None:
+        # 先取签名再读取：读取期间其他进程追加的内容会使下次 refresh 重新加载，
+        # 而不是被当作已经读过
+        signature = self._stat_signature()
+        self._reset()
+        if self.manifest_path.exists():
+            payload = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            self.legacy_imported = payload.get("legacy_imported", False)
+            objects, entries = self._upgrade(payload)
+            for entry in entries:
+                digest = entry["digest"]
+                self._apply_add(entry, objects.get(digest) if digest not in self.objects else None)
+
+        if self.journal_path.exists():
+            with self.journal_path.open("r", encoding="utf-8") as handle:
+                for line in handle:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 进程在写入过程中退出留下的半行，忽略
+                        logger.warning("Ignoring truncated backup journal line")
+                        continue
+                    if record["op"] == "add":
+                        self._apply_add(record["entry"], record.get("object"))
+                    elif record["op"] == "remove":
+                        self._apply_remove(record["ids"])
+                    self._journal_lines += 1
+
+        self._signature = signature
+
+    @staticmethod
+    def _upgrade(payload: Dict) -> Tuple[Dict[str, Dict], List[Dict]]:
+        entries = payload.get("backups", [])
+        if payload.get("version", 1) >= 2:
+            return payload.get("objects", {}), entries
+
+        # v1：对象全部是完整快照，压缩方式记录在备份条目上
+        objects = {}
+        for entry in entries:
+            objects[entry["digest"]] = {
+                "kind": "full",
+                "base": None,
+                "depth": 0,
+                "compression": entry.pop("compression"),
+                "stored_size": entry.pop("stored_size"),
+            }
+        return objects, entries
+
+    def _append(self, record: Dict) -> None:
+        with self.journal_path.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._journal_lines += 1
+        self._signature = self._stat_signature()
+
+    def _maybe_compact(self) -> None:
+        if self._journal_lines >= self.compact_threshold:
+            self.compact()
+
+    def _apply_add(self, entry: Dict, obj: Dict | None) -> None:
+        digest = entry["digest"]
+        if obj is not None and digest not in self.objects:
+            self.objects[digest] = obj
+            if obj.get("base"):
+                self._refs[obj["base"]] = self._refs.get(obj["base"], 0) + 1
+        self._refs[digest] = self._refs.get(digest, 0) + 1
+        self.backups[entry["id"]] = entry
+
+    def _apply_remove(self, backup_ids: List[str]) -> List[Tuple[str, Dict]]:
+        released: List[Tuple[str, Dict]] = []
+        for backup_id in backup_ids:
+            entry = self.backups.pop(backup_id, None)
+            if entry is None:
+                continue
+            current = entry["digest"]
+            while current is not None:
+                self._refs[current] -= 1
+                if self._refs[current] > 0:
+                    break
+                del self._refs[current]
+                obj = self.objects.pop(current)
+                released.append((current, obj))
+                current = obj.get("base")
+        return released
+
+
+_catalogs: Dict[str, BackupCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(backup_dir: Path) -> BackupCatalog:
+    """每个备份目录在进程内共享一个 catalog"""
+    key = str(backup_dir.resolve())
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = BackupCatalog(backup_dir)
+    catalog.refresh()
+    return catalog
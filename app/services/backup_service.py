@@ -1,20 +1,160 @@
-"""Corefile backup management service"""
+"""Corefile backup management service (content-addressed store)"""
 
 from __future__ import annotations
 
+import difflib
+import gzip
+import hashlib
+import json
 import logging
+import os
 import shutil
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List
+
+try:  # pragma: no cover - zstandard optional
+    import zstandard
+except Exception:  # pragma: no cover
+    zstandard = None
 
 from app.config import settings
+from app.services.backup_catalog import BackupCatalog, get_catalog
+from app.utils.line_diff import iter_unified_hunks
 
 logger = logging.getLogger(__name__)
 
+OBJECTS_DIR = "objects"
+LEGACY_PREFIX = "Corefile.backup."
+CURRENT_REF = "current"
+MAX_CACHED_DIFF_BYTES = 1024 * 1024
+# 生成增量时逐行匹配的变化区域上限（两侧行数之和）
+MAX_DELTA_DIFF_LINES = 20000
+# 文件修改时间早于此窗口时才记录 stat 签名，覆盖常见文件系统的时间戳粒度：
+# 同一时间戳粒度内的再次写入可能不改变 (mtime, size)
+STAT_SIGNATURE_MIN_AGE_NS = 1_000_000_000
+
+
+def _compress(data: bytes) -> tuple[bytes, str]:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), "zst"
+    return gzip.compress(data, compresslevel=9, mtime=0), "gz"
+
+
+def _decompress(blob: bytes, compression: str) -> bytes:
+    if compression == "zst":
+        if zstandard is None:  # pragma: no cover - environment specific
+            raise RuntimeError("zstandard is required to read this backup")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return gzip.decompress(blob)
+
+
+def compute_delta(base: str, target: str) -> List:
+    """
+    计算行级增量
+
+    结果为操作列表：["=", i1, i2] 复制基线的 [i1, i2) 行，
+    ["+", [lines]] 插入新行；删除不需要显式记录。
+
+    每次写入记录都会创建备份，这里在请求路径上：先去掉公共的首尾行，
+    只对中间变化的区域做 difflib 比较；变化区域超过 MAX_DELTA_DIFF_LINES 行
+    （例如整体重排）时不再逐行匹配，直接把目标的变化区域作为插入，
+    增量不比完整快照小时由调用方退回完整快照。
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+
+    limit = min(len(base_lines), len(target_lines))
+    prefix = 0
+    while prefix < limit and base_lines[prefix] == target_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < limit - prefix
+        and base_lines[-1 - suffix] == target_lines[-1 - suffix]
+    ):
+        suffix += 1
+    base_stop = len(base_lines) - suffix
+    target_stop = len(target_lines) - suffix
+
+    ops: List = []
+    if prefix:
+        ops.append(["=", 0, prefix])
+    base_middle = base_lines[prefix:base_stop]
+    target_middle = target_lines[prefix:target_stop]
+    if len(base_middle) + len(target_middle) > MAX_DELTA_DIFF_LINES:
+        if target_middle:
+            ops.append(["+", target_middle])
+    else:
+        matcher = difflib.SequenceMatcher(None, base_middle, target_middle, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                ops.append(["=", prefix + i1, prefix + i2])
+            elif tag in ("replace", "insert"):
+                ops.append(["+", target_middle[j1:j2]])
+    if suffix:
+        ops.append(["=", base_stop, len(base_lines)])
+    return ops
+
+
+def apply_delta(base: str, ops: List) -> str:
+    """将 compute_delta 的结果应用到基线内容上"""
+    base_lines = base.splitlines(keepends=True)
+    parts: List[str] = []
+    for op in ops:
+        if op[0] == "=":
+            parts.extend(base_lines[op[1] : op[2]])
+        else:
+            parts.extend(op[1])
+    return "".join(parts)
+
+
+class _ContentCache:
+    """最近重建的备份内容（LRU），避免重复回放增量链"""
+
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[tuple[str, str], str]" = OrderedDict()
+
+    def get(self, key: tuple[str, str]) -> str | None:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: tuple[str, str], value: str) -> None:
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_content_cache = _ContentCache(settings.backup_cache_size)
+# ("digest_a:digest_b", context) -> 完整 hunk 文本
+_diff_cache = _ContentCache(settings.backup_diff_cache_size)
+
 
 class BackupService:
-    """Handles filesystem-based Corefile backups"""
+    """
+    Handles Corefile backups in a content-addressed store
+
+    备份内容按 SHA-256 命名并压缩存放在 objects/ 下，BackupCatalog 记录
+    备份 ID 到对象的映射：相同内容只存储一次。对象既可以是完整快照，
+    也可以是相对上一版本的行级增量，每隔 backup_snapshot_interval 个
+    版本强制写一次完整快照以限制重建链长度。
+    """
 
     def __init__(
         self,
@@ -22,47 +162,75 @@ class BackupService:
         backup_dir: str | None = None,
         max_backups: int | None = None,
         max_backup_size_bytes: int | None = None,
+        snapshot_interval: int | None = None,
     ):
         self.corefile_path = Path(corefile_path)
         self.backup_dir = Path(backup_dir or settings.corefile_backup_dir)
         self.backup_dir.mkdir(parents=True, exist_ok=True)
+        self.objects_dir = self.backup_dir / OBJECTS_DIR
         self.max_backups = max_backups or settings.max_corefile_backups
         self.max_backup_size_bytes = max_backup_size_bytes or settings.max_backup_size_bytes
+        self.snapshot_interval = snapshot_interval or settings.backup_snapshot_interval
+        self.catalog: BackupCatalog = get_catalog(self.backup_dir)
+        self._import_legacy_backups()
 
-    def create_backup(self) -> Dict:
+    def create_backup(self, reason: str = "manual") -> Dict:
         if not self.corefile_path.exists():
             raise FileNotFoundError(f"Corefile not found: {self.corefile_path}")
 
-        size = self.corefile_path.stat().st_size
-        if size > self.max_backup_size_bytes:
-            raise ValueError("Corefile exceeds maximum backup size limit")
+        checked_at = time.time_ns()
+        stat = self.corefile_path.stat()
+        signature = [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+        timestamp = datetime.now(timezone.utc)
 
-        if not self._has_enough_space(size):
-            raise OSError("Insufficient disk space for backup")
+        # 跨进程持有锁：增量基线与清理都基于其他 worker 写入后的最新状态
+        with self.catalog.locked():
+            self.catalog.refresh()
+            latest = self.catalog.latest()
+            data = None
+            if latest is not None and latest.get("stat") == signature:
+                # 文件自上一个备份以来没有变化（例如恢复前的备份）：
+                # 直接复用摘要，不再读取和计算 SHA-256
+                digest = latest["digest"]
+                size = latest["size"]
+            else:
+                data = self.corefile_path.read_bytes()
+                digest = hashlib.sha256(data).hexdigest()
+                size = len(data)
 
-        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S_%f")
-        backup_filename = f"Corefile.backup.{timestamp}"
-        backup_path = self.backup_dir / backup_filename
+            new_object = None
+            if digest not in self.catalog.objects:
+                new_object = self._store_object(digest, data)
 
-        shutil.copy2(self.corefile_path, backup_path)
-        self._cleanup_old_backups()
+            entry = {
+                "id": timestamp.strftime("%Y%m%d_%H%M%S_%f"),
+                "digest": digest,
+                "size": size,
+                "reason": reason,
+                "created_at": timestamp.isoformat(),
+            }
+            # 刚写入的文件可能在同一时间戳粒度内再次被改写而签名不变，这种情况不记录签名
+            if stat.st_mtime_ns < checked_at - STAT_SIGNATURE_MIN_AGE_NS:
+                entry["stat"] = signature
+            self.catalog.add(entry, new_object)
+            obj = self.catalog.objects[digest]
+            self._cleanup_old_backups()
 
-        info = self._get_backup_info(backup_path)
-        logger.info("Backup created: %s", backup_filename)
-        return info
+        if data is not None and _content_cache.get(self._cache_key(digest)) is None:
+            _content_cache.put(self._cache_key(digest), data.decode("utf-8"))
+        logger.info("Backup created: %s (%s, %s)", entry["id"], digest[:12], obj["kind"])
+        return self._entry_info(entry, obj)
 
     def list_backups(self, page: int = 1, page_size: int = 20) -> Dict:
-        files = self._sorted_backups()
-        total = len(files)
-        start = (page - 1) * page_size
-        end = start + page_size
-        page_files = files[start:end]
-
-        backups: List[Dict] = []
-        for idx, file in enumerate(page_files):
-            info = self._get_backup_info(file)
-            info["is_latest"] = idx == 0 and page == 1
-            backups.append(info)
+        with self.catalog.lock:
+            self.catalog.refresh()
+            total = len(self.catalog)
+            entries = self.catalog.page((page - 1) * page_size, page_size)
+            backups: List[Dict] = []
+            for idx, entry in enumerate(entries):
+                info = self._entry_info(entry, self.catalog.objects[entry["digest"]])
+                info["is_latest"] = idx == 0 and page == 1
+                backups.append(info)
 
         return {
             "backups": backups,
@@ -72,24 +240,27 @@ class BackupService:
         }
 
     def get_backup(self, backup_id: str) -> Dict:
-        backup_path = self._backup_path(backup_id)
-        if not backup_path.exists():
-            raise FileNotFoundError(f"Backup not found: {backup_id}")
-
-        info = self._get_backup_info(backup_path)
-        info["content"] = backup_path.read_text(encoding="utf-8")
+        with self.catalog.lock:
+            self.catalog.refresh()
+            entry = self._find_entry(backup_id)
+            info = self._entry_info(entry, self.catalog.objects[entry["digest"]])
+            info["content"] = self._reconstruct(entry["digest"])
         return info
 
     def restore_backup(self, backup_id: str) -> Dict:
-        backup_path = self._backup_path(backup_id)
-        if not backup_path.exists():
-            raise FileNotFoundError(f"Backup not found: {backup_id}")
+        with self.catalog.lock:
+            self.catalog.refresh()
+            entry = self._find_entry(backup_id)
+            content = self._reconstruct(entry["digest"])
 
         if self.corefile_path.exists():
-            self.create_backup()
+            self.create_backup(reason="pre-restore")
 
+        # 原地覆盖而不是 rename，与 CorefileService 的写入方式一致：
+        # Docker 以单文件方式挂载 Corefile 时，替换 inode 会让容器内仍然看到旧文件
         self.corefile_path.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(backup_path, self.corefile_path)
+        with open(self.corefile_path, "w", encoding="utf-8") as fh:
+            fh.write(content)
         logger.info("Backup restored: %s", backup_id)
 
         return {
@@ -99,43 +270,244 @@ class BackupService:
         }
 
     def delete_backup(self, backup_id: str) -> None:
-        backup_path = self._backup_path(backup_id)
-        if not backup_path.exists():
-            raise FileNotFoundError(f"Backup not found: {backup_id}")
-
-        files = self._sorted_backups()
-        if files and backup_path == files[0]:
-            raise ValueError("Cannot delete the latest backup")
+        with self.catalog.locked():
+            self.catalog.refresh()
+            entry = self._find_entry(backup_id)
+            if entry is self.catalog.latest():
+                raise ValueError("Cannot delete the latest backup")
+            self._unlink_objects(self.catalog.remove([backup_id]))
 
-        backup_path.unlink()
         logger.info("Backup deleted: %s", backup_id)
 
-    def _sorted_backups(self) -> List[Path]:
-        return sorted(
-            self.backup_dir.glob("Corefile.backup.*"),
-            key=lambda path: path.stat().st_mtime,
-            reverse=True,
-        )
+    def resolve(self, ref: str) -> tuple[str, str]:
+        """
+        解析备份引用，返回 (digest, content)
+
+        ref 为备份 ID，或 "current" 表示当前线上的 Corefile
+        """
+        if ref == CURRENT_REF:
+            if not self.corefile_path.exists():
+                raise FileNotFoundError(f"Corefile not found: {self.corefile_path}")
+            data = self.corefile_path.read_bytes()
+            return hashlib.sha256(data).hexdigest(), data.decode("utf-8")
+
+        with self.catalog.lock:
+            self.catalog.refresh()
+            entry = self._find_entry(ref)
+            return entry["digest"], self._reconstruct(entry["digest"])
+
+    def diff_backups(self, ref_a: str, ref_b: str, context: int = 3) -> tuple[bool, Iterator[str]]:
+        """
+        生成两个版本之间的 unified diff
+
+        返回 (是否命中缓存, 文本块迭代器)。两个引用在此处立即解析，
+        不存在时直接抛出 FileNotFoundError；diff 本身按 hunk 惰性生成，
+        完整生成后按 digest 对缓存结果。
+        """
+        digest_a, content_a = self.resolve(ref_a)
+        digest_b, content_b = self.resolve(ref_b)
+        header = f"--- {ref_a}\n+++ {ref_b}\n"
+        cache_key = (f"{digest_a}:{digest_b}", str(context))
+
+        cached = _diff_cache.get(cache_key)
+        if cached is not None:
+            return True, iter([header + cached] if cached else [])
+
+        def generate() -> Iterator[str]:
+            parts: List[str] = []
+            size = 0
+            for hunk in iter_unified_hunks(content_a, content_b, context):
+                if not parts:
+                    yield header
+                if size <= MAX_CACHED_DIFF_BYTES:
+                    parts.append(hunk)
+                    size += len(hunk)
+                yield hunk
+            if size <= MAX_CACHED_DIFF_BYTES:
+                _diff_cache.put(cache_key, "".join(parts))
+
+        return False, generate()
+
+    # ------------------------------------------------------------------
+    # object store
+    # ------------------------------------------------------------------
+
+    def _object_path(self, digest: str, obj: Dict) -> Path:
+        suffix = "delta." if obj["kind"] == "delta" else ""
+        return self.objects_dir / digest[:2] / f"{digest}.{suffix}{obj['compression']}"
+
+    def _store_object(self, digest: str, data: bytes) -> Dict:
+        """
+        写入新内容对象
+
+        上一版本可用且增量链未超过快照间隔时尝试写增量，
+        增量压缩后不比完整快照小则退回完整快照。
+        """
+        blob, compression = _compress(data)
+        obj = {
+            "kind": "full",
+            "base": None,
+            "depth": 0,
+            "compression": compression,
+            "stored_size": len(blob),
+        }
+
+        latest = self.catalog.latest()
+        base_digest = latest["digest"] if latest else None
+        base_obj = self.catalog.objects.get(base_digest) if base_digest else None
+        if base_obj is not None and base_obj["depth"] + 1 < self.snapshot_interval:
+            base_content = self._reconstruct(base_digest)
+            ops = compute_delta(base_content, data.decode("utf-8"))
+            delta_blob, delta_compression = _compress(
+                json.dumps(ops, separators=(",", ":")).encode("utf-8")
+            )
+            if len(delta_blob) < len(blob):
+                blob = delta_blob
+                obj = {
+                    "kind": "delta",
+                    "base": base_digest,
+                    "depth": base_obj["depth"] + 1,
+                    "compression": delta_compression,
+                    "stored_size": len(delta_blob),
+                }
+
+        if len(blob) > self.max_backup_size_bytes:
+            raise ValueError("Corefile exceeds maximum backup size limit")
+        if not self._has_enough_space(len(blob)):
+            raise OSError("Insufficient disk space for backup")
+
+        self._write_object(digest, obj, blob)
+        return obj
+
+    def _write_object(self, digest: str, obj: Dict, blob: bytes) -> None:
+        path = self._object_path(digest, obj)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(blob)
+        os.replace(tmp_path, path)
+
+    def _cache_key(self, digest: str) -> tuple[str, str]:
+        return (str(self.objects_dir), digest)
+
+    def _reconstruct(self, digest: str) -> str:
+        """按增量链重建某个对象的完整内容"""
+        objects = self.catalog.objects
+        chain: List[str] = []
+        content: str | None = None
+        current: str | None = digest
+        while current is not None:
+            content = _content_cache.get(self._cache_key(current))
+            if content is not None:
+                break
+            chain.append(current)
+            obj = objects[current]
+            if obj["kind"] == "full":
+                content = self._read_object(current, obj).decode("utf-8")
+                _content_cache.put(self._cache_key(current), content)
+                chain.pop()
+                break
+            current = obj["base"]
+
+        for item in reversed(chain):
+            obj = objects[item]
+            content = apply_delta(content, json.loads(self._read_object(item, obj)))
+            _content_cache.put(self._cache_key(item), content)
+        return content
+
+    def _read_object(self, digest: str, obj: Dict) -> bytes:
+        path = self._object_path(digest, obj)
+        if not path.exists():
+            raise FileNotFoundError(f"Backup object missing: {digest}")
+        return _decompress(path.read_bytes(), obj["compression"])
+
+    def _find_entry(self, backup_id: str) -> Dict:
+        entry = self.catalog.get(backup_id)
+        if entry is None:
+            raise FileNotFoundError(f"Backup not found: {backup_id}")
+        return entry
 
     def _cleanup_old_backups(self) -> None:
-        files = self._sorted_backups()
-        for file in files[self.max_backups :]:
-            file.unlink(missing_ok=True)
-            logger.info("Old backup deleted: %s", file.name)
-
-    def _get_backup_info(self, path: Path) -> Dict:
-        stat = path.stat()
-        backup_id = path.name.replace("Corefile.backup.", "")
+        excess = len(self.catalog) - self.max_backups
+        if excess <= 0:
+            return
+        expired = self.catalog.oldest_ids(excess)
+        self._unlink_objects(self.catalog.remove(expired))
+        for backup_id in expired:
+            logger.info("Old backup deleted: %s", backup_id)
+
+    def _unlink_objects(self, released) -> None:
+        """删除不再被任何备份（或其增量链）引用的内容对象"""
+        for digest, obj in released:
+            self._object_path(digest, obj).unlink(missing_ok=True)
+
+    def _import_legacy_backups(self) -> None:
+        """
+        将旧版 Corefile.backup.* 整文件备份迁移到内容寻址存储
+
+        只在备份目录首次使用时检查一次，结果记录在 manifest 中
+        """
+        if self.catalog.legacy_imported:
+            return
+
+        with self.catalog.locked():
+            self.catalog.refresh()
+            if self.catalog.legacy_imported:
+                return
+            legacy_files = sorted(
+                self.backup_dir.glob(f"{LEGACY_PREFIX}*"), key=lambda path: path.stat().st_mtime
+            )
+            if not legacy_files:
+                self.catalog.mark_legacy_imported()
+                return
+
+            entries = list(self.catalog.backups.values())
+            objects = dict(self.catalog.objects)
+            imported = 0
+            for path in legacy_files:
+                backup_id = path.name.replace(LEGACY_PREFIX, "")
+                if self.catalog.get(backup_id) is None:
+                    data = path.read_bytes()
+                    digest = hashlib.sha256(data).hexdigest()
+                    if digest not in objects:
+                        blob, compression = _compress(data)
+                        objects[digest] = {
+                            "kind": "full",
+                            "base": None,
+                            "depth": 0,
+                            "compression": compression,
+                            "stored_size": len(blob),
+                        }
+                        self._write_object(digest, objects[digest], blob)
+                    entries.append(
+                        {
+                            "id": backup_id,
+                            "digest": digest,
+                            "size": len(data),
+                            "reason": "legacy",
+                            "created_at": datetime.fromtimestamp(
+                                path.stat().st_mtime, tz=timezone.utc
+                            ).isoformat(),
+                        }
+                    )
+                    imported += 1
+                path.unlink()
+
+            entries.sort(key=lambda entry: entry["created_at"])
+            self.catalog.replace(entries, objects)
+        logger.info("Imported %d legacy backups into content store", imported)
+
+    def _entry_info(self, entry: Dict, obj: Dict) -> Dict:
         return {
-            "id": backup_id,
-            "filename": path.name,
-            "size": stat.st_size,
-            "created_at": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
+            "id": entry["id"],
+            "filename": f"{LEGACY_PREFIX}{entry['id']}",
+            "size": entry["size"],
+            "stored_size": obj["stored_size"],
+            "storage": obj["kind"],
+            "digest": entry["digest"],
+            "reason": entry.get("reason"),
+            "created_at": entry["created_at"],
         }
 
-    def _backup_path(self, backup_id: str) -> Path:
-        return self.backup_dir / f"Corefile.backup.{backup_id}"
-
     def _has_enough_space(self, size: int) -> bool:
         try:
             usage = shutil.disk_usage(self.backup_dir)
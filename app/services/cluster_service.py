@@ -0,0 +1,247 @@
+"""Leader election and Corefile generation across API replicas"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.config import settings
+from app.models.cluster import ClusterCounter, ClusterLease, CorefileArtifact
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "corefile-generator"
+REQUEST_COUNTER = "corefile.requested"
+# 保留的历史生成结果数量（跟随节点只需要最新一份）
+ARTIFACTS_KEPT = 5
+
+CLUSTER_GENERATIONS = REGISTRY.counter(
+    "coredns_manager_cluster_generations_total",
+    "Corefile artifacts rendered by the leader or applied by followers",
+)
+
+_leases = ClusterLease.__table__
+_counters = ClusterCounter.__table__
+_artifacts = CorefileArtifact.__table__
+
+
+def default_node_id() -> str:
+    return settings.node_id or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class GenerationCoordinator:
+    """
+    多副本部署下的 Corefile 生成协调
+
+    - 各节点通过 cluster_leases 中的租约行竞选领导者，领导者定期续约，
+      过期后由其他节点接管
+    - 任意节点上的记录写入只递增共享的请求序号；领导者发现请求序号
+      超过最近一次生成时，渲染一次（合并期间的所有改动），写入本地
+      Corefile，并把结果以递增的生成序号存入 corefile_artifacts
+    - 其他节点发现更大的生成序号时拉取内容写入本地 Corefile 并重载，
+      内容与本地文件相同时跳过
+    """
+
+    def __init__(
+        self,
+        engine=None,
+        node_id: str | None = None,
+        corefile_path: str | None = None,
+        lease_ttl: float | None = None,
+        auto_reload: bool = True,
+    ):
+        self._engine = engine
+        self.node_id = node_id or default_node_id()
+        self.corefile_path = corefile_path or settings.corefile_path
+        self.lease_ttl = lease_ttl or settings.cluster_lease_ttl
+        self.auto_reload = auto_reload
+        self.is_leader = False
+        self.applied_sequence = 0
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from app.database import engine
+
+            self._engine = engine
+        return self._engine
+
+    # ------------------------------------------------------------------
+    # 租约
+    # ------------------------------------------------------------------
+
+    def heartbeat(self) -> bool:
+        """获取或续约领导者租约，返回本节点是否为领导者"""
+        now = datetime.now(timezone.utc)
+        values = {
+            "holder": self.node_id,
+            "expires_at": now + timedelta(seconds=self.lease_ttl),
+            "renewed_at": now,
+        }
+        with self.engine.begin() as connection:
+            renewed = connection.execute(
+                update(_leases)
+                .where(
+                    _leases.c.name == LEASE_NAME,
+                    or_(_leases.c.holder == self.node_id, _leases.c.expires_at < now),
+                )
+                .values(**values)
+            ).rowcount
+        if not renewed:
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(insert(_leases).values(name=LEASE_NAME, **values))
+                renewed = 1
+            except IntegrityError:
+                renewed = 0
+
+        if bool(renewed) != self.is_leader:
+            logger.info(
+                "Node %s %s Corefile generator leadership",
+                self.node_id,
+                "acquired" if renewed else "lost",
+            )
+        self.is_leader = bool(renewed)
+        return self.is_leader
+
+    def release(self) -> None:
+        """主动释放租约，其他节点无需等待过期即可接管"""
+        if not self.is_leader:
+            return
+        with self.engine.begin() as connection:
+            connection.execute(
+                delete(_leases).where(
+                    _leases.c.name == LEASE_NAME, _leases.c.holder == self.node_id
+                )
+            )
+        self.is_leader = False
+
+    # ------------------------------------------------------------------
+    # 生成
+    # ------------------------------------------------------------------
+
+    def request_generation(self) -> None:
+        """
+        登记一次生成请求（记录写入后调用）
+
+        领导者在本节点时立即生成，否则由领导者的后台循环处理
+        """
+        with self.engine.begin() as connection:
+            bumped = connection.execute(
+                update(_counters)
+                .where(_counters.c.name == REQUEST_COUNTER)
+                .values(value=_counters.c.value + 1)
+            ).rowcount
+            if not bumped:
+                connection.execute(insert(_counters).values(name=REQUEST_COUNTER, value=1))
+
+        if self.is_leader:
+            self.generate_pending()
+
+    def generate_pending(self) -> Optional[int]:
+        """领导者：有未处理的请求时渲染一次，返回新的生成序号"""
+        from app.services.corefile_service import CorefileService
+
+        with self._lock, Session(self.engine) as session:
+            requested = session.execute(
+                select(_counters.c.value).where(_counters.c.name == REQUEST_COUNTER)
+            ).scalar() or 0
+            latest = session.execute(
+                select(_artifacts.c.sequence, _artifacts.c.request_seq)
+                .order_by(_artifacts.c.sequence.desc())
+                .limit(1)
+            ).first()
+            if latest is not None and latest.request_seq >= requested:
+                return None
+            # 渲染前确认租约仍然有效，避免过期的领导者覆盖新领导者的结果
+            if not self.heartbeat():
+                return None
+
+            result = CorefileService().generate_corefile(
+                session=session,
+                output_path=self.corefile_path,
+                auto_reload=self.auto_reload,
+                trigger="cluster",
+                include_content=True,
+            )
+            artifact = CorefileArtifact(
+                request_seq=requested,
+                digest=result["digest"],
+                content=result["content"],
+                node_id=self.node_id,
+            )
+            session.add(artifact)
+            session.flush()
+            sequence = artifact.sequence
+            session.execute(
+                delete(_artifacts).where(_artifacts.c.sequence <= sequence - ARTIFACTS_KEPT)
+            )
+            session.commit()
+
+        self.applied_sequence = sequence
+        CLUSTER_GENERATIONS.inc(role="leader")
+        logger.info("Corefile generation %d rendered by %s", sequence, self.node_id)
+        return sequence
+
+    def sync(self) -> bool:
+        """跟随者：存在更新的生成结果时写入本地 Corefile，返回是否写入"""
+        from app.services.corefile_service import CorefileService
+
+        with self._lock, Session(self.engine) as session:
+            latest = session.execute(
+                select(_artifacts.c.sequence, _artifacts.c.digest)
+                .order_by(_artifacts.c.sequence.desc())
+                .limit(1)
+            ).first()
+            if latest is None or latest.sequence <= self.applied_sequence:
+                return False
+
+            path = Path(self.corefile_path)
+            if path.exists() and hashlib.sha256(path.read_bytes()).hexdigest() == latest.digest:
+                # 同一主机上的其他进程已经写入了相同内容
+                self.applied_sequence = latest.sequence
+                return False
+
+            content = session.execute(
+                select(_artifacts.c.content).where(_artifacts.c.sequence == latest.sequence)
+            ).scalar_one()
+
+        CorefileService().install_corefile(self.corefile_path, content, auto_reload=self.auto_reload)
+        self.applied_sequence = latest.sequence
+        CLUSTER_GENERATIONS.inc(role="follower")
+        logger.info("Corefile generation %d applied on %s", latest.sequence, self.node_id)
+        return True
+
+    def tick(self) -> None:
+        """一次心跳：续约，领导者处理待生成的请求，所有节点同步最新结果"""
+        if self.heartbeat():
+            self.generate_pending()
+        self.sync()
+
+    async def run(self) -> None:
+        """后台协调循环，由 lifespan 启动"""
+        try:
+            while True:
+                try:
+                    await asyncio.to_thread(self.tick)
+                except Exception as exc:
+                    logger.error(f"Error in cluster coordination: {exc}")
+                await asyncio.sleep(settings.cluster_heartbeat_interval)
+        finally:
+            await asyncio.to_thread(self.release)
+
+
+generation_coordinator = GenerationCoordinator(auto_reload=settings.auto_reload_on_generate)
@@ -3,7 +3,9 @@
 from __future__ import annotations
 
 import logging
+import os
 import subprocess
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict
@@ -16,6 +18,8 @@ except Exception:  # pragma: no cover
     DockerException = NotFound = Exception
 
 from app.config import settings
+from app.services.event_service import publish_event
+from app.utils.metrics import COREDNS_RELOAD_DURATION
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +37,21 @@ class CoreDNSService:
                 self.use_docker = False
 
     def reload(self) -> Dict:
-        return self._reload_docker() if self.use_docker else self._reload_process()
+        method = "docker" if self.use_docker else "process"
+        start = time.perf_counter()
+        try:
+            result = self._reload_docker() if self.use_docker else self._reload_process()
+        except Exception as exc:
+            COREDNS_RELOAD_DURATION.observe(
+                time.perf_counter() - start, method=method, status="error"
+            )
+            publish_event("coredns.reload_failed", {"method": method, "error": str(exc)})
+            raise
+        COREDNS_RELOAD_DURATION.observe(
+            time.perf_counter() - start, method=method, status="success"
+        )
+        publish_event("coredns.reloaded", result)
+        return result
 
     def _reload_docker(self) -> Dict:
         assert self.docker_client is not None
@@ -106,7 +124,23 @@ class CoreDNSService:
         return "{" in content and "}" in content
 
     def _find_process(self) -> str | None:
+        if settings.coredns_pid_file:
+            return self._read_pid_file(Path(settings.coredns_pid_file))
         result = subprocess.run(["pgrep", "-f", "coredns"], capture_output=True, text=True)
         if result.returncode == 0:
             return result.stdout.strip().splitlines()[0]
         return None
+
+    @staticmethod
+    def _read_pid_file(path: Path) -> str | None:
+        try:
+            pid = path.read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        if not pid.isdigit():
+            return None
+        try:
+            os.kill(int(pid), 0)
+        except OSError:
+            return None
+        return pid
@@ -1,20 +1,115 @@
 """Corefile generation service"""
 
+import hashlib
+import json
 import logging
+import os
+import shutil
+import threading
 from datetime import datetime, timezone
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Tuple
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Template
+from sqlalchemy import delete, func
 from sqlmodel import Session, select
 
 from app.models.dns_record import DNSRecord
+from app.models.generation import CorefileGeneration
+from app.models.zone import Zone
 from app.config import settings
 from app.services.backup_service import BackupService
+from app.services.cluster_service import default_node_id
 from app.services.coredns_service import CoreDNSService
+from app.services.corefile_template import get_template_cache
+from app.services.event_service import publish_event
+from app.services.zone_service import ZoneService
+from app.utils.metrics import COREFILE_PHASE_DURATION, instrumented
+from app.utils.profiling import span
 
 logger = logging.getLogger(__name__)
 
+# 生成时每批从数据库读取的记录数
+RECORD_BATCH_SIZE = 5000
+# 流式渲染时合并模板片段的块大小（字符）
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _buffered(chunks: Iterable[str], size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """把 Jinja2 产生的细碎片段合并为较大的块"""
+    buffer: List[str] = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer)
+            buffer.clear()
+            length = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _zone_block(name: str, option: Zone | None, records: Iterable) -> Dict:
+    """模板中一个 zone 块的数据；没有 Zone 配置时使用默认选项"""
+    return {
+        "name": name,
+        "records": records,
+        "fallthrough": option.fallthrough if option else True,
+        "log": option.log_enabled if option else True,
+        "upstreams": option.upstream_dns.split() if option and option.upstream_dns else [],
+        "cache_ttl": option.cache_ttl if option else None,
+    }
+
+
+def _group_by_zone(
+    rows: Iterable, stats: Dict, options: Dict[str, Zone], only: str | None = None
+) -> Iterator[Dict]:
+    """
+    将按 zone 排序的记录行分组为模板使用的 zone 迭代器
+
+    每个 zone 的 records 也是迭代器，模板必须按顺序消费；同时累加 stats。
+    有记录的 zone 输出完之后，再输出没有记录但已配置且启用的 zone
+    （例如只转发到内部 DNS 的 zone）
+    """
+
+    def counted(group: Iterable) -> Iterator:
+        for row in group:
+            stats["total_records"] += 1
+            stats["active_records"] += 1
+            yield row
+
+    seen = set()
+    for name, group in groupby(rows, key=itemgetter(0)):
+        seen.add(name)
+        stats["total_zones"] += 1
+        yield _zone_block(name, options.get(name), counted(group))
+
+    for name in sorted(options):
+        option = options[name]
+        if name in seen or option.status != "active" or (only is not None and name != only):
+            continue
+        stats["total_zones"] += 1
+        yield _zone_block(name, option, iter(()))
+
+
+def _collect(chunks: Iterable[str], parts: List[str]) -> Iterator[str]:
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+
+
+def _digest(chunks: Iterable[str]) -> Tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        digest.update(data)
+        size += len(data)
+    return digest.hexdigest(), size
+
 
 class CorefileService:
     """Service responsible for rendering/writing Corefile"""
@@ -25,90 +120,308 @@ class CorefileService:
         template_name: str = "Corefile.j2",
         backup_dir: str | None = None,
     ):
-        self.env = Environment(
-            loader=FileSystemLoader(template_dir),
-            autoescape=select_autoescape(),
-            trim_blocks=True,
-            lstrip_blocks=True,
-        )
-        self.template = self.env.get_template(template_name)
+        # 模板环境在进程内共享，构造实例不再重新解析、编译模板
+        self.templates = get_template_cache(template_dir)
+        self.template_name = template_name
         self.backup_dir = backup_dir or settings.corefile_backup_dir
 
+    @property
+    def template(self) -> Template:
+        return self.templates.get(self.template_name)
+
+    @property
+    def template_version(self) -> str:
+        return self.templates.version(self.template_name)
+
+    @instrumented("generate_corefile")
     def generate_corefile(
         self,
         session: Session,
         output_path: str | None = None,
         auto_reload: bool = True,
+        trigger: str = "api",
+        include_content: bool | None = None,
     ) -> Dict:
-        """Generate Corefile content and optionally write to disk"""
+        """
+        Generate Corefile content and optionally write to disk
+
+        When writing, the template is rendered chunk by chunk straight into a
+        temporary file next to the target, so the full content is never held
+        in memory; it is only returned when include_content is set (the
+        default when nothing is written). Every write is recorded in
+        corefile_generations together with per-phase timings and the trigger
+        source.
+        """
+
+        if include_content is None:
+            include_content = output_path is None
 
-        records: List[DNSRecord] = session.exec(
-            select(DNSRecord).where(DNSRecord.status == "active")
-        ).all()
+        timings: Dict[str, float] = {}
+        with span("corefile.query", COREFILE_PHASE_DURATION, timings, phase="query"):
+            context, stats = self.prepare(session)
+        generated_at = context["generated_at"]
 
-        zones = self._group_records_by_zone(records)
-        generated_at = datetime.now(timezone.utc).isoformat()
+        parts: List[str] = []
+        with span("corefile.render", COREFILE_PHASE_DURATION, timings, phase="render"):
+            chunks = self.stream(context)
+            if include_content:
+                chunks = _collect(chunks, parts)
+            if output_path:
+                tmp_path, digest, size_bytes = self._write_temp(output_path, chunks)
+            else:
+                digest, size_bytes = _digest(chunks)
+
+        result: Dict = {
+            "stats": stats,
+            "digest": digest,
+            "size_bytes": size_bytes,
+            "generated_at": generated_at,
+        }
+        if include_content:
+            result["content"] = "".join(parts)
+
+        if output_path:
+            result.update(self._activate(output_path, tmp_path, auto_reload, timings))
+            result["generation_id"] = self._record_generation(session, result, timings, trigger)
+            publish_event(
+                "corefile.generated",
+                {
+                    "stats": stats,
+                    "digest": digest,
+                    "generated_at": generated_at,
+                    "corefile_path": output_path,
+                },
+            )
+
+        return result
+
+    def prepare(self, session: Session, zone: str | None = None) -> Tuple[Dict, Dict]:
+        """
+        查询生成所需的数据，返回 (模板上下文, 统计信息)；指定 zone 时只包含该 zone
+
+        记录只取渲染用到的列，以元组形式按 (zone, hostname) 顺序分批读取，
+        渲染时一边读取一边按 zone 分组，不构造 ORM 对象，也不在内存中保留全部记录。
+        每个 zone 的选项来自 zones 表，inactive 的 zone 不生成。
+        统计信息在渲染过程中累加，渲染结束后才是最终值
+        """
+        query = (
+            select(DNSRecord.zone, DNSRecord.hostname, DNSRecord.ip_address, DNSRecord.record_type)
+            .where(*self._active_filters(zone))
+            .order_by(DNSRecord.zone, DNSRecord.hostname)
+            .execution_options(yield_per=RECORD_BATCH_SIZE)
+        )
+        options = ZoneService.get_options(session)
+        stats = {"total_zones": 0, "total_records": 0, "active_records": 0}
+        zones = _group_by_zone(session.execute(query), stats, options, zone)
 
         # 获取上级 DNS 配置
         from app.services.settings_service import SettingsService
         settings_service = SettingsService(session)
         primary_dns, secondary_dns = settings_service.get_upstream_dns()
+        plugins = settings_service.get_plugin_settings()
 
-        content = self.template.render(
-            zones=zones,
-            generated_at=generated_at,
-            primary_dns=primary_dns,
-            secondary_dns=secondary_dns
-        )
-
-        stats = {
-            "total_zones": len(zones),
-            "total_records": len(records),
-            "active_records": len(records),
+        context = {
+            "zones": zones,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "primary_dns": primary_dns,
+            "secondary_dns": secondary_dns,
+            "plugins": plugins,
+            "cache_options": plugins.cache_options(),
+            "forward_options": plugins.forward_options(),
         }
+        return context, stats
 
-        result: Dict = {
-            "content": content,
-            "stats": stats,
-            "generated_at": generated_at,
+    @staticmethod
+    def _active_filters(zone: str | None = None) -> List:
+        """参与生成的记录：active，且所属 zone 未被停用"""
+        filters = [
+            DNSRecord.status == "active",
+            DNSRecord.zone.not_in(select(Zone.name).where(Zone.status != "active")),
+        ]
+        if zone is not None:
+            filters.append(DNSRecord.zone == zone)
+        return filters
+
+    @staticmethod
+    def count_records(session: Session, zone: str | None = None) -> Dict:
+        """不渲染时获取统计信息（聚合查询）"""
+        filters = CorefileService._active_filters(zone)
+        total_records = session.execute(
+            select(func.count(DNSRecord.id)).where(*filters)
+        ).scalar_one()
+        zone_names = select(DNSRecord.zone.label("name")).where(*filters).union(
+            select(Zone.name).where(
+                Zone.status == "active", *([Zone.name == zone] if zone is not None else [])
+            )
+        )
+        total_zones = session.execute(
+            select(func.count()).select_from(zone_names.subquery())
+        ).scalar_one()
+        return {
+            "total_zones": total_zones,
+            "total_records": total_records,
+            "active_records": total_records,
         }
 
-        if output_path:
-            file_path = Path(output_path)
-            if file_path.exists():
-                backup_service = BackupService(
-                    corefile_path=output_path,
-                    backup_dir=self.backup_dir,
-                )
-                backup_service.create_backup()
-            self._write_corefile(output_path, content)
-            result["corefile_path"] = output_path
-
-            if auto_reload:
-                try:
-                    reload_result = CoreDNSService().reload()
-                    result["reload_result"] = reload_result
-                except Exception as exc:  # pragma: no cover - system dependent
-                    logger.error("Failed to reload CoreDNS: %s", exc)
-                    result["reload_error"] = str(exc)
+    def stream(self, context: Dict) -> Iterator[str]:
+        """按块渲染 Corefile（模板片段合并为约 STREAM_CHUNK_SIZE 字符的块）"""
+        return _buffered(self.template.generate(**context))
+
+    def install_corefile(
+        self,
+        output_path: str,
+        content: str,
+        auto_reload: bool = True,
+        timings: Dict[str, float] | None = None,
+    ) -> Dict:
+        """备份现有文件后写入新内容，并按需重载 CoreDNS"""
+        tmp_path, _, _ = self._write_temp(output_path, [content])
+        return self._activate(output_path, tmp_path, auto_reload, timings)
+
+    def _activate(
+        self,
+        output_path: str,
+        tmp_path: Path,
+        auto_reload: bool,
+        timings: Dict[str, float] | None,
+    ) -> Dict:
+        """备份现有文件，把临时文件内容写入目标，并按需重载 CoreDNS"""
+
+        result: Dict = {"corefile_path": output_path}
+        try:
+            if Path(output_path).exists():
+                with span("corefile.backup", COREFILE_PHASE_DURATION, timings, phase="backup"):
+                    backup_service = BackupService(
+                        corefile_path=output_path,
+                        backup_dir=self.backup_dir,
+                    )
+                    backup_service.create_backup(reason="generate")
+            with span("corefile.write", COREFILE_PHASE_DURATION, timings, phase="write"):
+                self._write_corefile(output_path, tmp_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
 
+        if auto_reload:
+            try:
+                with span("corefile.reload", COREFILE_PHASE_DURATION, timings, phase="reload"):
+                    result["reload_result"] = CoreDNSService().reload()
+            except Exception as exc:  # pragma: no cover - system dependent
+                logger.error("Failed to reload CoreDNS: %s", exc)
+                result["reload_error"] = str(exc)
         return result
 
-    def _group_records_by_zone(self, records: List[DNSRecord]) -> List[Dict]:
-        zones: Dict[str, Dict] = {}
-        for record in records:
-            zones.setdefault(record.zone, {"name": record.zone, "records": []})[
-                "records"
-            ].append(record)
-        return list(zones.values())
+    @staticmethod
+    def _record_generation(
+        session: Session,
+        result: Dict,
+        timings: Dict[str, float],
+        trigger: str,
+    ) -> int | None:
+        """
+        写入生成历史，返回生成序号
+
+        使用独立的会话提交，不影响调用方会话中已加载对象的状态；
+        记录失败只写日志，不影响生成本身
+        """
+        if "reload_error" in result:
+            reload_status, reload_detail = "failed", result["reload_error"]
+        elif "reload_result" in result:
+            reload_status = result["reload_result"].get("status", "success")
+            reload_detail = json.dumps(result["reload_result"], default=str)
+        else:
+            reload_status, reload_detail = "skipped", None
+
+        generation = CorefileGeneration(
+            digest=result["digest"],
+            record_count=result["stats"]["total_records"],
+            zone_count=result["stats"]["total_zones"],
+            size_bytes=result["size_bytes"],
+            query_ms=round(timings.get("corefile.query", 0.0), 3),
+            render_ms=round(timings.get("corefile.render", 0.0), 3),
+            write_ms=round(
+                timings.get("corefile.backup", 0.0) + timings.get("corefile.write", 0.0), 3
+            ),
+            reload_ms=(
+                round(timings["corefile.reload"], 3) if "corefile.reload" in timings else None
+            ),
+            trigger=trigger,
+            node_id=default_node_id(),
+            reload_status=reload_status,
+            reload_detail=reload_detail,
+        )
+        try:
+            with Session(session.get_bind()) as history_session:
+                history_session.add(generation)
+                history_session.flush()
+                generation_id = generation.id
+                if settings.max_corefile_generations > 0:
+                    history_session.execute(
+                        delete(CorefileGeneration).where(
+                            CorefileGeneration.id
+                            <= generation_id - settings.max_corefile_generations
+                        )
+                    )
+                history_session.commit()
+            return generation_id
+        except Exception as exc:
+            logger.error("Failed to record Corefile generation: %s", exc)
+            return None
 
-    def _write_corefile(self, path: str, content: str) -> None:
+    @staticmethod
+    def list_generations(
+        session: Session, limit: int = 50, before: int | None = None
+    ) -> Tuple[List[CorefileGeneration], int | None]:
+        """
+        按生成序号倒序分页（keyset）
+
+        before 为上一页最后一条的序号，返回 (本页, 下一页游标)；
+        深翻页同样只走主键索引，不需要 OFFSET
+        """
+        query = select(CorefileGeneration).order_by(CorefileGeneration.id.desc())
+        if before is not None:
+            query = query.where(CorefileGeneration.id < before)
+        rows = session.exec(query.limit(limit + 1)).all()
+        items = rows[:limit]
+        next_cursor = items[-1].id if len(rows) > limit else None
+        return items, next_cursor
+
+    @staticmethod
+    def _write_temp(path: str, chunks: Iterable[str]) -> Tuple[Path, str, int]:
+        """
+        把渲染块写入目标旁的临时文件，边写边计算摘要
+
+        返回 (临时文件路径, SHA-256, 字节数)
+        """
         file_path = Path(path)
         file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = file_path.with_name(
+            f".{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp_path, "wb") as fh:
+                for chunk in chunks:
+                    data = chunk.encode("utf-8")
+                    digest.update(data)
+                    size += len(data)
+                    fh.write(data)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return tmp_path, digest.hexdigest(), size
+
+    @staticmethod
+    def _write_corefile(path: str, tmp_path: Path) -> None:
+        """
+        将临时文件内容复制进目标文件
 
+        原地覆盖而不是 rename：Docker 以单文件方式挂载 Corefile 时，
+        替换 inode 会让容器内仍然看到旧文件
+        """
         try:
-            with open(file_path, "w", encoding="utf-8") as fh:
-                fh.write(content)
+            with open(tmp_path, "rb") as src, open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst, STREAM_CHUNK_SIZE)
             logger.info("Corefile written to %s", path)
         except Exception as exc:  # pragma: no cover - file errors
             logger.error("Failed to write Corefile: %s", exc)
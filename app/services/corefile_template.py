@@ -0,0 +1,128 @@
+"""Process-wide Jinja2 environments for Corefile rendering"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Tuple
+
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Template,
+    select_autoescape,
+)
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateCache:
+    """
+    进程内共享的模板环境
+
+    - 模板只解析、编译一次，之后每个 CorefileService 实例直接复用
+    - 编译结果写入 FileSystemBytecodeCache，进程重启后跳过编译
+    - debug 模式下由 Jinja2 在每次取模板时检查文件变化（auto_reload）；
+      其他情况下最多每 check_interval 秒检查一次文件签名（mtime + size），
+      变化时重新编译并替换，编译失败则保留旧模板
+    """
+
+    def __init__(
+        self,
+        template_dir: str,
+        bytecode_dir: str | None = None,
+        auto_reload: bool | None = None,
+        check_interval: float | None = None,
+    ):
+        self.template_dir = Path(template_dir)
+        self.auto_reload = settings.debug if auto_reload is None else auto_reload
+        self.check_interval = (
+            settings.template_check_interval if check_interval is None else check_interval
+        )
+        bytecode_dir = bytecode_dir if bytecode_dir is not None else settings.template_cache_dir
+
+        bytecode_cache = None
+        if bytecode_dir:
+            try:
+                Path(bytecode_dir).mkdir(parents=True, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(bytecode_dir)
+            except OSError as exc:
+                logger.warning("Template bytecode cache disabled: %s", exc)
+
+        self.env = Environment(
+            loader=FileSystemLoader(str(self.template_dir)),
+            autoescape=select_autoescape(),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            auto_reload=self.auto_reload,
+            bytecode_cache=bytecode_cache,
+        )
+        self._lock = threading.Lock()
+        # 模板名 → (模板, 文件签名, 上次检查时间)
+        self._templates: Dict[str, Tuple[Template, Tuple | None, float]] = {}
+
+    def get(self, name: str) -> Template:
+        """获取已编译的模板，文件变化时换用新版本"""
+        if self.auto_reload:
+            return self.env.get_template(name)
+
+        now = time.monotonic()
+        cached = self._templates.get(name)
+        if cached is not None and now - cached[2] < self.check_interval:
+            return cached[0]
+
+        with self._lock:
+            cached = self._templates.get(name)
+            signature = self._signature(name)
+            if cached is not None and cached[1] == signature:
+                self._templates[name] = (cached[0], signature, now)
+                return cached[0]
+
+            try:
+                # 关闭 auto_reload 时 Jinja2 不会自行失效缓存
+                self.env.cache.clear()
+                template = self.env.get_template(name)
+            except Exception:
+                if cached is None:
+                    raise
+                logger.exception("Failed to reload template %s, keeping previous version", name)
+                template = cached[0]
+            else:
+                if cached is not None:
+                    logger.info("Template %s changed, reloaded", name)
+            self._templates[name] = (template, signature, now)
+            return template
+
+    def version(self, name: str) -> str:
+        """
+        当前使用的模板版本（文件签名），用于 ETag 等缓存校验
+
+        模板热替换不经过数据库写入，预览的 ETag 需要同时包含它
+        """
+        if self.auto_reload:
+            signature = self._signature(name)
+        else:
+            self.get(name)
+            signature = self._templates[name][1]
+        if signature is None:
+            return "0"
+        return "{:x}.{:x}".format(*signature)
+
+    def _signature(self, name: str) -> Tuple | None:
+        try:
+            stat = (self.template_dir / name).stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache()
+def get_template_cache(template_dir: str) -> TemplateCache:
+    """获取模板目录对应的共享模板环境"""
+    return TemplateCache(template_dir)
@@ -3,25 +3,41 @@ DNS Service Layer - Business logic for DNS record operations
 """
 
 import logging
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from fastapi import HTTPException
-from sqlalchemy import case
+from sqlalchemy import case, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select, func, or_
 
-from app.models.dns_record import DNSRecord
+from app.models.dns_record import DNSRecord, ip_sort_key
 from app.schemas.dns_record import (
     DNSRecordCreate,
+    DNSRecordFilterParams,
     DNSRecordPatch,
+    DNSRecordResponse,
     DNSRecordSearchParams,
     DNSRecordUpdate,
+    DNSRecordUpsert,
 )
 from app.config import settings
+from app.services.event_service import publish_event
+from app.services.journal_service import JournalService
+from app.utils.metrics import instrumented
+from app.utils.profiling import span
 
 logger = logging.getLogger(__name__)
 
 
+# 支持 INSERT ... ON CONFLICT 的方言
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+# 按名称写入时与并发插入竞争的最大重试次数
+UPSERT_ATTEMPTS = 3
+
+
 class DNSService:
     """DNS 记录服务层"""
 
@@ -29,14 +45,24 @@ class DNSService:
     def _trigger_corefile_update(session: Session) -> None:
         """触发 Corefile 更新和 CoreDNS 重载"""
         try:
+            if settings.cluster_enabled:
+                # 多副本部署：只登记请求，由领导者统一生成
+                from app.services.cluster_service import generation_coordinator
+
+                with span("corefile.request"):
+                    generation_coordinator.request_generation()
+                return
+
             from app.services.corefile_service import CorefileService
 
-            corefile_service = CorefileService()
-            result = corefile_service.generate_corefile(
-                session=session,
-                output_path=settings.corefile_path,
-                auto_reload=True
-            )
+            with span("corefile.update"):
+                corefile_service = CorefileService()
+                result = corefile_service.generate_corefile(
+                    session=session,
+                    output_path=settings.corefile_path,
+                    auto_reload=True,
+                    trigger="records",
+                )
 
             logger.info(
                 f"Corefile auto-update triggered: {result.get('stats', {})} "
@@ -47,27 +73,87 @@ class DNSService:
             # 不抛出异常，避免影响主要的 DNS 记录操作
 
     @staticmethod
-    def create_record(session: Session, record_data: DNSRecordCreate) -> DNSRecord:
-        """创建新的 DNS 记录，包含重复检查"""
+    def _commit(session: Session) -> None:
+        """
+        提交事务，计入请求剖析
 
-        existing = session.exec(
-            select(DNSRecord).where(
-                DNSRecord.zone == record_data.zone,
-                DNSRecord.hostname == record_data.hostname,
+        记录的所有字段都在写入前由应用赋值（主键在 flush 时取得），
+        提交后不让会话过期这些属性，响应直接由内存中的对象生成，
+        不再为了返回结果额外执行一次 SELECT
+        """
+        expire_on_commit = session.expire_on_commit
+        session.expire_on_commit = False
+        try:
+            with span("db.commit"):
+                session.commit()
+        finally:
+            session.expire_on_commit = expire_on_commit
+
+    @staticmethod
+    @contextmanager
+    def _conflict_guard(session: Session, detail: str) -> Iterator[None]:
+        """
+        将 (zone, hostname) 唯一索引冲突转换为 409
+
+        重复检查交给数据库的部分唯一索引，不再在写入前额外查询，
+        并发写入同名记录时也只有一个能成功
+        """
+        try:
+            yield
+        except IntegrityError as exc:
+            session.rollback()
+            message = str(exc.orig).lower()
+            if "unique" in message or "duplicate" in message:
+                raise HTTPException(status_code=409, detail=detail)
+            raise
+
+    @staticmethod
+    def _lock_active_record(session: Session, zone: str, hostname: str) -> Optional[DNSRecord]:
+        """
+        对同名活动记录加写锁并返回其当前值，不存在时返回 None
+
+        用不改变数据的 UPDATE ... RETURNING 代替 SELECT：PostgreSQL 上锁定该行直到提交，
+        SQLite 上开始写事务，其他连接在提交前无法写入
+        """
+        statement = (
+            update(DNSRecord)
+            .where(
+                DNSRecord.zone == zone,
+                DNSRecord.hostname == hostname,
                 DNSRecord.status != "deleted",
             )
-        ).first()
+            .values(updated_at=DNSRecord.updated_at)
+            .returning(DNSRecord)
+        )
+        with span("db.lock"):
+            return session.scalars(
+                statement, execution_options={"populate_existing": True}
+            ).one_or_none()
 
-        if existing:
-            raise HTTPException(
-                status_code=409,
-                detail=f"DNS record already exists: {record_data.hostname}.{record_data.zone}",
-            )
+    @staticmethod
+    def _publish_record_event(event_type: str, record: DNSRecord) -> None:
+        """发布记录变更事件"""
+        publish_event(
+            event_type,
+            DNSRecordResponse.model_validate(record).model_dump(mode="json"),
+        )
+
+    @staticmethod
+    @instrumented("create_record")
+    def create_record(session: Session, record_data: DNSRecordCreate) -> DNSRecord:
+        """创建新的 DNS 记录，重复由唯一索引检测"""
 
         db_record = DNSRecord(**record_data.model_dump())
         session.add(db_record)
-        session.commit()
-        session.refresh(db_record)
+        with DNSService._conflict_guard(
+            session, f"DNS record already exists: {record_data.hostname}.{record_data.zone}"
+        ):
+            session.flush()
+        JournalService.record_change(
+            session, "create", db_record.id, None, JournalService.snapshot(db_record)
+        )
+        DNSService._commit(session)
+        DNSService._publish_record_event("record.created", db_record)
 
         # 自动更新 Corefile 并重载 CoreDNS
         DNSService._trigger_corefile_update(session)
@@ -75,6 +161,87 @@ class DNSService:
         return db_record
 
     @staticmethod
+    @instrumented("upsert_record")
+    def upsert_record(
+        session: Session, zone: str, hostname: str, record_data: DNSRecordUpsert
+    ) -> Tuple[DNSRecord, bool]:
+        """
+        按 (zone, hostname) 创建或更新记录，返回 (记录, 是否新建)
+
+        先对同名活动记录加写锁并读取旧值，再写入：已有记录在锁内更新，
+        变更日志的旧值与写入之间不会被其他事务修改；没有记录时用
+        INSERT ... ON CONFLICT DO NOTHING 插入，冲突目标即活动记录的部分唯一索引。
+        并发插入抢先提交时插入不返回行，重新加锁后按更新处理。
+        """
+
+        insert = UPSERT_INSERTS.get(session.get_bind().dialect.name)
+        if insert is None:
+            raise HTTPException(
+                status_code=501, detail="Upsert is not supported by this database backend"
+            )
+        values = record_data.model_dump()
+
+        for _ in range(UPSERT_ATTEMPTS):
+            existing = DNSService._lock_active_record(session, zone, hostname)
+            now = datetime.now(timezone.utc)
+            if existing is not None:
+                before = JournalService.snapshot(existing)
+                for key, value in values.items():
+                    setattr(existing, key, value)
+                existing.updated_at = now
+                session.add(existing)
+                db_record, created = existing, False
+                break
+
+            # Core INSERT 不经过 ORM 事件，排序键需要显式写入
+            statement = (
+                insert(DNSRecord)
+                .values(
+                    zone=zone,
+                    hostname=hostname,
+                    created_at=now,
+                    updated_at=now,
+                    ip_sort_key=ip_sort_key(values["ip_address"]),
+                    **values,
+                )
+                .on_conflict_do_nothing(
+                    index_elements=["zone", "hostname"],
+                    index_where=DNSRecord.status != "deleted",
+                )
+                .returning(DNSRecord)
+            )
+            with span("db.upsert"):
+                db_record = session.scalars(
+                    statement, execution_options={"populate_existing": True}
+                ).one_or_none()
+            if db_record is not None:
+                before, created = None, True
+                break
+        else:
+            raise HTTPException(
+                status_code=409,
+                detail=f"DNS record is being modified concurrently: {hostname}.{zone}",
+            )
+
+        JournalService.record_change(
+            session,
+            "create" if created else "update",
+            db_record.id,
+            before,
+            JournalService.snapshot(db_record),
+        )
+        DNSService._commit(session)
+        DNSService._publish_record_event(
+            "record.created" if created else "record.updated", db_record
+        )
+
+        # 自动更新 Corefile 并重载 CoreDNS
+        DNSService._trigger_corefile_update(session)
+
+        return db_record, created
+
+    @staticmethod
+    @instrumented("update_record")
     def update_record(
         session: Session, record_id: int, record_data: DNSRecordUpdate
     ) -> DNSRecord:
@@ -87,32 +254,23 @@ class DNSService:
         if db_record.status == "deleted":
             raise HTTPException(status_code=400, detail="Cannot update deleted record")
 
-        existing = session.exec(
-            select(DNSRecord).where(
-                DNSRecord.zone == record_data.zone,
-                DNSRecord.hostname == record_data.hostname,
-                DNSRecord.id != record_id,
-                DNSRecord.status != "deleted",
-            )
-        ).first()
-
-        if existing:
-            raise HTTPException(
-                status_code=409,
-                detail=(
-                    "DNS record conflicts with existing record: "
-                    f"{record_data.hostname}.{record_data.zone}"
-                ),
-            )
-
+        before = JournalService.snapshot(db_record)
         update_payload = record_data.model_dump()
         for key, value in update_payload.items():
             setattr(db_record, key, value)
 
         db_record.updated_at = datetime.now(timezone.utc)
         session.add(db_record)
-        session.commit()
-        session.refresh(db_record)
+        JournalService.record_change(
+            session, "update", record_id, before, JournalService.snapshot(db_record)
+        )
+        with DNSService._conflict_guard(
+            session,
+            "DNS record conflicts with existing record: "
+            f"{record_data.hostname}.{record_data.zone}",
+        ):
+            DNSService._commit(session)
+        DNSService._publish_record_event("record.updated", db_record)
 
         # 自动更新 Corefile 并重载 CoreDNS
         DNSService._trigger_corefile_update(session)
@@ -120,6 +278,7 @@ class DNSService:
         return db_record
 
     @staticmethod
+    @instrumented("patch_record")
     def patch_record(
         session: Session, record_id: int, record_data: DNSRecordPatch
     ) -> DNSRecord:
@@ -134,35 +293,22 @@ class DNSService:
 
         update_data = record_data.model_dump(exclude_unset=True)
 
-        if "zone" in update_data or "hostname" in update_data:
-            new_zone = update_data.get("zone", db_record.zone)
-            new_hostname = update_data.get("hostname", db_record.hostname)
-
-            existing = session.exec(
-                select(DNSRecord).where(
-                    DNSRecord.zone == new_zone,
-                    DNSRecord.hostname == new_hostname,
-                    DNSRecord.id != record_id,
-                    DNSRecord.status != "deleted",
-                )
-            ).first()
-
-            if existing:
-                raise HTTPException(
-                    status_code=409,
-                    detail=(
-                        "DNS record conflicts with existing record: "
-                        f"{new_hostname}.{new_zone}"
-                    ),
-                )
-
+        before = JournalService.snapshot(db_record)
         for key, value in update_data.items():
             setattr(db_record, key, value)
 
         db_record.updated_at = datetime.now(timezone.utc)
         session.add(db_record)
-        session.commit()
-        session.refresh(db_record)
+        JournalService.record_change(
+            session, "update", record_id, before, JournalService.snapshot(db_record)
+        )
+        with DNSService._conflict_guard(
+            session,
+            "DNS record conflicts with existing record: "
+            f"{db_record.hostname}.{db_record.zone}",
+        ):
+            DNSService._commit(session)
+        DNSService._publish_record_event("record.updated", db_record)
 
         # 自动更新 Corefile 并重载 CoreDNS
         DNSService._trigger_corefile_update(session)
@@ -170,6 +316,7 @@ class DNSService:
         return db_record
 
     @staticmethod
+    @instrumented("delete_record")
     def delete_record(session: Session, record_id: int, mode: str = "soft") -> dict:
         """删除 DNS 记录，支持软删除或硬删除"""
 
@@ -183,11 +330,23 @@ class DNSService:
             if db_record.status == "deleted":
                 raise HTTPException(status_code=400, detail="Record is already deleted")
 
+            before = JournalService.snapshot(db_record)
             db_record.status = "deleted"
             db_record.updated_at = datetime.now(timezone.utc)
             session.add(db_record)
-            session.commit()
-            session.refresh(db_record)
+            JournalService.record_change(
+                session, "delete", record_id, before, JournalService.snapshot(db_record)
+            )
+            DNSService._commit(session)
+            publish_event(
+                "record.deleted",
+                {
+                    "id": record_id,
+                    "zone": db_record.zone,
+                    "hostname": db_record.hostname,
+                    "mode": "soft",
+                },
+            )
 
             # 自动更新 Corefile 并重载 CoreDNS
             DNSService._trigger_corefile_update(session)
@@ -198,8 +357,18 @@ class DNSService:
             }
 
         if mode == "hard":
+            deleted = {
+                "id": record_id,
+                "zone": db_record.zone,
+                "hostname": db_record.hostname,
+                "mode": "hard",
+            }
+            JournalService.record_change(
+                session, "delete", record_id, JournalService.snapshot(db_record), None
+            )
             session.delete(db_record)
-            session.commit()
+            DNSService._commit(session)
+            publish_event("record.deleted", deleted)
 
             # 自动更新 Corefile 并重载 CoreDNS
             DNSService._trigger_corefile_update(session)
@@ -214,6 +383,24 @@ class DNSService:
         )
 
     @staticmethod
+    @instrumented("restore_records")
+    def restore_records(session: Session, timestamp: datetime, dry_run: bool = False) -> dict:
+        """将记录集恢复到某一时间点，并重新生成 Corefile"""
+
+        try:
+            summary = JournalService.restore_to(session, timestamp, dry_run=dry_run)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+        if not dry_run and (summary["created"] or summary["updated"] or summary["deleted"]):
+            publish_event("records.restored", summary)
+            # 自动更新 Corefile 并重载 CoreDNS
+            DNSService._trigger_corefile_update(session)
+
+        return summary
+
+    @staticmethod
+    @instrumented("list_records")
     def list_records(
         session: Session,
         page: int = 1,
@@ -245,7 +432,11 @@ class DNSService:
         query = select(DNSRecord)
 
         if not include_deleted:
-            query = query.where(DNSRecord.status != "deleted")
+            query = query.where(
+                DNSService._not_deleted()
+                if search
+                else DNSRecord.status != "deleted"
+            )
 
         # 应用过滤条件
         if zone:
@@ -257,8 +448,8 @@ class DNSService:
         if search:
             query = query.where(
                 or_(
-                    DNSRecord.hostname.contains(search),
-                    DNSRecord.ip_address.contains(search),
+                    DNSService._contains(session, DNSRecord.hostname, search),
+                    DNSService._contains(session, DNSRecord.ip_address, search),
                 )
             )
 
@@ -267,11 +458,7 @@ class DNSService:
         total = session.exec(count_query).one()
 
         # 应用排序
-        order_column = getattr(DNSRecord, sort_by, DNSRecord.created_at)
-        if order == "desc":
-            query = query.order_by(order_column.desc())
-        else:
-            query = query.order_by(order_column.asc())
+        query = DNSService._apply_order(query, sort_by, order)
 
         # 应用分页
         offset = (page - 1) * page_size
@@ -283,6 +470,7 @@ class DNSService:
         return records, total
 
     @staticmethod
+    @instrumented("list_zones")
     def list_zones(
         session: Session,
         search: Optional[str] = None,
@@ -305,7 +493,7 @@ class DNSService:
             query = query.where(DNSRecord.status != "deleted")
 
         if search:
-            query = query.where(DNSRecord.zone.contains(search))
+            query = query.where(DNSService._contains(session, DNSRecord.zone, search))
 
         query = query.group_by(DNSRecord.zone).order_by(func.count().desc(), DNSRecord.zone)
 
@@ -322,20 +510,55 @@ class DNSService:
         ]
 
     @staticmethod
-    def search_records(
-        session: Session, params: DNSRecordSearchParams
-    ) -> Tuple[List[DNSRecord], int, Dict[str, str]]:
-        """搜索 DNS 记录，支持多条件过滤"""
+    def _not_deleted():
+        """
+        子串搜索查询使用的未删除记录过滤条件
+
+        SQLite 遇到与部分唯一索引 uq_active_zone_hostname 相同的 status != 'deleted'
+        条件时会按该索引扫描并逐行回表，读取 ip_address、description 做 LIKE 匹配时
+        比直接扫描表更慢。写成 NOT IN 使条件不再匹配该部分索引；只计数或按 zone
+        排序的查询仍使用原条件，此时该索引覆盖查询，不需要回表
+        """
+        return DNSRecord.status.not_in(["deleted"])
+
+    @staticmethod
+    def _contains(session: Session, column, value: str):
+        """
+        子串匹配
+
+        SQLite 的 LIKE 对 ASCII 不区分大小写；PostgreSQL 使用 ILIKE 保持相同语义，
+        并可以使用 pg_trgm 的 GIN 索引，而不是全表扫描
+        """
+        if session.get_bind().dialect.name == "postgresql":
+            return column.ilike(f"%{value}%")
+        return column.contains(value)
+
+    @staticmethod
+    def _apply_order(query, sort_by: str, order: str):
+        """应用排序；IP 地址按数值顺序排序"""
+
+        if sort_by == "ip_address":
+            columns = [DNSRecord.ip_sort_key, DNSRecord.ip_address]
+        else:
+            columns = [getattr(DNSRecord, sort_by, DNSRecord.created_at)]
+        if order == "desc":
+            return query.order_by(*(column.desc() for column in columns))
+        return query.order_by(*(column.asc() for column in columns))
+
+    @staticmethod
+    def _apply_search_filters(
+        session: Session, query, params: DNSRecordFilterParams
+    ) -> Tuple[Any, Dict[str, str]]:
+        """将搜索过滤条件应用到查询上，返回 (query, filters_applied)"""
 
-        query = select(DNSRecord).where(DNSRecord.status != "deleted")
         filters_applied: Dict[str, str] = {}
 
         if params.q:
             query = query.where(
                 or_(
-                    DNSRecord.hostname.contains(params.q),
-                    DNSRecord.ip_address.contains(params.q),
-                    DNSRecord.description.contains(params.q),
+                    DNSService._contains(session, DNSRecord.hostname, params.q),
+                    DNSService._contains(session, DNSRecord.ip_address, params.q),
+                    DNSService._contains(session, DNSRecord.description, params.q),
                 )
             )
             filters_applied["q"] = params.q
@@ -345,11 +568,11 @@ class DNSService:
             filters_applied["zone"] = params.zone
 
         if params.hostname:
-            query = query.where(DNSRecord.hostname.contains(params.hostname))
+            query = query.where(DNSService._contains(session, DNSRecord.hostname, params.hostname))
             filters_applied["hostname"] = params.hostname
 
         if params.ip:
-            query = query.where(DNSRecord.ip_address.contains(params.ip))
+            query = query.where(DNSService._contains(session, DNSRecord.ip_address, params.ip))
             filters_applied["ip"] = params.ip
 
         if params.record_type:
@@ -376,14 +599,22 @@ class DNSService:
             query = query.where(DNSRecord.updated_at <= params.updated_before)
             filters_applied["updated_before"] = params.updated_before.isoformat()
 
+        return query, filters_applied
+
+    @staticmethod
+    @instrumented("search_records")
+    def search_records(
+        session: Session, params: DNSRecordSearchParams
+    ) -> Tuple[List[DNSRecord], int, Dict[str, str]]:
+        """搜索 DNS 记录，支持多条件过滤"""
+
+        query = select(DNSRecord).where(DNSService._not_deleted())
+        query, filters_applied = DNSService._apply_search_filters(session, query, params)
+
         count_query = select(func.count()).select_from(query.subquery())
         total = session.exec(count_query).one()
 
-        order_column = getattr(DNSRecord, params.sort_by, DNSRecord.created_at)
-        if params.order == "desc":
-            query = query.order_by(order_column.desc())
-        else:
-            query = query.order_by(order_column.asc())
+        query = DNSService._apply_order(query, params.sort_by, params.order)
 
         offset = (params.page - 1) * params.page_size
         query = query.offset(offset).limit(params.page_size)
@@ -391,3 +622,34 @@ class DNSService:
         records = session.exec(query).all()
 
         return records, total, filters_applied
+
+    @staticmethod
+    def iter_export_rows(
+        session: Session,
+        params: DNSRecordFilterParams,
+        include_deleted: bool = False,
+        batch_size: int = 1000,
+    ) -> Iterator[Any]:
+        """
+        流式遍历导出数据
+
+        只选择需要的列并使用 yield_per 分批拉取，避免把全部记录
+        物化为 ORM 对象或响应模型列表
+        """
+        query = select(
+            DNSRecord.id,
+            DNSRecord.zone,
+            DNSRecord.hostname,
+            DNSRecord.ip_address,
+            DNSRecord.record_type,
+            DNSRecord.description,
+            DNSRecord.status,
+            DNSRecord.created_at,
+            DNSRecord.updated_at,
+        )
+        if not include_deleted:
+            query = query.where(DNSRecord.status != "deleted")
+        query, _ = DNSService._apply_search_filters(session, query, params)
+        query = query.order_by(DNSRecord.zone, DNSRecord.hostname, DNSRecord.id)
+
+        yield from session.exec(query.execution_options(yield_per=batch_size))
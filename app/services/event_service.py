@@ -0,0 +1,125 @@
+"""Change event bus feeding the Server-Sent Events stream"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Event:
+    """单个变更事件"""
+
+    id: int
+    type: str
+    data: Dict[str, Any]
+    created_at: str = field(
+        default_factory=lambda: datetime.now(timezone.utc).isoformat()
+    )
+
+    def to_sse(self) -> str:
+        """序列化为 SSE 报文"""
+        payload = json.dumps(
+            {"type": self.type, "created_at": self.created_at, "data": self.data},
+            ensure_ascii=False,
+            default=str,
+        )
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    """单个 SSE 连接的事件队列"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.loop = loop
+        self.queue: asyncio.Queue[Event] = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def _deliver(self, event: Event) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # 消费过慢：关闭连接，由客户端携带 Last-Event-ID 重连补齐
+            self.overflowed = True
+
+
+class EventBus:
+    """进程内事件总线，使用有界环形缓冲区支持断点续传"""
+
+    def __init__(self, buffer_size: int = 1000, max_queue: int = 1000):
+        self._lock = threading.Lock()
+        self._buffer: deque[Event] = deque(maxlen=buffer_size)
+        self._subscribers: set[Subscription] = set()
+        self._last_id = 0
+        self._max_queue = max_queue
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> Event:
+        """发布事件，可在任意线程调用"""
+        with self._lock:
+            self._last_id += 1
+            event = Event(id=self._last_id, type=event_type, data=data)
+            self._buffer.append(event)
+            subscribers = list(self._subscribers)
+
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:  # pragma: no cover - loop already closed
+                self.unsubscribe(subscription)
+        return event
+
+    def events_since(self, last_event_id: int | None) -> Tuple[List[Event], bool]:
+        """
+        返回 last_event_id 之后的缓冲事件
+
+        Returns:
+            (events, complete): complete 为 False 表示缓冲区已丢弃部分事件，
+            客户端需要重新全量同步
+        """
+        with self._lock:
+            if last_event_id is None:
+                return [], True
+            events = [event for event in self._buffer if event.id > last_event_id]
+            oldest = self._buffer[0].id if self._buffer else self._last_id + 1
+            # ID 大于当前最新值说明服务已重启，同样需要全量同步
+            complete = oldest - 1 <= last_event_id <= self._last_id
+            return events, complete
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(asyncio.get_running_loop(), self._max_queue)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+
+@lru_cache()
+def get_event_bus() -> EventBus:
+    """获取事件总线单例"""
+    return EventBus(buffer_size=settings.event_buffer_size)
+
+
+def publish_event(event_type: str, data: Dict[str, Any]) -> None:
+    """服务层发布事件的便捷入口，失败不影响主流程"""
+    try:
+        get_event_bus().publish(event_type, data)
+    except Exception as exc:  # pragma: no cover - defensive
+        logger.error("Failed to publish event %s: %s", event_type, exc)
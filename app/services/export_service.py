@@ -0,0 +1,122 @@
+"""Streaming DNS record export (NDJSON / CSV / hosts)"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator
+
+from sqlmodel import Session
+
+from app.schemas.dns_record import DNSRecordExportParams
+from app.services.dns_service import DNSService
+
+CSV_COLUMNS = [
+    "id",
+    "zone",
+    "hostname",
+    "ip_address",
+    "record_type",
+    "description",
+    "status",
+    "created_at",
+    "updated_at",
+]
+
+
+class ExportService:
+    """将 DNS 记录按批次编码为字节流，可选 gzip 压缩"""
+
+    MEDIA_TYPES = {
+        "ndjson": "application/x-ndjson",
+        "csv": "text/csv; charset=utf-8",
+        "hosts": "text/plain; charset=utf-8",
+    }
+    EXTENSIONS = {"ndjson": "ndjson", "csv": "csv", "hosts": "hosts"}
+
+    def __init__(self, params: DNSRecordExportParams, rows_per_chunk: int = 500):
+        self.params = params
+        self.rows_per_chunk = rows_per_chunk
+
+    @property
+    def media_type(self) -> str:
+        return "application/gzip" if self.params.compress else self.MEDIA_TYPES[self.params.format]
+
+    @property
+    def filename(self) -> str:
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        name = f"dns-records-{timestamp}.{self.EXTENSIONS[self.params.format]}"
+        return f"{name}.gz" if self.params.compress else name
+
+    def stream(self, session: Session) -> Iterator[bytes]:
+        """生成导出内容的字节块"""
+        rows = DNSService.iter_export_rows(
+            session,
+            self.params,
+            include_deleted=self.params.include_deleted,
+        )
+        chunks = self._encode(rows)
+        if self.params.compress:
+            chunks = self._gzip(chunks)
+        yield from chunks
+
+    def _encode(self, rows: Iterable[Any]) -> Iterator[bytes]:
+        encoder = {
+            "ndjson": self._ndjson_lines,
+            "csv": self._csv_lines,
+            "hosts": self._hosts_lines,
+        }[self.params.format]
+
+        buffer: list[str] = []
+        for line in encoder(rows):
+            buffer.append(line)
+            if len(buffer) >= self.rows_per_chunk:
+                yield "".join(buffer).encode("utf-8")
+                buffer.clear()
+        if buffer:
+            yield "".join(buffer).encode("utf-8")
+
+    @staticmethod
+    def _serialize(value: Any) -> Any:
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def _ndjson_lines(self, rows: Iterable[Any]) -> Iterator[str]:
+        for row in rows:
+            payload = {column: self._serialize(value) for column, value in zip(CSV_COLUMNS, row)}
+            yield json.dumps(payload, ensure_ascii=False) + "\n"
+
+    def _csv_lines(self, rows: Iterable[Any]) -> Iterator[str]:
+        line = io.StringIO()
+        writer = csv.writer(line)
+
+        def render(values) -> str:
+            line.seek(0)
+            line.truncate()
+            writer.writerow(values)
+            return line.getvalue()
+
+        yield render(CSV_COLUMNS)
+        for row in rows:
+            yield render([self._serialize(value) for value in row])
+
+    def _hosts_lines(self, rows: Iterable[Any]) -> Iterator[str]:
+        yield f"# Exported by CoreDNS Manager at {datetime.now(timezone.utc).isoformat()}\n"
+        for row in rows:
+            # hosts 文件只包含实际生效的记录
+            if row.status != "active":
+                continue
+            yield f"{row.ip_address} {row.hostname}.{row.zone}\n"
+
+    @staticmethod
+    def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
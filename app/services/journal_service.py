@@ -0,0 +1,235 @@
+"""DNS record change journal and point-in-time reconstruction"""
+
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, update
+from sqlmodel import Session, func, select
+
+from app.config import settings
+from app.models.dns_record import DNSRecord
+from app.models.record_change import RecordChange
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FIELDS = (
+    "zone",
+    "hostname",
+    "ip_address",
+    "record_type",
+    "description",
+    "status",
+    "created_at",
+    "updated_at",
+)
+# 判断记录是否需要恢复时比较的字段（时间戳不参与比较）
+COMPARED_FIELDS = SNAPSHOT_FIELDS[:6]
+
+
+def _normalize(timestamp: datetime) -> datetime:
+    """统一为带时区的 UTC 时间，未带时区的按 UTC 处理"""
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+def _dumps(snapshot: Optional[Dict[str, Any]]) -> Optional[str]:
+    if snapshot is None:
+        return None
+    return json.dumps(snapshot, ensure_ascii=False, separators=(",", ":"))
+
+
+def _loads(payload: Optional[str]) -> Optional[Dict[str, Any]]:
+    return json.loads(payload) if payload else None
+
+
+class JournalService:
+    """DNS 记录变更日志服务"""
+
+    @staticmethod
+    def snapshot(record: DNSRecord) -> Dict[str, Any]:
+        """记录的紧凑快照（时间字段为 ISO 字符串）"""
+        data = {}
+        for field in SNAPSHOT_FIELDS:
+            value = getattr(record, field)
+            data[field] = value.isoformat() if isinstance(value, datetime) else value
+        return data
+
+    @staticmethod
+    def record_change(
+        session: Session,
+        operation: str,
+        record_id: int,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]],
+    ) -> None:
+        """追加一条变更（随调用方的事务一起提交）"""
+        session.add(
+            RecordChange(
+                record_id=record_id,
+                operation=operation,
+                before=_dumps(before),
+                after=_dumps(after),
+            )
+        )
+
+    @staticmethod
+    def check_window(timestamp: datetime) -> None:
+        """时间点早于保留期时，压缩后的日志无法精确重建"""
+        if settings.record_journal_retention_days <= 0:
+            return
+        horizon = datetime.now(timezone.utc) - timedelta(days=settings.record_journal_retention_days)
+        if _normalize(timestamp) < horizon:
+            raise ValueError(
+                f"Timestamp is outside the journal retention window "
+                f"({settings.record_journal_retention_days} days)"
+            )
+
+    @staticmethod
+    def state_at(session: Session, timestamp: datetime) -> Dict[int, Dict[str, Any]]:
+        """
+        重建某一时间点的记录集
+
+        每条记录取该时间点之前最后一次变更的 after 快照；该时间点之前
+        没有变更的，取之后第一次变更的 before 快照（创建操作的 before 为空，
+        即当时还不存在）；从未出现在日志中的记录按当前数据计算。
+        """
+        JournalService.check_window(timestamp)
+        ts = _normalize(timestamp)
+        state: Dict[int, Optional[Dict[str, Any]]] = {}
+
+        latest_ids = (
+            select(func.max(RecordChange.id))
+            .where(RecordChange.created_at <= ts)
+            .group_by(RecordChange.record_id)
+        )
+        for change in session.exec(select(RecordChange).where(RecordChange.id.in_(latest_ids))):
+            state[change.record_id] = _loads(change.after)
+
+        earliest_ids = (
+            select(func.min(RecordChange.id))
+            .where(RecordChange.created_at > ts)
+            .group_by(RecordChange.record_id)
+        )
+        for change in session.exec(select(RecordChange).where(RecordChange.id.in_(earliest_ids))):
+            if change.record_id not in state:
+                state[change.record_id] = _loads(change.before)
+
+        journaled = select(RecordChange.record_id).distinct()
+        untracked = select(DNSRecord).where(
+            DNSRecord.id.not_in(journaled), DNSRecord.created_at <= ts
+        )
+        for record in session.exec(untracked):
+            state[record.id] = JournalService.snapshot(record)
+
+        return {record_id: data for record_id, data in state.items() if data is not None}
+
+    @staticmethod
+    def restore_to(session: Session, timestamp: datetime, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        将记录集恢复到某一时间点
+
+        在一个事务中完成：恢复被删除的记录、回滚被修改的字段、
+        删除该时间点之后创建的记录。每个改动同样写入变更日志，
+        因此恢复本身也可以再被回滚。
+        """
+        target = JournalService.state_at(session, timestamp)
+        current = {record.id: record for record in session.exec(select(DNSRecord))}
+
+        to_create: List[int] = []
+        to_update: List[DNSRecord] = []
+        for record_id, data in target.items():
+            record = current.pop(record_id, None)
+            if record is None:
+                to_create.append(record_id)
+            elif any(getattr(record, field) != data[field] for field in COMPARED_FIELDS):
+                to_update.append(record)
+        to_delete = list(current.values())
+
+        summary = {
+            "timestamp": timestamp.isoformat(),
+            "created": len(to_create),
+            "updated": len(to_update),
+            "deleted": len(to_delete),
+            "dry_run": dry_run,
+        }
+        if dry_run:
+            return summary
+
+        now = datetime.now(timezone.utc)
+        for record in to_delete:
+            JournalService.record_change(
+                session, "restore", record.id, JournalService.snapshot(record), None
+            )
+            session.delete(record)
+        session.flush()
+
+        for record in to_update:
+            before = JournalService.snapshot(record)
+            for field in COMPARED_FIELDS:
+                setattr(record, field, target[record.id][field])
+            record.updated_at = now
+            session.add(record)
+            JournalService.record_change(
+                session, "restore", record.id, before, JournalService.snapshot(record)
+            )
+
+        for record_id in to_create:
+            data = target[record_id]
+            record = DNSRecord(
+                id=record_id,
+                created_at=_normalize(datetime.fromisoformat(data["created_at"])),
+                updated_at=now,
+                **{field: data[field] for field in COMPARED_FIELDS},
+            )
+            session.add(record)
+            JournalService.record_change(
+                session, "restore", record_id, None, JournalService.snapshot(record)
+            )
+
+        session.commit()
+        logger.info("Records restored to %s: %s", summary["timestamp"], summary)
+        return summary
+
+    @staticmethod
+    def compact(session: Session, before: datetime) -> int:
+        """
+        压缩早于 before 的变更
+
+        每条记录只保留 before 之前的最后一条变更并转为 checkpoint；
+        已被硬删除且之后没有任何变更的记录直接移除。返回删除的行数。
+        """
+        cutoff = _normalize(before)
+        keep_ids = (
+            select(func.max(RecordChange.id))
+            .where(RecordChange.created_at < cutoff)
+            .group_by(RecordChange.record_id)
+        )
+        removed = session.execute(
+            delete(RecordChange).where(
+                RecordChange.created_at < cutoff, RecordChange.id.not_in(keep_ids)
+            )
+        ).rowcount
+
+        later_ids = select(RecordChange.record_id).where(RecordChange.created_at >= cutoff)
+        removed += session.execute(
+            delete(RecordChange).where(
+                RecordChange.created_at < cutoff,
+                RecordChange.after.is_(None),
+                RecordChange.record_id.not_in(later_ids),
+            )
+        ).rowcount
+
+        session.execute(
+            update(RecordChange)
+            .where(RecordChange.created_at < cutoff)
+            .values(operation="checkpoint", before=None)
+        )
+        session.commit()
+        if removed:
+            logger.info("Record journal compacted: %d entries removed", removed)
+        return removed
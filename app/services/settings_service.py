@@ -4,8 +4,11 @@ import logging
 from typing import Optional
 from sqlmodel import Session, select
 
+from pydantic import ValidationError
+
 from app.config import settings
 from app.models.setting import SystemSetting
+from app.schemas.settings import CorefilePluginSettings
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +19,8 @@ class SettingsService:
     # 设置键常量
     KEY_PRIMARY_DNS = "upstream_primary_dns"
     KEY_SECONDARY_DNS = "upstream_secondary_dns"
+    KEY_LOG_RETENTION_DAYS = "log_retention_days"
+    KEY_COREFILE_PLUGINS = "corefile_plugins"
 
     # 默认值
     DEFAULT_PRIMARY_DNS = settings.upstream_primary_dns_default
@@ -57,20 +62,58 @@ class SettingsService:
         # 返回已保存的值或默认值（primary 会回退到默认值）；若 secondary 未配置则返回 None
         return primary, secondary if secondary else None
 
+    def get_log_retention_days(self) -> int:
+        """获取审计日志保留天数（未设置或无效时使用配置默认值）"""
+        value = self.get_setting(self.KEY_LOG_RETENTION_DAYS)
+        try:
+            return int(value) if value is not None else settings.log_retention_days_default
+        except ValueError:
+            logger.warning(f"Invalid {self.KEY_LOG_RETENTION_DAYS} setting: {value}")
+            return settings.log_retention_days_default
+
+    def get_plugin_settings(self) -> CorefilePluginSettings:
+        """获取 Corefile 性能插件配置（未设置或无效时使用默认值）"""
+        value = self.get_setting(self.KEY_COREFILE_PLUGINS)
+        if value is None:
+            return CorefilePluginSettings()
+        try:
+            return CorefilePluginSettings.model_validate_json(value)
+        except ValidationError:
+            logger.warning(f"Invalid {self.KEY_COREFILE_PLUGINS} setting: {value}")
+            return CorefilePluginSettings()
+
+    def set_plugin_settings(self, plugins: CorefilePluginSettings) -> CorefilePluginSettings:
+        """保存 Corefile 性能插件配置（只存储与默认值不同的项），并重新生成 Corefile"""
+        self.set_setting(
+            self.KEY_COREFILE_PLUGINS,
+            plugins.model_dump_json(exclude_defaults=True),
+            "Corefile performance plugin settings",
+        )
+        self._trigger_corefile_update()
+        return plugins
+
     def _trigger_corefile_update(self) -> None:
         """触发 Corefile 更新和 CoreDNS 重载"""
         try:
+            if settings.cluster_enabled:
+                # 多副本部署：只登记请求，由领导者统一生成
+                from app.services.cluster_service import generation_coordinator
+
+                generation_coordinator.request_generation()
+                return
+
             from app.services.corefile_service import CorefileService
 
             corefile_service = CorefileService()
             result = corefile_service.generate_corefile(
                 session=self.session,
                 output_path=settings.corefile_path,
-                auto_reload=True
+                auto_reload=True,
+                trigger="settings",
             )
 
             logger.info(
-                f"Corefile auto-update triggered (upstream DNS change): "
+                f"Corefile auto-update triggered (settings change): "
                 f"{result.get('stats', {})} reload_result: {result.get('reload_result', 'N/A')}"
             )
         except Exception as exc:
@@ -0,0 +1,119 @@
+"""
+Zone Service Layer - Business logic for per-zone Corefile options
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.config import settings
+from app.models.zone import Zone
+from app.schemas.zone import ZoneCreate, ZonePatch, ZoneResponse
+from app.services.event_service import publish_event
+
+logger = logging.getLogger(__name__)
+
+# 不允许通过 PATCH 置空的字段
+NON_NULLABLE_FIELDS = {"name", "fallthrough", "log_enabled", "status"}
+
+
+class ZoneService:
+    """Zone 配置服务层"""
+
+    @staticmethod
+    def _trigger_corefile_update(session: Session) -> None:
+        """触发 Corefile 更新和 CoreDNS 重载"""
+        try:
+            if settings.cluster_enabled:
+                # 多副本部署：只登记请求，由领导者统一生成
+                from app.services.cluster_service import generation_coordinator
+
+                generation_coordinator.request_generation()
+                return
+
+            from app.services.corefile_service import CorefileService
+
+            result = CorefileService().generate_corefile(
+                session=session,
+                output_path=settings.corefile_path,
+                auto_reload=True,
+                trigger="zones",
+            )
+
+            logger.info(
+                f"Corefile auto-update triggered (zone change): {result.get('stats', {})} "
+                f"reload_result: {result.get('reload_result', 'N/A')}"
+            )
+        except Exception as exc:
+            logger.error(f"Failed to auto-update Corefile: {exc}")
+            # 不抛出异常，避免影响 Zone 配置的写入
+
+    @staticmethod
+    def _commit(session: Session, zone: Zone) -> None:
+        """提交事务，Zone 名称重复时返回 409"""
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            raise HTTPException(status_code=409, detail=f"Zone already exists: {zone.name}")
+        session.refresh(zone)
+
+    @staticmethod
+    def _publish(event_type: str, zone: Zone) -> None:
+        publish_event(event_type, ZoneResponse.model_validate(zone).model_dump(mode="json"))
+
+    @staticmethod
+    def list_zones(session: Session) -> List[Zone]:
+        """按名称列出全部 Zone 配置"""
+        return session.exec(select(Zone).order_by(Zone.name)).all()
+
+    @staticmethod
+    def get_zone(session: Session, zone_id: int) -> Zone:
+        zone = session.get(Zone, zone_id)
+        if not zone:
+            raise HTTPException(status_code=404, detail="Zone not found")
+        return zone
+
+    @staticmethod
+    def get_options(session: Session) -> Dict[str, Zone]:
+        """生成 Corefile 时使用：Zone 名称 → 配置"""
+        return {zone.name: zone for zone in session.exec(select(Zone)).all()}
+
+    @staticmethod
+    def create_zone(session: Session, zone_data: ZoneCreate) -> Zone:
+        """创建 Zone 配置"""
+        zone = Zone(**zone_data.model_dump())
+        session.add(zone)
+        ZoneService._commit(session, zone)
+        ZoneService._publish("zone.created", zone)
+        ZoneService._trigger_corefile_update(session)
+        return zone
+
+    @staticmethod
+    def patch_zone(session: Session, zone_id: int, zone_data: ZonePatch) -> Zone:
+        """部分更新 Zone 配置；upstream_dns / cache_ttl 传 null 表示清除"""
+        zone = ZoneService.get_zone(session, zone_id)
+        for key, value in zone_data.model_dump(exclude_unset=True).items():
+            if value is None and key in NON_NULLABLE_FIELDS:
+                continue
+            setattr(zone, key, value)
+        zone.updated_at = datetime.now(timezone.utc)
+        session.add(zone)
+        ZoneService._commit(session, zone)
+        ZoneService._publish("zone.updated", zone)
+        ZoneService._trigger_corefile_update(session)
+        return zone
+
+    @staticmethod
+    def delete_zone(session: Session, zone_id: int) -> None:
+        """删除 Zone 配置，该 zone 的记录恢复使用默认选项"""
+        zone = ZoneService.get_zone(session, zone_id)
+        name = zone.name
+        session.delete(zone)
+        session.commit()
+        publish_event("zone.deleted", {"id": zone_id, "name": name})
+        ZoneService._trigger_corefile_update(session)
@@ -39,11 +39,15 @@ async function fetchJson(url, options = {}) {
 
 async function refreshCorefilePreview() {
   try {
-    const payload = await fetchJson('/api/corefile/preview');
-    const data = payload.data || {};
-    document.getElementById('corefile-preview').textContent = data.content || '暂无内容';
-    if (data.generated_at) {
-      document.getElementById('corefile-generated-at').textContent = new Date(data.generated_at).toLocaleString();
+    const response = await fetch('/api/corefile/preview');
+    if (!response.ok) {
+      throw new Error((await response.text()) || 'Request failed');
+    }
+    const content = await response.text();
+    document.getElementById('corefile-preview').textContent = content || '暂无内容';
+    const generatedAt = response.headers.get('X-Generated-At');
+    if (generatedAt) {
+      document.getElementById('corefile-generated-at').textContent = new Date(generatedAt).toLocaleString();
     }
   } catch (error) {
     console.error('加载 Corefile 预览失败', error);
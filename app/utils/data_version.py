@@ -0,0 +1,124 @@
+"""
+全局数据版本与 ETag 支持
+
+任何 DNSRecord / SystemSetting / Zone 写入都会在同一事务中递增 cluster_counters
+表中的数据版本，列表、Zone 与 Corefile 预览接口据此生成弱 ETag；请求携带匹配的
+If-None-Match 时直接返回 304，只执行一次主键查询，不执行列表查询也不渲染模板。
+
+版本号保存在数据库而不是进程内：多 worker 或多副本部署时，请求落到任何一个
+进程上看到的都是同一个版本，不会因为该进程没有处理过写入而返回过期的 304。
+"""
+
+from __future__ import annotations
+
+from itertools import chain
+
+from fastapi import Request, Response
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.cluster import ClusterCounter
+
+# 影响列表 / Zone / Corefile 预览结果的表
+TRACKED_TABLES = {"dns_records", "system_settings", "zones"}
+COUNTER_NAME = "data.version"
+
+_BUMPED_KEY = "data_version_bumped"
+_counters = ClusterCounter.__table__
+
+
+class DataVersion:
+    """保存在 cluster_counters 中、所有进程共享的数据版本号"""
+
+    def value(self, session: Session) -> int:
+        return (
+            session.execute(
+                select(_counters.c.value).where(_counters.c.name == COUNTER_NAME)
+            ).scalar()
+            or 0
+        )
+
+    def bump(self, connection: Connection) -> None:
+        """在调用方的事务中递增数据版本，随事务一起提交或回滚"""
+        bumped = connection.execute(
+            update(_counters)
+            .where(_counters.c.name == COUNTER_NAME)
+            .values(value=_counters.c.value + 1)
+        ).rowcount
+        if not bumped:
+            connection.execute(insert(_counters).values(name=COUNTER_NAME, value=1))
+
+    def etag(self, scope: str, session: Session) -> str:
+        """生成指定资源范围的弱 ETag"""
+        return f'W/"{scope}-{self.value(session)}"'
+
+
+data_version = DataVersion()
+
+
+def _is_tracked(obj) -> bool:
+    return getattr(obj, "__tablename__", None) in TRACKED_TABLES
+
+
+def _bump_once(session: Session) -> None:
+    """每个事务只递增一次"""
+    if session.info.get(_BUMPED_KEY):
+        return
+    session.info[_BUMPED_KEY] = True
+    data_version.bump(session.connection())
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session: Session, flush_context) -> None:
+    if any(_is_tracked(obj) for obj in chain(session.new, session.dirty, session.deleted)):
+        _bump_once(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_on_bulk(orm_execute_state) -> None:
+    if not (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.local_table.name in TRACKED_TABLES:
+        _bump_once(orm_execute_state.session)
+
+
+@event.listens_for(Session, "after_commit")
+def _reset_on_commit(session: Session) -> None:
+    session.info.pop(_BUMPED_KEY, None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_on_rollback(session: Session) -> None:
+    session.info.pop(_BUMPED_KEY, None)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """判断 If-None-Match 是否命中（弱比较）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    current = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == current
+        for candidate in header.split(",")
+    )
+
+
+def not_modified_response(etag: str) -> Response:
+    """构造 304 响应"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def apply_etag(response: Response, etag: str) -> None:
+    """为正常响应附加 ETag 头"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
@@ -0,0 +1,133 @@
+"""
+大文本的统一格式（unified）行级 diff
+
+Corefile 版本之间的改动通常集中在少数几行。先在字符串上直接比较出
+公共前缀和公共后缀（按行边界对齐），只把中间变化的区域（加上下文行）
+拆成行列表交给 difflib，100k 行的文件也不会整体切分成两个大列表。
+输出按 hunk 逐个生成，可以直接用于流式响应。
+"""
+
+from __future__ import annotations
+
+import difflib
+from typing import Iterator, List, Tuple
+
+_CHUNK = 4096
+_NO_NEWLINE = "\\ No newline at end of file\n"
+
+
+def _common_prefix_chars(a: str, b: str) -> int:
+    limit = min(len(a), len(b))
+    start = 0
+    while start < limit:
+        stop = min(start + _CHUNK, limit)
+        if a[start:stop] != b[start:stop]:
+            for index in range(start, stop):
+                if a[index] != b[index]:
+                    return index
+        start = stop
+    return limit
+
+
+def _common_suffix_chars(a: str, b: str, limit: int) -> int:
+    length = 0
+    while length < limit:
+        step = min(_CHUNK, limit - length)
+        a_part = a[len(a) - length - step : len(a) - length]
+        b_part = b[len(b) - length - step : len(b) - length]
+        if a_part != b_part:
+            for offset in range(1, step + 1):
+                if a_part[-offset] != b_part[-offset]:
+                    return length + offset - 1
+        length += step
+    return limit
+
+
+def _at_line_start(text: str, pos: int) -> bool:
+    return pos == 0 or text[pos - 1] == "\n"
+
+
+def _back_lines(text: str, pos: int, count: int) -> int:
+    """从行首 pos 向前回退 count 行，返回新的行首位置"""
+    for _ in range(count):
+        if pos == 0:
+            break
+        pos = text.rfind("\n", 0, pos - 1) + 1
+    return pos
+
+
+def _forward_lines(text: str, pos: int, count: int) -> int:
+    """从行首 pos 向后前进 count 行，返回新的行首位置"""
+    for _ in range(count):
+        if pos >= len(text):
+            break
+        newline = text.find("\n", pos)
+        pos = len(text) if newline == -1 else newline + 1
+    return pos
+
+
+def changed_region(a: str, b: str, context: int) -> Tuple[int, List[str], List[str]]:
+    """
+    定位变化区域
+
+    返回 (起始行号偏移, a 的区域行, b 的区域行)，区域两端各带 context 行公共内容
+    """
+    prefix = _common_prefix_chars(a, b)
+    prefix = a.rfind("\n", 0, prefix) + 1
+
+    limit = min(len(a), len(b)) - prefix
+    suffix = _common_suffix_chars(a, b, limit)
+    if not (_at_line_start(a, len(a) - suffix) and _at_line_start(b, len(b) - suffix)):
+        newline = a.find("\n", len(a) - suffix)
+        suffix = 0 if newline == -1 else len(a) - newline - 1
+
+    start = _back_lines(a, prefix, context)
+    offset = a.count("\n", 0, start)
+    a_stop = _forward_lines(a, len(a) - suffix, context)
+    b_stop = len(b) - (len(a) - a_stop)
+    return (
+        offset,
+        a[start:a_stop].splitlines(keepends=True),
+        b[start:b_stop].splitlines(keepends=True),
+    )
+
+
+def _format_range(start: int, stop: int) -> str:
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def _format_line(tag: str, line: str) -> str:
+    if line.endswith("\n"):
+        return tag + line
+    return f"{tag}{line}\n{_NO_NEWLINE}"
+
+
+def iter_unified_hunks(a: str, b: str, context: int = 3) -> Iterator[str]:
+    """逐个生成 hunk（含 @@ 头），内容相同时不生成任何内容"""
+    if a == b:
+        return
+
+    offset, a_lines, b_lines = changed_region(a, b, context)
+    matcher = difflib.SequenceMatcher(None, a_lines, b_lines, autojunk=False)
+    for group in matcher.get_grouped_opcodes(context):
+        first, last = group[0], group[-1]
+        header = "@@ -{} +{} @@\n".format(
+            _format_range(first[1] + offset, last[2] + offset),
+            _format_range(first[3] + offset, last[4] + offset),
+        )
+        parts = [header]
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                parts.extend(_format_line(" ", line) for line in a_lines[i1:i2])
+                continue
+            if tag in ("replace", "delete"):
+                parts.extend(_format_line("-", line) for line in a_lines[i1:i2])
+            if tag in ("replace", "insert"):
+                parts.extend(_format_line("+", line) for line in b_lines[j1:j2])
+        yield "".join(parts)
@@ -0,0 +1,331 @@
+"""
+Prometheus 文本格式指标
+
+不依赖 prometheus_client 或任何网络导出器：指标保存在进程内，
+由 GET /metrics 按 text exposition format 0.0.4 输出。
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextvars
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def samples(self) -> List[str]:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """可设置的瞬时值，也可以在采集时通过回调计算"""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[Tuple[Dict[str, object], float]]] | None = None,
+    ):
+        super().__init__(name, documentation)
+        self._values: Dict[LabelKey, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def samples(self) -> List[str]:
+        if self._callback is not None:
+            try:
+                for labels, value in self._callback():
+                    self.set(value, **labels)
+            except Exception as exc:  # pragma: no cover - scrape must not fail
+                logger.warning("Failed to collect gauge %s: %s", self.name, exc)
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """累积桶直方图"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+        # label -> [bucket counts..., sum, count]
+        self._values: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> float:
+        state = self._values.get(_label_key(labels))
+        return state[-1] if state else 0.0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+
+        lines: List[str] = []
+        for key, state in items:
+            cumulative = 0.0
+            for bound, bucket_count in zip(self.buckets, state):
+                cumulative += bucket_count
+                le = (("le", _format_value(float(bound))),)
+                lines.append(f"{self.name}_bucket{_format_labels(key, le)} {_format_value(cumulative)}")
+            lines.append(
+                f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {_format_value(state[-1])}"
+            )
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self.register(Counter(name, documentation))  # type: ignore[return-value]
+
+    def gauge(self, name: str, documentation: str, callback=None) -> Gauge:
+        return self.register(Gauge(name, documentation, callback))  # type: ignore[return-value]
+
+    def histogram(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, buckets))  # type: ignore[return-value]
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.extend(metric.header())
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "coredns_manager_http_request_duration_seconds",
+    "HTTP request latency by route template",
+)
+DB_QUERIES = REGISTRY.counter(
+    "coredns_manager_db_queries_total",
+    "SQL statements executed, by service operation",
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "coredns_manager_db_query_duration_seconds",
+    "SQL statement latency, by service operation",
+)
+SERVICE_DURATION = REGISTRY.histogram(
+    "coredns_manager_service_duration_seconds",
+    "Service method latency including nested work",
+)
+COREFILE_PHASE_DURATION = REGISTRY.histogram(
+    "coredns_manager_corefile_phase_duration_seconds",
+    "Corefile generation phase latency (query, render, backup, write, reload)",
+)
+COREDNS_RELOAD_DURATION = REGISTRY.histogram(
+    "coredns_manager_coredns_reload_duration_seconds",
+    "CoreDNS reload latency by method and outcome",
+)
+OAUTH2_REQUEST_DURATION = REGISTRY.histogram(
+    "coredns_manager_oauth2_request_duration_seconds",
+    "OAuth2 server call latency by endpoint and outcome",
+)
+DNS_RECORDS = REGISTRY.gauge(
+    "coredns_manager_dns_records",
+    "DNS records by status",
+)
+BACKUP_DISK_USAGE = REGISTRY.gauge(
+    "coredns_manager_backup_disk_usage_bytes",
+    "Disk space used by the Corefile backup directory",
+)
+BACKUP_FILES = REGISTRY.gauge(
+    "coredns_manager_backup_files",
+    "Number of files in the Corefile backup directory",
+)
+
+# 当前正在执行的服务操作，用于把 SQL 语句归属到 DNSService 方法
+current_operation: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "current_operation", default=None
+)
+
+
+@contextmanager
+def track_operation(name: str) -> Iterator[None]:
+    """标记当前服务操作并记录耗时"""
+    token = current_operation.set(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        SERVICE_DURATION.observe(time.perf_counter() - start, operation=name)
+        current_operation.reset(token)
+
+
+def instrumented(name: str):
+    """服务方法装饰器：记录耗时并归属其中执行的 SQL"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track_operation(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start_time")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    operation = current_operation.get() or "other"
+    DB_QUERIES.inc(operation=operation)
+    DB_QUERY_DURATION.observe(elapsed, operation=operation)
+
+
+class MetricsMiddleware:
+    """记录每个路由模板的请求耗时（纯 ASGI 中间件，兼容流式响应）"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                method=scope.get("method", ""),
+                route=getattr(route, "path", "unmatched"),
+                status=status_code,
+            )
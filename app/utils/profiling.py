@@ -0,0 +1,225 @@
+"""
+按请求开启的性能剖析
+
+通过 X-Profile 请求头（或 profiling_enabled 配置）开启后，记录该请求内
+执行的全部 SQL 语句与关键阶段耗时，在响应中返回 Server-Timing 头；
+X-Profile: trace 时额外保存完整 JSON trace，可通过 /api/profiles/{id} 查看。
+未开启时各钩子只做一次 ContextVar 读取，开销可以忽略。
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+MAX_STATEMENT_LENGTH = 500
+
+
+class Profile:
+    """单个请求的剖析数据"""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.queries: List[Dict] = []
+        self.spans: List[Dict] = []
+        self.duration_ms: float | None = None
+        self.status_code: int | None = None
+
+    def offset_ms(self, perf_counter_value: float) -> float:
+        return round((perf_counter_value - self._start) * 1000, 3)
+
+    def add_query(self, statement: str, start: float, elapsed: float) -> None:
+        with self._lock:
+            self.queries.append(
+                {
+                    "statement": statement[:MAX_STATEMENT_LENGTH],
+                    "start_ms": self.offset_ms(start),
+                    "duration_ms": round(elapsed * 1000, 3),
+                }
+            )
+
+    def add_span(self, name: str, start: float, elapsed: float) -> None:
+        with self._lock:
+            self.spans.append(
+                {
+                    "name": name,
+                    "start_ms": self.offset_ms(start),
+                    "duration_ms": round(elapsed * 1000, 3),
+                }
+            )
+
+    def finish(self, status_code: int | None) -> None:
+        self.status_code = status_code
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+
+    def server_timing(self) -> str:
+        """生成 Server-Timing 头"""
+        elapsed_ms = (time.perf_counter() - self._start) * 1000
+        entries = []
+
+        sql_ms = sum(query["duration_ms"] for query in self.queries)
+        entries.append(f'sql;dur={sql_ms:.3f};desc="{len(self.queries)} queries"')
+
+        totals: "OrderedDict[str, float]" = OrderedDict()
+        for item in self.spans:
+            totals[item["name"]] = totals.get(item["name"], 0.0) + item["duration_ms"]
+        entries.extend(f"{name};dur={duration:.3f}" for name, duration in totals.items())
+
+        entries.append(f"total;dur={elapsed_ms:.3f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "status_code": self.status_code,
+            "duration_ms": self.duration_ms,
+            "query_count": len(self.queries),
+            "sql_duration_ms": round(sum(query["duration_ms"] for query in self.queries), 3),
+            "spans": list(self.spans),
+            "queries": list(self.queries),
+        }
+
+
+current_profile: contextvars.ContextVar[Profile | None] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+
+class ProfileStore:
+    """最近保存的 JSON trace（有界）"""
+
+    def __init__(self, max_items: int = 50):
+        self._lock = threading.Lock()
+        self._items: deque[Profile] = deque(maxlen=max_items)
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._items.append(profile)
+
+    def get(self, profile_id: str) -> Profile | None:
+        with self._lock:
+            return next((item for item in self._items if item.id == profile_id), None)
+
+    def list(self) -> List[Profile]:
+        with self._lock:
+            return list(reversed(self._items))
+
+
+profile_store = ProfileStore(settings.profiling_max_traces)
+
+
+@contextmanager
+def span(
+    name: str, histogram=None, timings: Dict[str, float] | None = None, **labels
+) -> Iterator[None]:
+    """
+    计时一个阶段
+
+    同时写入可选的指标直方图、调用方提供的 timings（阶段名 → 毫秒），
+    以及当前请求的剖析数据（若已开启）
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if histogram is not None:
+            histogram.observe(elapsed, **labels)
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed * 1000
+        profile = current_profile.get()
+        if profile is not None:
+            profile.add_span(name, start, elapsed)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _profile_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _profile_after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is None:
+        return
+    starts = conn.info.get("profile_query_start")
+    if not starts:
+        return
+    start = starts.pop()
+    profile.add_query(statement, start, time.perf_counter() - start)
+
+
+class ProfilingMiddleware:
+    """
+    按需开启请求剖析的 ASGI 中间件
+
+    - X-Profile: 1      返回 Server-Timing 头
+    - X-Profile: trace  同时保存 JSON trace 并返回 X-Profile-Id
+    """
+
+    HEADER = b"x-profile"
+
+    def __init__(self, app):
+        self.app = app
+
+    def _mode(self, scope) -> str | None:
+        if settings.profiling_header_enabled:
+            for name, value in scope.get("headers", ()):
+                if name == self.HEADER:
+                    return "trace" if value.strip().lower() == b"trace" else "timing"
+        if settings.profiling_enabled:
+            return "timing"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = self._mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope.get("method", ""), scope.get("path", ""))
+        token = current_profile.set(profile)
+        status_code = None
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing().encode("latin-1")))
+                if mode == "trace":
+                    headers.append((b"x-profile-id", profile.id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            profile.finish(status_code)
+            if mode == "trace":
+                profile_store.add(profile)
@@ -0,0 +1 @@
+"""Performance benchmarks for CoreDNS Manager hot paths"""
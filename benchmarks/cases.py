@@ -0,0 +1,149 @@
+"""Benchmark cases for record CRUD, search, Corefile generation and backups"""
+
+from __future__ import annotations
+
+import itertools
+import math
+from typing import Callable, Dict, List, Tuple
+
+from app.schemas.dns_record import DNSRecordCreate, DNSRecordSearchParams
+from app.services.backup_service import BackupService
+from app.services.corefile_service import CorefileService
+from app.services.corefile_template import TemplateCache
+from app.services.dns_service import DNSService
+from benchmarks.common import BenchContext, measure
+
+CaseFunc = Callable[[BenchContext, int], Dict]
+CASES: List[Tuple[str, CaseFunc]] = []
+
+
+def case(name: str):
+    """注册基准用例"""
+
+    def decorator(func: CaseFunc) -> CaseFunc:
+        CASES.append((name, func))
+        return func
+
+    return decorator
+
+
+_hostnames = itertools.count()
+
+
+@case("create_record")
+def bench_create_record(ctx: BenchContext, repeat: int) -> Dict:
+    with ctx.session() as session:
+
+        def run():
+            index = next(_hostnames)
+            DNSService.create_record(
+                session,
+                DNSRecordCreate(
+                    zone="bench-create.local",
+                    hostname=f"new{index}",
+                    ip_address=f"192.168.{(index >> 8) & 255}.{index & 255}",
+                ),
+            )
+
+        return measure(run, repeat=repeat)
+
+
+@case("list_records_deep_page")
+def bench_list_records_deep_page(ctx: BenchContext, repeat: int) -> Dict:
+    page_size = 100
+    with ctx.session() as session:
+        _, total = DNSService.list_records(session, page=1, page_size=page_size)
+        last_page = max(1, math.ceil(total / page_size))
+        stats = measure(
+            lambda: DNSService.list_records(session, page=last_page, page_size=page_size),
+            repeat=repeat,
+        )
+    stats["page"] = last_page
+    return stats
+
+
+@case("search_records_q")
+def bench_search_records(ctx: BenchContext, repeat: int) -> Dict:
+    params = DNSRecordSearchParams(q="host99", page=1, page_size=100)
+    with ctx.session() as session:
+        return measure(lambda: DNSService.search_records(session, params), repeat=repeat)
+
+
+@case("list_zones")
+def bench_list_zones(ctx: BenchContext, repeat: int) -> Dict:
+    with ctx.session() as session:
+        return measure(lambda: DNSService.list_zones(session), repeat=repeat)
+
+
+@case("corefile_service_init")
+def bench_corefile_service_init(ctx: BenchContext, repeat: int) -> Dict:
+    """每次记录写入、预览都会构造 CorefileService，模板来自共享环境"""
+    return measure(CorefileService, repeat=repeat)
+
+
+@case("corefile_template_compile")
+def bench_corefile_template_compile(ctx: BenchContext, repeat: int) -> Dict:
+    """对照：不共享环境时每次构造都要解析并编译模板"""
+    return measure(
+        lambda: TemplateCache("app/templates", bytecode_dir="", auto_reload=False).get("Corefile.j2"),
+        repeat=repeat,
+    )
+
+
+@case("generate_corefile_render")
+def bench_generate_render(ctx: BenchContext, repeat: int) -> Dict:
+    service = CorefileService()
+    with ctx.session() as session:
+        stats = measure(lambda: service.generate_corefile(session=session), repeat=repeat)
+        content = service.generate_corefile(session=session)["content"]
+    stats["output_bytes"] = len(content.encode("utf-8"))
+    stats["output_lines"] = content.count("\n")
+    return stats
+
+
+@case("generate_corefile_write")
+def bench_generate_write(ctx: BenchContext, repeat: int) -> Dict:
+    service = CorefileService(backup_dir=ctx.backup_dir)
+    with ctx.session() as session:
+        return measure(
+            lambda: service.generate_corefile(
+                session=session, output_path=ctx.corefile_path, auto_reload=True
+            ),
+            repeat=repeat,
+        )
+
+
+def _backup_service(ctx: BenchContext) -> BackupService:
+    with ctx.session() as session:
+        CorefileService(backup_dir=ctx.backup_dir).generate_corefile(
+            session=session, output_path=ctx.corefile_path, auto_reload=False
+        )
+    return BackupService(ctx.corefile_path, backup_dir=ctx.backup_dir)
+
+
+@case("backup_create")
+def bench_backup_create(ctx: BenchContext, repeat: int) -> Dict:
+    service = _backup_service(ctx)
+    return measure(service.create_backup, repeat=repeat)
+
+
+@case("backup_list")
+def bench_backup_list(ctx: BenchContext, repeat: int) -> Dict:
+    service = _backup_service(ctx)
+    for _ in range(service.max_backups):
+        service.create_backup()
+    return measure(lambda: service.list_backups(page=1, page_size=20), repeat=repeat)
+
+
+@case("backup_get")
+def bench_backup_get(ctx: BenchContext, repeat: int) -> Dict:
+    service = _backup_service(ctx)
+    backup_id = service.create_backup()["id"]
+    return measure(lambda: service.get_backup(backup_id), repeat=repeat)
+
+
+@case("backup_restore")
+def bench_backup_restore(ctx: BenchContext, repeat: int) -> Dict:
+    service = _backup_service(ctx)
+    backup_id = service.create_backup()["id"]
+    return measure(lambda: service.restore_backup(backup_id), repeat=repeat)
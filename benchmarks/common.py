@@ -0,0 +1,124 @@
+"""Shared helpers for the benchmark suite: seeding, timing and isolation"""
+
+from __future__ import annotations
+
+import random
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator
+
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import models  # noqa: F401
+from app.config import settings
+from app.models.dns_record import DNSRecord
+from app.services.coredns_service import CoreDNSService
+
+ZONES_PER_1K = 10
+
+
+@dataclass
+class BenchContext:
+    """一次基准运行使用的隔离环境（临时数据库、Corefile 与备份目录）"""
+
+    size: int
+    workdir: Path
+    engine: object
+
+    @property
+    def corefile_path(self) -> str:
+        return str(self.workdir / "Corefile")
+
+    @property
+    def backup_dir(self) -> str:
+        return str(self.workdir / "backups")
+
+    def session(self) -> Session:
+        return Session(self.engine)
+
+
+def _record_rows(size: int, seed: int = 42) -> Iterator[Dict]:
+    rng = random.Random(seed)
+    zone_count = max(1, size * ZONES_PER_1K // 1000)
+    statuses = ["active"] * 8 + ["inactive", "deleted"]
+    base = datetime.now(timezone.utc) - timedelta(days=365)
+    for index in range(size):
+        created = base + timedelta(seconds=index * 30)
+        yield {
+            "zone": f"zone{index % zone_count}.bench.local",
+            "hostname": f"host{index}",
+            "ip_address": f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}",
+            "record_type": "A",
+            "description": f"benchmark record {index}" if rng.random() < 0.5 else None,
+            "status": rng.choice(statuses),
+            "created_at": created,
+            "updated_at": created,
+        }
+
+
+def seed_records(engine, size: int, batch_size: int = 5000) -> None:
+    """批量写入 size 条 DNSRecord"""
+    batch = []
+    with engine.begin() as conn:
+        for row in _record_rows(size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.execute(insert(DNSRecord), batch)
+                batch.clear()
+        if batch:
+            conn.execute(insert(DNSRecord), batch)
+
+
+@contextmanager
+def bench_context(size: int) -> Iterator[BenchContext]:
+    """创建已填充 size 条记录的隔离环境，并屏蔽真实的 CoreDNS 重载"""
+    with tempfile.TemporaryDirectory(prefix="coredns-bench-") as tmp:
+        workdir = Path(tmp)
+        engine = create_engine(
+            f"sqlite:///{workdir / 'bench.db'}",
+            connect_args={"check_same_thread": False},
+        )
+        SQLModel.metadata.create_all(engine)
+        seed_records(engine, size)
+
+        saved = {
+            "corefile_path": settings.corefile_path,
+            "corefile_backup_dir": settings.corefile_backup_dir,
+        }
+        original_reload = CoreDNSService.reload
+        settings.corefile_path = str(workdir / "Corefile")
+        settings.corefile_backup_dir = str(workdir / "backups")
+        CoreDNSService.reload = lambda self: {"method": "benchmark", "status": "skipped"}
+        try:
+            yield BenchContext(size=size, workdir=workdir, engine=engine)
+        finally:
+            CoreDNSService.reload = original_reload
+            for key, value in saved.items():
+                setattr(settings, key, value)
+            engine.dispose()
+
+
+def measure(func: Callable[[], object], repeat: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """多次执行 func，返回毫秒级统计"""
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "runs": repeat,
+    }
@@ -0,0 +1,102 @@
+"""
+Local CoreDNS stand-in for load testing
+
+Writes its PID to a file (point COREDNS_PID_FILE at it and set
+COREDNS_RELOAD_METHOD=process), counts SIGUSR1 reloads and serves the
+counters as JSON on http://127.0.0.1:<port>/stats.
+
+Usage:
+    python -m benchmarks.coredns_stub --pid-file /tmp/coredns-stub.pid --port 9253
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+class ReloadCounter:
+    """SIGUSR1 计数（信号处理器中只做原子递增）"""
+
+    def __init__(self, corefile: str | None = None):
+        self.corefile = Path(corefile) if corefile else None
+        self.started_at = time.time()
+        self.reloads = 0
+        self.last_reload_at: float | None = None
+        self.last_corefile_bytes: int | None = None
+
+    def handle_signal(self, signum, frame) -> None:
+        self.reloads += 1
+        self.last_reload_at = time.time()
+        if self.corefile is not None and self.corefile.exists():
+            self.last_corefile_bytes = self.corefile.stat().st_size
+
+    def snapshot(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "reloads": self.reloads,
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "last_reload_at": self.last_reload_at,
+            "last_corefile_bytes": self.last_corefile_bytes,
+        }
+
+
+def _handler_for(counter: ReloadCounter):
+    class StatsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802 - http.server API
+            if self.path.rstrip("/") != "/stats":
+                self.send_error(404)
+                return
+            body = json.dumps(counter.snapshot()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # silence per-request logging
+            return
+
+    return StatsHandler
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="CoreDNS stand-in that counts SIGUSR1 reloads")
+    parser.add_argument("--pid-file", required=True)
+    parser.add_argument("--port", type=int, default=9253)
+    parser.add_argument("--corefile", help="记录每次重载时的 Corefile 大小")
+    args = parser.parse_args(argv)
+
+    counter = ReloadCounter(args.corefile)
+    signal.signal(signal.SIGUSR1, counter.handle_signal)
+
+    pid_file = Path(args.pid_file)
+    pid_file.parent.mkdir(parents=True, exist_ok=True)
+    pid_file.write_text(str(os.getpid()), encoding="utf-8")
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), _handler_for(counter))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"coredns stub pid={os.getpid()} stats=http://127.0.0.1:{args.port}/stats", flush=True)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    try:
+        while not stop.wait(0.5):
+            pass
+    finally:
+        server.shutdown()
+        pid_file.unlink(missing_ok=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""
+HTTP load generator for the /api/records write and read paths
+
+Drives create / patch / delete / list requests at a fixed concurrency and
+reports throughput, p50/p95/p99 latency per operation and the number of
+CoreDNS reloads observed by the stand-in (benchmarks.coredns_stub).
+
+Against an already running server:
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 \
+        --stub-url http://127.0.0.1:9253 --concurrency 16 --duration 30
+
+Self-contained run on a laptop (temporary DB, Corefile, stub and uvicorn):
+    python -m benchmarks.loadtest --spawn --seed 10000 --concurrency 16 --duration 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import httpx
+
+DEFAULT_MIX = "create=2,patch=2,delete=1,list=5"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """最近秩百分位数"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct * len(ordered) / 100) - 1))
+    return ordered[rank]
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in {"create", "patch", "delete", "list"}:
+            raise ValueError(f"Unknown operation in mix: {name}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+class LoadGenerator:
+    """按权重随机执行请求并记录延迟"""
+
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, int], run_id: str):
+        self.client = client
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.run_id = run_id
+        self.counter = itertools.count()
+        self.live_ids: List[int] = []
+        self.latencies: Dict[str, List[float]] = {name: [] for name in self.operations}
+        self.errors: Dict[str, int] = {name: 0 for name in self.operations}
+
+    async def _create(self) -> httpx.Response:
+        index = next(self.counter)
+        response = await self.client.post(
+            "/api/records",
+            json={
+                "zone": f"load-{self.run_id}.local",
+                "hostname": f"h{index}",
+                "ip_address": f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}",
+            },
+        )
+        if response.status_code == 201:
+            self.live_ids.append(response.json()["data"]["id"])
+        return response
+
+    async def _patch(self) -> httpx.Response:
+        if not self.live_ids:
+            return await self._create()
+        record_id = random.choice(self.live_ids)
+        return await self.client.patch(
+            f"/api/records/{record_id}",
+            json={"description": f"patched {next(self.counter)}"},
+        )
+
+    async def _delete(self) -> httpx.Response:
+        if not self.live_ids:
+            return await self._create()
+        record_id = self.live_ids.pop(random.randrange(len(self.live_ids)))
+        return await self.client.delete(f"/api/records/{record_id}", params={"mode": "soft"})
+
+    async def _list(self) -> httpx.Response:
+        return await self.client.get(
+            "/api/records", params={"page": random.randint(1, 10), "page_size": 20}
+        )
+
+    async def worker(self, deadline: float, max_requests: int | None, issued: itertools.count) -> None:
+        handlers = {
+            "create": self._create,
+            "patch": self._patch,
+            "delete": self._delete,
+            "list": self._list,
+        }
+        while time.perf_counter() < deadline:
+            if max_requests is not None and next(issued) >= max_requests:
+                return
+            operation = random.choices(self.operations, weights=self.weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await handlers[operation]()
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            self.latencies[operation].append((time.perf_counter() - start) * 1000)
+            if failed:
+                self.errors[operation] += 1
+
+
+async def fetch_reloads(stub_url: str | None) -> int | None:
+    if not stub_url:
+        return None
+    async with httpx.AsyncClient(timeout=5) as client:
+        response = await client.get(f"{stub_url.rstrip('/')}/stats")
+        return response.json()["reloads"]
+
+
+async def run_load(args) -> Dict:
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        generator = LoadGenerator(client, mix, run_id=str(int(time.time())))
+        reloads_before = await fetch_reloads(args.stub_url)
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        issued = itertools.count()
+        await asyncio.gather(
+            *(generator.worker(deadline, args.requests, issued) for _ in range(args.concurrency))
+        )
+        elapsed = time.perf_counter() - started
+
+        # 等待最后一次重载信号被 stub 处理
+        await asyncio.sleep(0.2)
+        reloads_after = await fetch_reloads(args.stub_url)
+
+    operations = {}
+    total = 0
+    for name, samples in generator.latencies.items():
+        total += len(samples)
+        operations[name] = {
+            "requests": len(samples),
+            "errors": generator.errors[name],
+            "p50_ms": round(percentile(samples, 50), 3),
+            "p95_ms": round(percentile(samples, 95), 3),
+            "p99_ms": round(percentile(samples, 99), 3),
+            "max_ms": round(max(samples), 3) if samples else 0.0,
+        }
+
+    writes = sum(operations[name]["requests"] for name in ("create", "patch", "delete") if name in operations)
+    reloads = None
+    if reloads_before is not None and reloads_after is not None:
+        reloads = reloads_after - reloads_before
+
+    return {
+        "concurrency": args.concurrency,
+        "duration_seconds": round(elapsed, 3),
+        "total_requests": total,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "operations": operations,
+        "writes": writes,
+        "reloads": reloads,
+        "reloads_per_write": round(reloads / writes, 3) if reloads is not None and writes else None,
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(
+        f"\n{report['total_requests']} requests in {report['duration_seconds']}s "
+        f"at concurrency {report['concurrency']}: {report['throughput_rps']} req/s"
+    )
+    print(f"{'operation':<10}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in report["operations"].items():
+        print(
+            f"{name:<10}{stats['requests']:>10}{stats['errors']:>8}{stats['p50_ms']:>10.2f}"
+            f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}"
+        )
+    if report["reloads"] is not None:
+        print(f"CoreDNS reloads: {report['reloads']} for {report['writes']} writes "
+              f"({report['reloads_per_write']} per write)")
+
+
+def _wait_for(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+@contextmanager
+def spawn_environment(args) -> Iterator[None]:
+    """启动临时数据库、CoreDNS stub 与 uvicorn 服务"""
+    with tempfile.TemporaryDirectory(prefix="coredns-load-") as tmp:
+        workdir = Path(tmp)
+        db_url = f"sqlite:///{workdir / 'db' / 'load.db'}"
+        pid_file = workdir / "coredns.pid"
+
+        if args.seed:
+            from sqlmodel import SQLModel, create_engine
+
+            from benchmarks.common import seed_records
+
+            (workdir / "db").mkdir()
+            engine = create_engine(db_url)
+            SQLModel.metadata.create_all(engine)
+            seed_records(engine, args.seed)
+            engine.dispose()
+
+        env = {
+            **os.environ,
+            "DATABASE_URL": db_url,
+            "COREFILE_PATH": str(workdir / "Corefile"),
+            "COREFILE_BACKUP_DIR": str(workdir / "backups"),
+            "COREDNS_RELOAD_METHOD": "process",
+            "COREDNS_PID_FILE": str(pid_file),
+            "OAUTH2_ENABLED": "false",
+        }
+        stub = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.coredns_stub", "--pid-file", str(pid_file),
+             "--port", str(args.stub_port), "--corefile", env["COREFILE_PATH"]],
+            env=env,
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+             "--port", str(args.port), "--log-level", "warning"],
+            env=env,
+        )
+        try:
+            args.base_url = f"http://127.0.0.1:{args.port}"
+            args.stub_url = f"http://127.0.0.1:{args.stub_port}"
+            _wait_for(f"{args.stub_url}/stats")
+            _wait_for(f"{args.base_url}/health")
+            yield
+        finally:
+            for process in (server, stub):
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:  # pragma: no cover
+                    process.kill()
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="CoreDNS Manager HTTP load test")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--stub-url", help="coredns_stub 统计地址，用于统计重载次数")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="持续时间（秒）")
+    parser.add_argument("--requests", type=int, help="最大请求数（达到后提前结束）")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="操作权重，如 create=2,patch=2,delete=1,list=5")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--json", help="将报告写入 JSON 文件")
+    parser.add_argument("--spawn", action="store_true", help="自动启动临时服务与 CoreDNS stub")
+    parser.add_argument("--seed", type=int, default=0, help="--spawn 时预先填充的记录数")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stub-port", type=int, default=9253)
+    args = parser.parse_args(argv)
+
+    if args.spawn:
+        with spawn_environment(args):
+            report = asyncio.run(run_load(args))
+    else:
+        report = asyncio.run(run_load(args))
+
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Peak memory of Corefile generation
+
+Usage:
+    python -m benchmarks.memory                          # 100k / 1M
+    python -m benchmarks.memory --sizes 100000 --modes streaming
+
+每个 (规模, 模式) 在独立子进程中执行一次写入 Corefile 的完整生成，报告子进程
+的峰值 RSS（ru_maxrss）以及相对生成前的增量：
+
+- streaming: 当前实现，按 zone 顺序读取元组并流式渲染到临时文件
+- orm: 对照，加载完整的 DNSRecord 对象、按 zone 分组到字典，再渲染为一个字符串
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app import models  # noqa: F401
+from app.models.dns_record import DNSRecord
+from app.schemas.settings import CorefilePluginSettings
+from app.services.corefile_service import CorefileService
+from benchmarks.common import seed_records
+
+DEFAULT_SIZES = "100000,1000000"
+MODES = ("streaming", "orm")
+
+
+def _rss_mb() -> float:
+    # Linux 上 ru_maxrss 的单位是 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _generate_orm(service: CorefileService, session: Session, output_path: str) -> None:
+    records = session.exec(select(DNSRecord).where(DNSRecord.status == "active")).all()
+    zones: Dict[str, Dict] = {}
+    for record in records:
+        zones.setdefault(record.zone, {"name": record.zone, "records": []})["records"].append(record)
+    plugins = CorefilePluginSettings()
+    content = service.template.render(
+        zones=list(zones.values()),
+        generated_at="",
+        primary_dns="223.5.5.5",
+        secondary_dns=None,
+        plugins=plugins,
+        cache_options=plugins.cache_options(),
+        forward_options=plugins.forward_options(),
+    )
+    Path(output_path).write_text(content, encoding="utf-8")
+
+
+def run_child(mode: str, database: str, output_path: str) -> Dict:
+    """在当前（子）进程中执行一次生成并返回内存统计"""
+    engine = create_engine(f"sqlite:///{database}")
+    service = CorefileService(backup_dir=str(Path(output_path).parent / "backups"))
+    with Session(engine) as session:
+        # 预热：导入、模板编译与连接建立不计入增量
+        session.exec(select(DNSRecord.id).limit(1)).all()
+        before = _rss_mb()
+        start = time.perf_counter()
+        if mode == "orm":
+            _generate_orm(service, session, output_path)
+        else:
+            service.generate_corefile(session=session, output_path=output_path, auto_reload=False)
+        elapsed = time.perf_counter() - start
+    peak = _rss_mb()
+    engine.dispose()
+    return {
+        "peak_rss_mb": round(peak, 1),
+        "delta_rss_mb": round(peak - before, 1),
+        "seconds": round(elapsed, 2),
+        "output_mb": round(Path(output_path).stat().st_size / 1024 / 1024, 1),
+    }
+
+
+def run_benchmarks(sizes: List[int], modes: List[str]) -> Dict:
+    results: Dict[str, Dict[str, Dict]] = {}
+    for size in sizes:
+        results[str(size)] = {}
+        with tempfile.TemporaryDirectory(prefix="coredns-mem-") as tmp:
+            database = Path(tmp) / "bench.db"
+            engine = create_engine(f"sqlite:///{database}")
+            SQLModel.metadata.create_all(engine)
+            seed_records(engine, size)
+            engine.dispose()
+
+            for mode in modes:
+                output = subprocess.run(
+                    [
+                        sys.executable,
+                        "-m",
+                        "benchmarks.memory",
+                        "--child",
+                        mode,
+                        str(database),
+                        str(Path(tmp) / f"Corefile.{mode}"),
+                    ],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+                stats = json.loads(output.strip().splitlines()[-1])
+                results[str(size)][mode] = stats
+                print(
+                    f"{size:>8}  {mode:<10} peak {stats['peak_rss_mb']:>8.1f} MB  "
+                    f"delta {stats['delta_rss_mb']:>8.1f} MB  {stats['seconds']:>6.2f} s"
+                )
+    return results
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Corefile generation memory benchmark")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="记录规模，逗号分隔")
+    parser.add_argument("--modes", default=",".join(MODES), help="生成方式，逗号分隔")
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "DATABASE", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    if args.child:
+        print(json.dumps(run_child(*args.child)))
+        return 0
+
+    sizes = [int(item) for item in args.sizes.split(",") if item]
+    modes = [item for item in args.modes.split(",") if item in MODES]
+    run_benchmarks(sizes, modes)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
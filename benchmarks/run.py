@@ -0,0 +1,106 @@
+"""
+Benchmark runner
+
+Usage:
+    python -m benchmarks.run                              # 1k / 10k / 100k
+    python -m benchmarks.run --sizes 1000,10000 --cases create_record,list_zones
+    python -m benchmarks.run --save benchmarks/baselines/baseline.json
+    python -m benchmarks.run --compare benchmarks/baselines/baseline.json --threshold 0.25
+
+--compare 时若任一用例的中位数比基线慢超过 threshold，进程以退出码 1 结束。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.cases import CASES
+from benchmarks.common import bench_context
+
+DEFAULT_SIZES = "1000,10000,100000"
+
+
+def run_benchmarks(sizes: List[int], case_names: List[str] | None, repeat: int) -> Dict:
+    results: Dict[str, Dict[str, Dict]] = {}
+    for size in sizes:
+        results[str(size)] = {}
+        for name, func in CASES:
+            if case_names and name not in case_names:
+                continue
+            # 每个用例使用独立环境，避免写入类用例影响后续读取类用例
+            with bench_context(size) as ctx:
+                stats = func(ctx, repeat)
+            results[str(size)][name] = stats
+            print(f"{size:>8}  {name:<28} median {stats['median_ms']:>10.3f} ms")
+    return results
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """返回超过阈值的回归列表"""
+    regressions = []
+    for size, cases in results.items():
+        for name, stats in cases.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if not base:
+                continue
+            ratio = stats["median_ms"] / base["median_ms"] if base["median_ms"] else 1.0
+            marker = "REGRESSION" if ratio > 1 + threshold else "ok"
+            print(
+                f"{size:>8}  {name:<28} {base['median_ms']:>10.3f} -> "
+                f"{stats['median_ms']:>10.3f} ms  x{ratio:.2f}  {marker}"
+            )
+            if ratio > 1 + threshold:
+                regressions.append(f"{name}@{size}: x{ratio:.2f}")
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="CoreDNS Manager benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="记录规模，逗号分隔")
+    parser.add_argument("--cases", default="", help="只运行指定用例，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的测量次数")
+    parser.add_argument("--save", help="将结果保存为基线 JSON")
+    parser.add_argument("--compare", help="与基线 JSON 比较")
+    parser.add_argument("--threshold", type=float, default=0.25, help="允许的回归比例")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    sizes = [int(item) for item in args.sizes.split(",") if item]
+    case_names = [item for item in args.cases.split(",") if item] or None
+
+    results = run_benchmarks(sizes, case_names, args.repeat)
+    payload = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    if args.save:
+        path = Path(args.save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline saved to {path}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("Regressions detected: " + ", ".join(regressions))
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,6 +20,8 @@ Commands:
   test      Run pytest; extra args are forwarded
   lint      Run style and type checks (black --check, flake8, mypy)
   format    Format code with black
+  bench     Run benchmarks/ against the stored baseline; extra args are forwarded
+  migrate   Run database migrations (default: upgrade); extra args are forwarded
   docker    Launch docker-compose in the foreground
   help      Show this help message
 
@@ -92,6 +94,17 @@ run_format() {
     poetry run black app tests
 }
 
+run_bench() {
+    poetry run python -m benchmarks.run --compare benchmarks/baselines/baseline.json "$@"
+}
+
+run_migrate() {
+    if [ "$#" -eq 0 ]; then
+        set -- upgrade
+    fi
+    poetry run python -m app.migrations "$@"
+}
+
 run_docker() {
     prepare_runtime_assets
     docker-compose up "$@"
@@ -119,6 +132,17 @@ case "$COMMAND" in
         ensure_dependencies
         run_format
         ;;
+    bench)
+        ensure_poetry
+        ensure_dependencies
+        run_bench "${ARGS[@]}"
+        ;;
+    migrate)
+        ensure_poetry
+        ensure_dependencies
+        prepare_runtime_assets
+        run_migrate "${ARGS[@]}"
+        ;;
     docker)
         run_docker "${ARGS[@]}"
         ;;
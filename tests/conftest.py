@@ -0,0 +1,18 @@
+"""Shared test configuration"""
+
+import pytest
+
+from app.config import settings
+from app.services.corefile_template import get_template_cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_data_dir(tmp_path, monkeypatch):
+    """Corefile、备份与模板字节码缓存都写入临时目录，测试不会在 ./data 下留下文件"""
+    monkeypatch.setattr(settings, "corefile_path", str(tmp_path / "Corefile"))
+    monkeypatch.setattr(settings, "corefile_backup_dir", str(tmp_path / "backups"))
+    monkeypatch.setattr(settings, "template_cache_dir", str(tmp_path / "cache" / "templates"))
+    # 共享模板环境在首次使用时读取 template_cache_dir，每个测试重新创建
+    get_template_cache.cache_clear()
+    yield
+    get_template_cache.cache_clear()
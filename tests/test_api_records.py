@@ -2,17 +2,25 @@
 测试 DNS 记录 API
 """
 
+import csv
+import gzip
+import io
+import json
+import multiprocessing
 import os
 import tempfile
 from datetime import datetime, timedelta, timezone
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import SQLModel, Session, create_engine, select
 
-from app.database import get_session
+from app.database import get_read_session, get_session
 from app.main import application
 from app.models.dns_record import DNSRecord
+from app.services.dns_service import DNSService
 
 
 # 创建测试客户端
@@ -41,6 +49,7 @@ def client(session):
         return session
 
     application.dependency_overrides[get_session] = get_session_override
+    application.dependency_overrides[get_read_session] = get_session_override
     client = TestClient(application)
     yield client
     application.dependency_overrides.clear()
@@ -416,6 +425,50 @@ def test_patch_record_success(client):
     assert data["data"]["hostname"] == "patch"
 
 
+@pytest.fixture(scope="function")
+def statements(session, monkeypatch):
+    """记录写接口执行的 SQL 语句（不含 Corefile 自动生成）"""
+    monkeypatch.setattr(DNSService, "_trigger_corefile_update", staticmethod(lambda session: None))
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement.split()[0].upper())
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_write_statement_counts(client, statements):
+    """写接口直接由内存中的对象生成响应，不再在提交后重新查询"""
+
+    payload = {"zone": "seadee.com.cn", "hostname": "count", "ip_address": "172.27.0.85"}
+    response = client.post("/api/records", json=payload)
+    assert response.status_code == 201
+    record = response.json()["data"]
+    assert record["hostname"] == "count"
+    assert record["created_at"]
+    # 记录 + 数据版本（首次写入时创建计数器行）+ 变更日志
+    assert statements == ["INSERT", "UPDATE", "INSERT", "INSERT"]
+
+    statements.clear()
+    response = client.put(
+        f"/api/records/{record['id']}",
+        json={**payload, "ip_address": "172.27.0.86", "status": "inactive"},
+    )
+    assert response.status_code == 200
+    assert response.json()["data"]["ip_address"] == "172.27.0.86"
+    # 读取旧值 + 更新 + 变更日志 + 数据版本
+    assert statements == ["SELECT", "UPDATE", "INSERT", "UPDATE"]
+
+    statements.clear()
+    response = client.patch(f"/api/records/{record['id']}", json={"description": "patched"})
+    assert response.status_code == 200
+    assert response.json()["data"]["description"] == "patched"
+    assert statements == ["SELECT", "UPDATE", "INSERT", "UPDATE"]
+
+
 def test_update_record_not_found(client):
     """测试更新不存在的记录"""
 
@@ -561,6 +614,73 @@ def test_delete_record_not_found(client):
     assert response.status_code == 404
 
 
+def test_create_after_soft_delete_allowed(client, session):
+    """软删除的记录不占用唯一索引"""
+
+    payload = {"zone": "seadee.com.cn", "hostname": "reuse", "ip_address": "172.27.0.124"}
+    record_id = client.post("/api/records", json=payload).json()["data"]["id"]
+    client.delete(f"/api/records/{record_id}")
+
+    response = client.post("/api/records", json=payload)
+    assert response.status_code == 201
+    assert response.json()["data"]["id"] != record_id
+
+    duplicate = DNSRecord(**payload)
+    session.add(duplicate)
+    with pytest.raises(IntegrityError):
+        session.commit()
+    session.rollback()
+
+
+def test_upsert_record_by_name(client):
+    """测试按名称创建或更新记录"""
+
+    url = "/api/records/by-name/seadee.com.cn/upsert"
+    created = client.put(url, json={"ip_address": "172.27.0.130"})
+    assert created.status_code == 201
+    record = created.json()["data"]
+    assert record["hostname"] == "upsert"
+    assert record["status"] == "active"
+
+    updated = client.put(url, json={"ip_address": "172.27.0.131", "description": "moved"})
+    assert updated.status_code == 200
+    data = updated.json()["data"]
+    assert data["id"] == record["id"]
+    assert data["ip_address"] == "172.27.0.131"
+    assert data["description"] == "moved"
+    assert data["created_at"] == record["created_at"]
+
+    listing = client.get("/api/records?search=upsert").json()
+    assert listing["pagination"]["total"] == 1
+
+
+def test_upsert_record_after_soft_delete(client):
+    """已软删除的同名记录不会被复用"""
+
+    url = "/api/records/by-name/seadee.com.cn/revived"
+    first = client.put(url, json={"ip_address": "172.27.0.132"}).json()["data"]
+    client.delete(f"/api/records/{first['id']}")
+
+    response = client.put(url, json={"ip_address": "172.27.0.133"})
+    assert response.status_code == 201
+    assert response.json()["data"]["id"] != first["id"]
+
+
+def test_upsert_record_validation(client):
+    """测试按名称写入的字段校验"""
+
+    bad_host = client.put(
+        "/api/records/by-name/seadee.com.cn/bad_host", json={"ip_address": "172.27.0.134"}
+    )
+    assert bad_host.status_code == 422
+
+    deleted = client.put(
+        "/api/records/by-name/seadee.com.cn/ok",
+        json={"ip_address": "172.27.0.134", "status": "deleted"},
+    )
+    assert deleted.status_code == 422
+
+
 def test_list_include_deleted_param(client):
     """测试 include_deleted 参数"""
 
@@ -670,3 +790,114 @@ def test_search_records_no_results(client, sample_records):
     data = response.json()
     assert data["pagination"]["total"] == 0
     assert len(data["data"]) == 0
+
+
+def test_list_records_etag_not_modified(client, sample_records):
+    """测试 ETag / If-None-Match 返回 304"""
+
+    first = client.get("/api/records")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+
+    second = client.get("/api/records", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert second.content == b""
+
+
+def test_list_records_etag_changes_after_write(client, sample_records):
+    """测试写入后 ETag 失效"""
+
+    etag = client.get("/api/records").headers["etag"]
+    zones_etag = client.get("/api/records/zones").headers["etag"]
+
+    client.post(
+        "/api/records",
+        json={"zone": "etag.com", "hostname": "www", "ip_address": "10.9.9.9"},
+    )
+
+    response = client.get("/api/records", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    zones = client.get("/api/records/zones", headers={"If-None-Match": zones_etag})
+    assert zones.status_code == 200
+    assert any(zone["name"] == "etag.com" for zone in zones.json()["data"])
+
+
+def _write_from_other_worker(database_url: str) -> None:
+    engine = create_engine(database_url)
+    with Session(engine) as other:
+        other.add(DNSRecord(zone="worker.com", hostname="www", ip_address="10.8.8.8"))
+        other.commit()
+    engine.dispose()
+
+
+def test_etag_is_shared_across_workers(client, session, sample_records):
+    """测试其他 worker 进程提交的写入同样使 ETag 失效"""
+
+    etag = client.get("/api/records").headers["etag"]
+
+    worker = multiprocessing.get_context("fork").Process(
+        target=_write_from_other_worker, args=(str(session.get_bind().url),)
+    )
+    worker.start()
+    worker.join(timeout=30)
+    assert worker.exitcode == 0
+
+    response = client.get("/api/records", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert any(record["zone"] == "worker.com" for record in response.json()["data"])
+
+    # 回滚的写入不改变版本
+    etag = response.headers["etag"]
+    session.add(DNSRecord(zone="rollback.com", hostname="www", ip_address="10.8.8.9"))
+    session.flush()
+    session.rollback()
+    assert client.get("/api/records", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_export_records_ndjson(client, sample_records):
+    """测试 NDJSON 导出"""
+
+    response = client.get("/api/records/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert "attachment" in response.headers["content-disposition"]
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 5
+    assert {"zone", "hostname", "ip_address", "status"} <= set(lines[0])
+
+
+def test_export_records_csv_with_filters(client, sample_records):
+    """测试 CSV 导出并应用过滤条件"""
+
+    response = client.get("/api/records/export", params={"format": "csv", "zone": "seadee.com.cn"})
+    assert response.status_code == 200
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 2
+    assert all(row["zone"] == "seadee.com.cn" for row in rows)
+
+
+def test_export_records_hosts_gzip(client, sample_records):
+    """测试 hosts 格式 gzip 导出"""
+
+    response = client.get("/api/records/export", params={"format": "hosts", "compress": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"].endswith('.hosts.gz"')
+
+    content = gzip.decompress(response.content).decode("utf-8")
+    assert "172.27.0.3 app.seadee.com.cn" in content
+    # inactive 记录不进入 hosts 文件
+    assert "mail.example.com" not in content
+
+
+def test_export_records_invalid_format(client):
+    """测试非法导出格式"""
+
+    response = client.get("/api/records/export", params={"format": "xml"})
+    assert response.status_code == 422
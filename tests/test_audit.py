@@ -0,0 +1,112 @@
+"""Tests for the batched audit log writer and retention pruning"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, Session, create_engine, select
+
+from app.config import settings
+from app.database import get_read_session, get_session
+from app.main import application
+from app.models.log import OperationLog
+from app.services import audit_service
+from app.services.audit_service import AuditLogWriter, prune_operation_logs
+from app.services.settings_service import SettingsService
+
+
+@pytest.fixture(scope="function")
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def client(engine, tmp_path, monkeypatch):
+    session = Session(engine)
+
+    def get_session_override():
+        return session
+
+    application.dependency_overrides[get_session] = get_session_override
+    application.dependency_overrides[get_read_session] = get_session_override
+    monkeypatch.setattr(settings, "corefile_path", str(tmp_path / "Corefile"))
+    monkeypatch.setattr(settings, "corefile_backup_dir", str(tmp_path / "backups"))
+    writer = AuditLogWriter(engine=engine)
+    monkeypatch.setattr(audit_service, "audit_writer", writer)
+
+    client = TestClient(application)
+    yield client
+    application.dependency_overrides.clear()
+    session.close()
+
+
+def test_writer_flushes_in_batches(engine):
+    writer = AuditLogWriter(engine=engine, batch_size=3)
+    for index in range(7):
+        writer.record("create", "record", resource_id=index, user="alice", ip_address="10.0.0.1")
+
+    assert writer.pending == 7
+    assert writer.flush() == 7
+    assert writer.pending == 0
+
+    with Session(engine) as session:
+        rows = session.exec(select(OperationLog).order_by(OperationLog.id)).all()
+    assert [row.resource_id for row in rows] == list(range(7))
+    assert rows[0].user == "alice"
+
+
+def test_writer_drops_when_queue_is_full(engine):
+    writer = AuditLogWriter(engine=engine, max_queue=2)
+    for _ in range(5):
+        writer.record("update", "record")
+    assert writer.pending == 2
+
+
+def test_api_writes_are_audited(client, engine):
+    response = client.post(
+        "/api/records",
+        json={"zone": "example.com", "hostname": "www", "ip_address": "10.0.0.1"},
+        headers={"X-Forwarded-For": "203.0.113.7"},
+    )
+    record_id = response.json()["data"]["id"]
+    client.delete(f"/api/records/{record_id}")
+    client.get("/api/records")
+
+    writer = audit_service.audit_writer
+    assert writer.pending == 2
+    writer.flush()
+
+    with Session(engine) as session:
+        rows = session.exec(select(OperationLog).order_by(OperationLog.id)).all()
+    assert [(row.operation_type, row.resource_type, row.resource_id) for row in rows] == [
+        ("create", "record", None),
+        ("delete", "record", record_id),
+    ]
+    assert rows[0].ip_address == "203.0.113.7"
+    assert json.loads(rows[1].details)["status"] == 200
+
+
+def test_prune_honors_retention_setting(engine):
+    old = datetime.now(timezone.utc) - timedelta(days=10)
+    with Session(engine) as session:
+        for index in range(5):
+            session.add(
+                OperationLog(
+                    operation_type="create",
+                    resource_type="record",
+                    details="{}",
+                    created_at=old if index < 4 else datetime.now(timezone.utc),
+                )
+            )
+        SettingsService(session).set_setting(SettingsService.KEY_LOG_RETENTION_DAYS, "7")
+        retention_days = SettingsService(session).get_log_retention_days()
+
+    assert prune_operation_logs(engine, retention_days, chunk_size=3) == 4
+    with Session(engine) as session:
+        assert len(session.exec(select(OperationLog)).all()) == 1
@@ -0,0 +1,25 @@
+"""Tests for benchmark helpers"""
+
+import pytest
+
+from benchmarks.loadtest import percentile
+
+
+@pytest.mark.parametrize(
+    "samples, pct, expected",
+    [
+        (range(1, 11), 90, 9),
+        (range(1, 11), 95, 10),
+        (range(1, 101), 95, 95),
+        (range(1, 101), 99, 99),
+        (range(1, 101), 50, 50),
+        (range(1, 5), 50, 2),
+        (range(1, 101), 100, 100),
+        (range(1, 101), 0, 1),
+        (range(1, 101), 7, 7),
+        ([7.0], 99, 7.0),
+        ([], 95, 0.0),
+    ],
+)
+def test_percentile_nearest_rank(samples, pct, expected):
+    assert percentile(list(samples), pct) == expected
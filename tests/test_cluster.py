@@ -0,0 +1,131 @@
+"""Tests for leader election and cluster-wide Corefile generation"""
+
+import hashlib
+import time
+
+import pytest
+from sqlmodel import SQLModel, Session, create_engine, select
+
+from app.config import settings
+from app.models.cluster import CorefileArtifact
+from app.models.dns_record import DNSRecord
+from app.schemas.dns_record import DNSRecordCreate
+from app.services import cluster_service
+from app.services.cluster_service import GenerationCoordinator
+from app.services.dns_service import DNSService
+
+
+@pytest.fixture(scope="function")
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(settings, "corefile_backup_dir", str(tmp_path / "backups"))
+    yield engine
+    engine.dispose()
+
+
+def _node(engine, tmp_path, name, lease_ttl=30):
+    return GenerationCoordinator(
+        engine=engine,
+        node_id=name,
+        corefile_path=str(tmp_path / name / "Corefile"),
+        lease_ttl=lease_ttl,
+        auto_reload=False,
+    )
+
+
+def _add_record(engine, hostname):
+    with Session(engine) as session:
+        session.add(DNSRecord(zone="cluster.com", hostname=hostname, ip_address="10.0.0.1"))
+        session.commit()
+
+
+def _artifacts(engine):
+    with Session(engine) as session:
+        return session.exec(select(CorefileArtifact).order_by(CorefileArtifact.sequence)).all()
+
+
+def test_single_leader(engine, tmp_path):
+    a = _node(engine, tmp_path, "a")
+    b = _node(engine, tmp_path, "b")
+
+    assert a.heartbeat() is True
+    assert b.heartbeat() is False
+    # 续约不会让出领导权
+    assert a.heartbeat() is True
+    assert b.heartbeat() is False
+
+
+def test_leader_renders_once_and_followers_pull(engine, tmp_path):
+    a = _node(engine, tmp_path, "a")
+    b = _node(engine, tmp_path, "b")
+    a.heartbeat()
+    b.heartbeat()
+
+    _add_record(engine, "www")
+    # 多次写入只登记请求，由领导者合并为一次生成
+    for _ in range(3):
+        b.request_generation()
+    a.tick()
+    a.tick()
+
+    artifacts = _artifacts(engine)
+    assert len(artifacts) == 1
+    assert artifacts[0].node_id == "a"
+    assert artifacts[0].request_seq == 3
+    assert "www.cluster.com" in (tmp_path / "a" / "Corefile").read_text()
+
+    assert b.sync() is True
+    assert b.applied_sequence == artifacts[0].sequence
+    follower_content = (tmp_path / "b" / "Corefile").read_bytes()
+    assert hashlib.sha256(follower_content).hexdigest() == artifacts[0].digest
+    assert b.sync() is False
+
+
+def test_request_on_leader_generates_immediately(engine, tmp_path):
+    a = _node(engine, tmp_path, "a")
+    a.heartbeat()
+    _add_record(engine, "mail")
+
+    a.request_generation()
+
+    [artifact] = _artifacts(engine)
+    assert a.applied_sequence == artifact.sequence
+    assert "mail.cluster.com" in artifact.content
+
+
+def test_follower_takes_over_expired_lease(engine, tmp_path):
+    a = _node(engine, tmp_path, "a", lease_ttl=0.05)
+    b = _node(engine, tmp_path, "b", lease_ttl=0.05)
+    assert a.heartbeat() is True
+    assert b.heartbeat() is False
+
+    time.sleep(0.1)
+    assert b.heartbeat() is True
+    assert a.heartbeat() is False
+
+    b.release()
+    assert a.heartbeat() is True
+
+
+def test_record_write_only_requests_generation_in_cluster_mode(engine, tmp_path, monkeypatch):
+    leader = _node(engine, tmp_path, "leader")
+    leader.heartbeat()
+    follower = _node(engine, tmp_path, "follower")
+    monkeypatch.setattr(cluster_service, "generation_coordinator", follower)
+    monkeypatch.setattr(settings, "cluster_enabled", True)
+
+    with Session(engine) as session:
+        DNSService.create_record(
+            session, DNSRecordCreate(zone="cluster.com", hostname="api", ip_address="10.0.0.2")
+        )
+
+    # 跟随节点既不渲染也不写文件
+    assert _artifacts(engine) == []
+    assert not (tmp_path / "follower" / "Corefile").exists()
+
+    leader.tick()
+    follower.tick()
+    assert "api.cluster.com" in (tmp_path / "follower" / "Corefile").read_text()
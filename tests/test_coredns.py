@@ -1,8 +1,11 @@
 """Tests for CoreDNS reload/status endpoints"""
 
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 
+from app.config import settings
 from app.main import application
 from app.services.coredns_service import CoreDNSService
 
@@ -52,3 +55,15 @@ def test_status_endpoint(client, monkeypatch):
     response = client.get("/api/coredns/status")
     assert response.status_code == 200
     assert response.json()["data"]["running"] is True
+
+
+def test_find_process_uses_pid_file(tmp_path, monkeypatch):
+    pid_file = tmp_path / "coredns.pid"
+    pid_file.write_text(str(os.getpid()), encoding="utf-8")
+    monkeypatch.setattr(settings, "coredns_pid_file", str(pid_file))
+
+    service = CoreDNSService()
+    assert service._find_process() == str(os.getpid())
+
+    pid_file.write_text("not-a-pid", encoding="utf-8")
+    assert service._find_process() is None
@@ -1,11 +1,16 @@
 """Tests for Corefile generation, preview, and backup APIs"""
 
+import hashlib
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import SQLModel, Session, create_engine, select
 
 from app.config import settings
-from app.database import get_session
+from app.database import get_read_session, get_session
 from app.main import application
 from app.models.dns_record import DNSRecord
 from app.services.corefile_service import CorefileService
@@ -30,6 +35,7 @@ def client(session, tmp_path, monkeypatch):
         return session
 
     application.dependency_overrides[get_session] = get_session_override
+    application.dependency_overrides[get_read_session] = get_session_override
     monkeypatch.setattr(settings, "corefile_path", str(tmp_path / "Corefile"))
     monkeypatch.setattr(settings, "corefile_backup_dir", str(tmp_path / "backups"))
 
@@ -68,32 +74,128 @@ def test_generate_corefile_success(client, session):
     data = response.json()["data"]
     assert data["stats"]["total_zones"] == 1
     assert data["stats"]["total_records"] == 2
-    assert "app.seadee.com.cn" in data["content"]
+    # 默认不返回完整内容
+    assert data["content"] is None
+    written = Path(settings.corefile_path).read_bytes()
+    assert data["size_bytes"] == len(written)
+    assert data["digest"] == hashlib.sha256(written).hexdigest()
+    assert b"app.seadee.com.cn" in written
+
+    response = client.post("/api/corefile/generate?include_content=true")
+    assert "app.seadee.com.cn" in response.json()["data"]["content"]
 
 
-def test_preview_corefile_returns_content(client):
+def test_preview_corefile_returns_content(client, session):
+    _create_record(session, "preview.com", "www", "10.0.0.5")
     response = client.get("/api/corefile/preview")
     assert response.status_code == 200
-    data = response.json()["data"]
-    assert "content" in data
-    assert "generated_at" in data
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.headers["x-corefile-records"] == "1"
+    assert "x-generated-at" in response.headers
+    assert "www.preview.com" in response.text
+
+
+def test_preview_corefile_by_zone_and_byte_window(client, session):
+    _create_record(session, "one.com", "a", "10.0.0.1")
+    _create_record(session, "two.com", "b", "10.0.0.2")
+    full = client.get("/api/corefile/preview").content
+
+    zone = client.get("/api/corefile/preview?zone=two.com")
+    assert zone.headers["x-corefile-zones"] == "1"
+    assert "b.two.com" in zone.text
+    assert "one.com" not in zone.text
+    assert client.get("/api/corefile/preview?zone=missing.com").status_code == 404
+
+    window = client.get("/api/corefile/preview?offset=10&limit=25")
+    assert window.content == full[10:35]
+    assert client.get(f"/api/corefile/preview?offset={len(full) - 5}").content == full[-5:]
+
+
+def test_preview_corefile_etag(client, session):
+    first = client.get("/api/corefile/preview")
+    etag = first.headers["etag"]
+
+    cached = client.get("/api/corefile/preview", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    _create_record(session, "etag.com", "app", "10.0.0.9")
+    refreshed = client.get("/api/corefile/preview", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert "app.etag.com" in refreshed.text
+
+
+def test_preview_etag_changes_when_template_is_swapped(client, session, tmp_path, monkeypatch):
+    import os
+    import shutil
+
+    from app.services import corefile_service
+    from app.services.corefile_template import TemplateCache
+
+    template_dir = tmp_path / "templates"
+    template_dir.mkdir()
+    template = template_dir / "Corefile.j2"
+    shutil.copy("app/templates/Corefile.j2", template)
+    cache = TemplateCache(str(template_dir), bytecode_dir="", auto_reload=False, check_interval=0)
+    monkeypatch.setattr(corefile_service, "get_template_cache", lambda template_dir: cache)
+
+    etag = client.get("/api/corefile/preview").headers["etag"]
+    assert client.get("/api/corefile/preview", headers={"If-None-Match": etag}).status_code == 304
+
+    template.write_text(template.read_text(encoding="utf-8") + "# swapped\n", encoding="utf-8")
+    stat = template.stat()
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    refreshed = client.get("/api/corefile/preview", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.text.endswith("# swapped")
+
+
+def test_generation_query_reads_covering_index_in_order(session):
+    service = CorefileService()
+    query = (
+        select(DNSRecord.zone, DNSRecord.hostname, DNSRecord.ip_address, DNSRecord.record_type)
+        .where(*service._active_filters())
+        .order_by(DNSRecord.zone, DNSRecord.hostname)
+    )
+    sql = str(query.compile(session.get_bind(), compile_kwargs={"literal_binds": True}))
+    plan = " | ".join(
+        row[3] for row in session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+    )
+    assert "COVERING INDEX idx_status_zone_hostname" in plan
+    assert "TEMP B-TREE" not in plan
 
 
 def test_zone_grouping(client, session):
     _create_record(session, "zone1.com", "app", "10.0.0.1")
     _create_record(session, "zone2.com", "web", "10.0.0.2")
 
-    response = client.post("/api/corefile/generate")
+    response = client.post("/api/corefile/generate?include_content=true")
     content = response.json()["data"]["content"]
     assert "zone1.com" in content
     assert "zone2.com" in content
 
 
+def test_records_are_grouped_in_a_single_pass(session):
+    for zone, hostname in (("b.com", "x"), ("a.com", "z"), ("b.com", "w"), ("a.com", "y")):
+        _create_record(session, zone, hostname, "10.0.0.1")
+    _create_record(session, "c.com", "gone", "10.0.0.2", status="inactive")
+
+    result = CorefileService().generate_corefile(session=session)
+
+    content = result["content"]
+    assert content.count("hosts {") == 2
+    positions = [content.index(name) for name in ("y.a.com", "z.a.com", "w.b.com", "x.b.com")]
+    assert positions == sorted(positions)
+    assert content.index("a.com {") < content.index("y.a.com") < content.index("b.com {")
+    assert result["stats"] == {"total_zones": 2, "total_records": 4, "active_records": 4}
+    assert CorefileService.count_records(session) == result["stats"]
+
+
 def test_only_active_records(client, session):
     _create_record(session, "test.com", "active", "10.0.0.3", status="active")
     _create_record(session, "test.com", "inactive", "10.0.0.4", status="inactive")
 
-    response = client.post("/api/corefile/generate")
+    response = client.post("/api/corefile/generate?include_content=true")
     content = response.json()["data"]["content"]
     assert "active.test.com" in content
     assert "inactive.test.com" not in content
@@ -111,6 +213,11 @@ def test_corefile_service_writes_file(session, tmp_path):
         file_content = fh.read()
     assert "write.com" in file_content
     assert result["corefile_path"] == str(output_path)
+    # 临时文件在写入后清理，目标文件原地覆盖（保持 inode，兼容单文件挂载）
+    inode = output_path.stat().st_ino
+    service.generate_corefile(session=session, output_path=str(output_path))
+    assert output_path.stat().st_ino == inode
+    assert [path.name for path in tmp_path.iterdir() if path.name.endswith(".tmp")] == []
 
 
 def test_auto_backup_on_generate(client, session):
@@ -150,12 +257,15 @@ def test_restore_backup(client, session):
     # Modify current Corefile content
     with open(settings.corefile_path, "w", encoding="utf-8") as fh:
         fh.write("corrupted corefile")
+    inode = Path(settings.corefile_path).stat().st_ino
 
     restore_response = client.post(f"/api/corefile/restore/{backup_id}")
     assert restore_response.status_code == 200
     with open(settings.corefile_path, "r", encoding="utf-8") as fh:
         restored_content = fh.read()
     assert backup_detail["content"] == restored_content
+    # 原地覆盖，单文件挂载的容器能看到恢复后的内容
+    assert Path(settings.corefile_path).stat().st_ino == inode
 
 
 def test_delete_backup(client, session):
@@ -168,3 +278,314 @@ def test_delete_backup(client, session):
     assert delete_response.status_code == 200
     ids_after = [b["id"] for b in client.get("/api/corefile/backups").json()["data"]["backups"]]
     assert backup_to_delete not in ids_after
+
+
+def test_identical_backups_share_one_object(tmp_path):
+    corefile = tmp_path / "Corefile"
+    corefile.write_text(". {\n    forward . 223.5.5.5\n}\n" * 50, encoding="utf-8")
+    service = BackupService(str(corefile), backup_dir=str(tmp_path / "backups"))
+
+    first = service.create_backup()
+    second = service.create_backup()
+
+    assert first["id"] != second["id"]
+    assert first["digest"] == second["digest"]
+    assert first["stored_size"] < first["size"]
+    objects = [path for path in (tmp_path / "backups" / "objects").rglob("*") if path.is_file()]
+    assert len(objects) == 1
+    assert service.get_backup(first["id"])["content"] == corefile.read_text(encoding="utf-8")
+
+
+def test_unchanged_corefile_is_not_rehashed(tmp_path, monkeypatch):
+    from app.services import backup_service as backup_module
+
+    corefile = tmp_path / "Corefile"
+    corefile.write_text("# version 1\n", encoding="utf-8")
+    service = BackupService(str(corefile), backup_dir=str(tmp_path / "backups"))
+    # 刚写入的文件不记录签名，下一次备份仍然计算摘要
+    service.create_backup()
+    assert "stat" not in service.catalog.latest()
+
+    old = corefile.stat().st_mtime_ns - 10 * backup_module.STAT_SIGNATURE_MIN_AGE_NS
+    os.utime(corefile, ns=(old, old))
+    first = service.create_backup()
+
+    hashed = []
+
+    def counting_sha256(data=b""):
+        hashed.append(data)
+        return hashlib.sha256(data)
+
+    monkeypatch.setattr(backup_module, "hashlib", SimpleNamespace(sha256=counting_sha256))
+    second = service.create_backup(reason="pre-restore")
+    assert hashed == []
+    assert second["digest"] == first["digest"]
+    assert second["size"] == first["size"]
+
+    # 内容变化后签名不同，重新计算摘要
+    corefile.write_text("# version 2\n", encoding="utf-8")
+    third = service.create_backup()
+    assert len(hashed) == 1
+    assert third["digest"] == hashlib.sha256(b"# version 2\n").hexdigest()
+
+
+def test_retention_collects_unreferenced_objects(tmp_path):
+    corefile = tmp_path / "Corefile"
+    service = BackupService(str(corefile), backup_dir=str(tmp_path / "backups"), max_backups=2)
+
+    for index in range(4):
+        corefile.write_text(f"# version {index}\n", encoding="utf-8")
+        service.create_backup()
+
+    listing = service.list_backups()
+    assert listing["total"] == 2
+    objects = [path for path in (tmp_path / "backups" / "objects").rglob("*") if path.is_file()]
+    assert len(objects) == 2
+    assert service.get_backup(listing["backups"][0]["id"])["content"] == "# version 3\n"
+
+
+def test_legacy_backup_files_are_imported(tmp_path):
+    backup_dir = tmp_path / "backups"
+    backup_dir.mkdir()
+    legacy = backup_dir / "Corefile.backup.20250101_000000_000000"
+    legacy.write_text("# legacy\n", encoding="utf-8")
+
+    service = BackupService(str(tmp_path / "Corefile"), backup_dir=str(backup_dir))
+
+    assert not legacy.exists()
+    detail = service.get_backup("20250101_000000_000000")
+    assert detail["content"] == "# legacy\n"
+    assert detail["reason"] == "legacy"
+
+
+def test_legacy_backup_import_runs_once(tmp_path, monkeypatch):
+    from app.services import backup_catalog
+
+    backup_dir = tmp_path / "backups"
+    BackupService(str(tmp_path / "Corefile"), backup_dir=str(backup_dir))
+    legacy = backup_dir / "Corefile.backup.20250101_000000_000000"
+    legacy.write_text("# legacy\n", encoding="utf-8")
+
+    # 新进程从 manifest 读到已检查过的标记，不再扫描目录
+    monkeypatch.setattr(backup_catalog, "_catalogs", {})
+    service = BackupService(str(tmp_path / "Corefile"), backup_dir=str(backup_dir))
+    assert service.catalog.legacy_imported
+    assert legacy.exists()
+    assert service.list_backups()["total"] == 0
+
+
+def _write_backups(corefile: str, backup_dir: str, count: int) -> None:
+    service = BackupService(corefile, backup_dir=backup_dir, max_backups=1000)
+    service.catalog.compact_threshold = 3
+    for index in range(count):
+        Path(corefile).write_text(f"# {corefile} {index}\n", encoding="utf-8")
+        service.create_backup()
+
+
+def test_backup_catalog_is_safe_across_processes(tmp_path):
+    import multiprocessing
+
+    from app.services.backup_catalog import BackupCatalog
+
+    backup_dir = tmp_path / "backups"
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(
+            target=_write_backups, args=(str(tmp_path / f"Corefile{index}"), str(backup_dir), 10)
+        )
+        for index in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    catalog = BackupCatalog(backup_dir)
+    catalog.refresh()
+    assert len(catalog) == 40
+    service = BackupService(str(tmp_path / "Corefile0"), backup_dir=str(backup_dir))
+    for backup_id in catalog.backups:
+        assert service.get_backup(backup_id)["content"].startswith("# ")
+
+
+def test_consecutive_versions_are_delta_encoded(tmp_path):
+    from app.services import backup_service
+
+    corefile = tmp_path / "Corefile"
+    lines = [f"    10.0.{index // 256}.{index % 256} host{index}.example.com\n" for index in range(2000)]
+    service = BackupService(
+        str(corefile), backup_dir=str(tmp_path / "backups"), max_backups=3, snapshot_interval=3
+    )
+
+    versions = []
+    for index in range(5):
+        lines[index * 100] = f"    10.9.9.{index} changed{index}.example.com\n"
+        corefile.write_text("".join(lines), encoding="utf-8")
+        versions.append(("".join(lines), service.create_backup()))
+
+    assert [info["storage"] for _, info in versions] == ["full", "delta", "delta", "full", "delta"]
+    assert versions[1][1]["stored_size"] < versions[0][1]["stored_size"] / 10
+
+    backup_service._content_cache.clear()
+    for content, info in versions[2:]:
+        assert service.get_backup(info["id"])["content"] == content
+
+
+def test_delta_base_is_kept_after_retention(tmp_path):
+    from app.services import backup_service
+
+    corefile = tmp_path / "Corefile"
+    service = BackupService(str(corefile), backup_dir=str(tmp_path / "backups"), max_backups=1)
+
+    corefile.write_text("".join(f"line {index}\n" for index in range(500)), encoding="utf-8")
+    service.create_backup()
+    corefile.write_text("".join(f"line {index}\n" for index in range(501)), encoding="utf-8")
+    latest = service.create_backup()
+
+    assert latest["storage"] == "delta"
+    backup_service._content_cache.clear()
+    assert service.get_backup(latest["id"])["content"] == corefile.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("budget", [20000, 4])
+@pytest.mark.parametrize(
+    "base, target",
+    [
+        ("a\nb\nc\nd\n", "a\nx\nc\nd\ny\n"),
+        ("a\nb\nc\nd\n", "d\nc\nb\na\n"),
+        ("a\nb\nc", "a\nb\nc\n"),
+        ("a\nb\n", "a\nb\n"),
+        ("", "a\n"),
+        ("a\n", ""),
+    ],
+)
+def test_delta_round_trip(monkeypatch, budget, base, target):
+    from app.services import backup_service
+
+    monkeypatch.setattr(backup_service, "MAX_DELTA_DIFF_LINES", budget)
+    ops = backup_service.compute_delta(base, target)
+    assert backup_service.apply_delta(base, ops) == target
+
+
+def test_delta_diffs_only_the_changed_region(monkeypatch):
+    from app.services import backup_service
+
+    base = "".join(f"line {index}\n" for index in range(10000))
+    target = base.replace("line 5000\n", "changed\n")
+    ops = backup_service.compute_delta(base, target)
+    assert ops == [["=", 0, 5000], ["+", ["changed\n"]], ["=", 5001, 10000]]
+
+    # 变化区域超过上限时不再逐行匹配，直接记录目标的变化区域
+    monkeypatch.setattr(backup_service, "MAX_DELTA_DIFF_LINES", 10)
+    reordered = "".join(f"line {index}\n" for index in reversed(range(10000)))
+    ops = backup_service.compute_delta(base, reordered)
+    assert len(ops) == 1 and ops[0][0] == "+"
+    assert backup_service.apply_delta(base, ops) == reordered
+
+
+def test_backup_catalog_pages_and_reloads_from_journal(tmp_path):
+    from app.services.backup_catalog import BackupCatalog
+
+    corefile = tmp_path / "Corefile"
+    backup_dir = tmp_path / "backups"
+    service = BackupService(str(corefile), backup_dir=str(backup_dir), max_backups=5)
+    service.catalog.compact_threshold = 4
+
+    created = []
+    for index in range(7):
+        corefile.write_text(f"# version {index}\n", encoding="utf-8")
+        created.append(service.create_backup()["id"])
+
+    page = service.list_backups(page=2, page_size=2)
+    assert page["total"] == 5
+    assert [item["id"] for item in page["backups"]] == [created[4], created[3]]
+    assert (backup_dir / "manifest.journal").exists()
+
+    # 另一个进程看到的状态：manifest 快照 + journal 回放
+    reloaded = BackupCatalog(backup_dir)
+    reloaded.refresh()
+    assert list(reloaded.backups) == created[2:]
+    assert set(reloaded.objects) == set(service.catalog.objects)
+
+
+def test_diff_backups_endpoint(client, tmp_path):
+    corefile = tmp_path / "Corefile"
+    corefile.write_text("".join(f"line {index}\n" for index in range(100)), encoding="utf-8")
+    first = client.post("/api/corefile/backups").json()["data"]["id"]
+    corefile.write_text(
+        "".join(f"line {index}\n" for index in range(100)).replace("line 50\n", "line fifty\n"),
+        encoding="utf-8",
+    )
+    second = client.post("/api/corefile/backups").json()["data"]["id"]
+
+    response = client.get(f"/api/corefile/backups/{first}/diff/{second}?context=1")
+    assert response.status_code == 200
+    assert response.headers["x-diff-cache"] == "miss"
+    assert response.text == (
+        f"--- {first}\n+++ {second}\n"
+        "@@ -50,3 +50,3 @@\n line 49\n-line 50\n+line fifty\n line 51\n"
+    )
+
+    cached = client.get(f"/api/corefile/backups/{first}/diff/{second}?context=1")
+    assert cached.headers["x-diff-cache"] == "hit"
+    assert cached.text == response.text
+
+    current = client.get(f"/api/corefile/backups/{second}/diff/current")
+    assert current.status_code == 200
+    assert current.text == ""
+
+    missing = client.get(f"/api/corefile/backups/{first}/diff/unknown")
+    assert missing.status_code == 404
+
+
+def test_generation_history_records_each_write(session, tmp_path):
+    _create_record(session, "history.com", "www", "10.2.0.1")
+    _create_record(session, "history.com", "mail", "10.2.0.2")
+    service = CorefileService()
+
+    result = service.generate_corefile(
+        session=session, output_path=str(tmp_path / "Corefile"), auto_reload=False, trigger="records"
+    )
+    assert "content" not in result
+    # 预览不写文件，不记录历史
+    service.generate_corefile(session=session)
+
+    [generation] = CorefileService.list_generations(session)[0]
+    assert generation.id == result["generation_id"]
+    assert generation.digest == result["digest"]
+    assert generation.record_count == 2
+    assert generation.zone_count == 1
+    assert generation.size_bytes == result["size_bytes"] == (tmp_path / "Corefile").stat().st_size
+    assert generation.trigger == "records"
+    assert generation.reload_status == "skipped"
+    assert generation.reload_ms is None
+    assert generation.render_ms > 0 and generation.write_ms > 0
+
+
+def test_generation_history_is_pruned(session, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "max_corefile_generations", 3)
+    service = CorefileService()
+    for _ in range(5):
+        service.generate_corefile(session=session, output_path=str(tmp_path / "Corefile"), auto_reload=False)
+
+    items, _ = CorefileService.list_generations(session)
+    assert [item.id for item in items] == [5, 4, 3]
+
+
+def test_list_generations_keyset_pagination(client, session):
+    _ensure_record_exists(session)
+    for _ in range(5):
+        client.post("/api/corefile/generate")
+
+    first = client.get("/api/corefile/generations?limit=2").json()["data"]
+    assert [item["id"] for item in first["items"]] == [5, 4]
+    assert first["items"][0]["trigger"] == "api"
+    assert first["next_cursor"] == 4
+
+    second = client.get(f"/api/corefile/generations?limit=2&before={first['next_cursor']}").json()["data"]
+    assert [item["id"] for item in second["items"]] == [3, 2]
+
+    last = client.get(f"/api/corefile/generations?limit=2&before={second['next_cursor']}").json()["data"]
+    assert [item["id"] for item in last["items"]] == [1]
+    assert last["next_cursor"] is None
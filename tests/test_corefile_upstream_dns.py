@@ -7,6 +7,8 @@ from sqlmodel.pool import StaticPool
 from app.config import settings
 from app.models.dns_record import DNSRecord
 from app.models.setting import SystemSetting
+from app.models.zone import Zone
+from app.schemas.settings import CorefilePluginSettings
 from app.services.corefile_service import CorefileService
 from app.services.settings_service import SettingsService
 
@@ -87,3 +89,78 @@ def test_corefile_generation_with_default_dns(session: Session):
         parts.append(settings.upstream_secondary_dns_default)
     forward_line = "forward . " + " ".join(parts)
     assert forward_line in result["content"]
+
+
+def _block(content: str, name: str) -> str:
+    start = content.index(f"\n{name} {{")
+    return content[start : content.index("\n}", start)]
+
+
+def test_default_plugin_settings_keep_previous_output(session: Session):
+    """Test that default plugin settings render the original root block"""
+    SettingsService(session).set_upstream_dns("1.1.1.1", "1.0.0.1")
+    content = CorefileService().generate_corefile(session=session)["content"]
+    assert _block(content, ".") == "\n. {\n    forward . 1.1.1.1 1.0.0.1\n    log\n    errors\n    cache 30"
+
+
+def test_plugin_settings_rendered_per_block(session: Session):
+    """Test cache / forward / loadbalance / log tuning in root and zone blocks"""
+    Zone.metadata.create_all(session.get_bind())
+    session.add(DNSRecord(hostname="www", zone="example.com", ip_address="10.0.0.1"))
+    session.add(Zone(name="example.com", upstream_dns="10.0.0.53", cache_ttl=60))
+    session.add(Zone(name="quiet.com", log_enabled=False))
+    session.add(DNSRecord(hostname="api", zone="quiet.com", ip_address="10.0.0.2"))
+    session.commit()
+
+    settings_service = SettingsService(session)
+    settings_service.set_upstream_dns("1.1.1.1", None)
+    settings_service.set_plugin_settings(
+        CorefilePluginSettings(
+            cache_ttl=600,
+            cache_success_capacity=100000,
+            cache_denial_ttl=5,
+            cache_prefetch=10,
+            forward_policy="sequential",
+            forward_max_concurrent=1000,
+            forward_health_check_ms=500,
+            forward_expire=10,
+            loadbalance=True,
+            log_mode="errors",
+        )
+    )
+
+    content = CorefileService().generate_corefile(session=session)["content"]
+    forward_options = (
+        "        policy sequential\n"
+        "        max_concurrent 1000\n"
+        "        health_check 500ms\n"
+        "        expire 10s\n"
+        "    }"
+    )
+    cache_options = "        success 100000\n        denial 9984 5\n        prefetch 10 60s 10%\n    }"
+    error_log = "    log {\n        class error\n    }\n"
+
+    root = _block(content, ".")
+    assert f"    forward . 1.1.1.1 {{\n{forward_options}" in root
+    assert f"    cache 600 {{\n{cache_options}" in root
+    assert error_log in root
+    assert "    loadbalance" in root
+
+    zone = _block(content, "example.com")
+    assert f"    forward . 10.0.0.53 {{\n{forward_options}" in zone
+    assert f"    cache 60 {{\n{cache_options}" in zone
+    assert error_log in zone
+
+    # zone 关闭日志时不受全局设置影响
+    assert "log" not in _block(content, "quiet.com")
+
+
+def test_plugins_can_disable_log_and_cache(session: Session):
+    """Test turning query logging and the root cache off"""
+    SettingsService(session).set_plugin_settings(
+        CorefilePluginSettings(log_mode="off", cache_enabled=False)
+    )
+    root = _block(CorefileService().generate_corefile(session=session)["content"], ".")
+    assert "log" not in root
+    assert "cache" not in root
+    assert "errors" in root
@@ -0,0 +1,137 @@
+"""Tests for the change event bus and SSE endpoint"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, Session, create_engine
+
+from app.api.events import stream_events
+from app.config import settings
+from app.database import get_read_session, get_session
+from app.main import application
+from app.services.event_service import EventBus, get_event_bus
+
+
+@pytest.fixture(scope="function")
+def session(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        yield session
+
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def client(session, tmp_path, monkeypatch):
+    def get_session_override():
+        return session
+
+    application.dependency_overrides[get_session] = get_session_override
+    application.dependency_overrides[get_read_session] = get_session_override
+    monkeypatch.setattr(settings, "corefile_path", str(tmp_path / "Corefile"))
+    monkeypatch.setattr(settings, "corefile_backup_dir", str(tmp_path / "backups"))
+
+    client = TestClient(application)
+    yield client
+    application.dependency_overrides.clear()
+
+
+def _read_events(bus: EventBus, count: int, **params) -> list[str]:
+    async def collect():
+        response = await stream_events(
+            request=None,
+            last_event_id=params.get("last_event_id"),
+            types=params.get("types"),
+            last_event_id_header=None,
+            bus=bus,
+        )
+        chunks = []
+        async for chunk in response.body_iterator:
+            if chunk.startswith(("id:", "event:")):
+                chunks.append(chunk)
+            if len(chunks) == count:
+                break
+        await response.body_iterator.aclose()
+        return chunks
+
+    return asyncio.run(collect())
+
+
+def test_events_since_replays_after_id():
+    bus = EventBus(buffer_size=10)
+    for index in range(5):
+        bus.publish("record.created", {"id": index})
+
+    events, complete = bus.events_since(3)
+    assert complete is True
+    assert [event.id for event in events] == [4, 5]
+
+
+def test_events_since_reports_gap_when_buffer_wrapped():
+    bus = EventBus(buffer_size=3)
+    for index in range(10):
+        bus.publish("record.created", {"id": index})
+
+    events, complete = bus.events_since(2)
+    assert complete is False
+    assert [event.id for event in events] == [8, 9, 10]
+
+    _, complete_after_restart = bus.events_since(42)
+    assert complete_after_restart is False
+
+
+def test_sse_format():
+    event = EventBus().publish("record.updated", {"id": 7})
+    payload = event.to_sse()
+    assert payload.startswith("id: 1\nevent: record.updated\ndata: ")
+    assert payload.endswith("\n\n")
+    assert json.loads(payload.split("data: ", 1)[1])["data"] == {"id": 7}
+
+
+def test_stream_resumes_from_last_event_id():
+    bus = EventBus(buffer_size=10)
+    bus.publish("record.created", {"id": 1})
+    bus.publish("corefile.generated", {"digest": "abc"})
+    bus.publish("record.deleted", {"id": 1})
+
+    chunks = _read_events(bus, 2, last_event_id="1")
+    assert chunks[0].startswith("id: 2\nevent: corefile.generated")
+    assert chunks[1].startswith("id: 3\nevent: record.deleted")
+
+
+def test_stream_filters_types_and_signals_reset():
+    bus = EventBus(buffer_size=2)
+    for index in range(4):
+        bus.publish("record.created", {"id": index})
+    bus.publish("corefile.generated", {"digest": "abc"})
+
+    chunks = _read_events(bus, 2, last_event_id="1", types="corefile.generated")
+    assert chunks[0].startswith("event: stream.reset")
+    assert chunks[1].startswith("id: 5\nevent: corefile.generated")
+
+
+def test_record_writes_publish_events(client, monkeypatch):
+    monkeypatch.setattr("app.services.coredns_service.CoreDNSService.reload", lambda self: {})
+    bus = get_event_bus()
+    start = bus.last_id
+
+    created = client.post(
+        "/api/records",
+        json={"zone": "events.com", "hostname": "www", "ip_address": "10.1.2.3"},
+    ).json()["data"]
+    client.delete(f"/api/records/{created['id']}")
+
+    events, complete = bus.events_since(start)
+    assert complete is True
+    types = [event.type for event in events]
+    assert types.index("record.created") < types.index("corefile.generated")
+    assert "record.deleted" in types
+    generated = next(event for event in events if event.type == "corefile.generated")
+    assert len(generated.data["digest"]) == 64
+    assert generated.data["stats"]["total_records"] == 1
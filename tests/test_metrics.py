@@ -0,0 +1,81 @@
+"""Tests for the Prometheus metrics endpoint"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, Session, create_engine
+
+from app.config import settings
+from app.database import get_read_session, get_session
+from app.main import application
+from app.services.coredns_service import CoreDNSService
+from app.utils.metrics import Counter, Histogram
+
+
+@pytest.fixture(scope="function")
+def session(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        yield session
+
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def client(session, tmp_path, monkeypatch):
+    def get_session_override():
+        return session
+
+    application.dependency_overrides[get_session] = get_session_override
+    application.dependency_overrides[get_read_session] = get_session_override
+    monkeypatch.setattr(settings, "corefile_path", str(tmp_path / "Corefile"))
+    monkeypatch.setattr(settings, "corefile_backup_dir", str(tmp_path / "backups"))
+    monkeypatch.setattr(CoreDNSService, "_reload_process", lambda self: {"status": "success"})
+    monkeypatch.setattr(CoreDNSService, "_reload_docker", lambda self: {"status": "success"})
+
+    client = TestClient(application)
+    yield client
+    application.dependency_overrides.clear()
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_latency_seconds", "Test latency", buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5.0, route="/a")
+
+    lines = histogram.samples()
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1.0' in lines
+    assert 'test_latency_seconds_bucket{route="/a",le="1.0"} 2.0' in lines
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3.0' in lines
+    assert 'test_latency_seconds_count{route="/a"} 3.0' in lines
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("test_total", "Test counter")
+    counter.inc(operation='say "hi"')
+    assert counter.samples() == ['test_total{operation="say \\"hi\\""} 1.0']
+
+
+def test_metrics_endpoint_exposes_hot_paths(client):
+    client.post(
+        "/api/records",
+        json={"zone": "metrics.com", "hostname": "www", "ip_address": "10.0.0.1"},
+    )
+    client.post("/api/corefile/generate")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    body = response.text
+    assert 'route="/api/records"' in body
+    assert 'coredns_manager_db_queries_total{operation="create_record"}' in body
+    assert 'coredns_manager_corefile_phase_duration_seconds_count{phase="render"}' in body
+    assert 'coredns_manager_corefile_phase_duration_seconds_count{phase="backup"}' in body
+    assert "coredns_manager_coredns_reload_duration_seconds_count" in body
+    assert 'coredns_manager_dns_records{status="active"} 1' in body
+    assert "coredns_manager_backup_disk_usage_bytes" in body
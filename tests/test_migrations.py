@@ -0,0 +1,199 @@
+"""Tests for schema migrations and batched data backfills"""
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlmodel import SQLModel, Session, create_engine, select
+
+from app.migrations import MIGRATIONS, MigrationError, MigrationRunner
+from app.migrations.__main__ import main as migrations_cli
+from app.models.dns_record import DNSRecord, ip_sort_key
+
+# 引入迁移框架之前的 dns_records 结构
+LEGACY_SCHEMA = """
+CREATE TABLE dns_records (
+    id INTEGER NOT NULL PRIMARY KEY,
+    zone VARCHAR(255) NOT NULL,
+    hostname VARCHAR(255) NOT NULL,
+    ip_address VARCHAR(45) NOT NULL,
+    record_type VARCHAR(10) NOT NULL,
+    description VARCHAR(500),
+    status VARCHAR(20) NOT NULL,
+    created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL
+)
+"""
+
+# 增加 cache_ttl 之前的 zones 结构
+LEGACY_ZONES_SCHEMA = """
+CREATE TABLE zones (
+    id INTEGER NOT NULL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    fallthrough BOOLEAN NOT NULL,
+    log_enabled BOOLEAN NOT NULL,
+    upstream_dns VARCHAR(255),
+    status VARCHAR(20) NOT NULL,
+    created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL
+)
+"""
+
+
+@pytest.fixture(scope="function")
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _legacy_database(engine, rows):
+    with engine.begin() as connection:
+        connection.execute(text(LEGACY_SCHEMA))
+        for index, (hostname, ip_address, status) in enumerate(rows, start=1):
+            connection.execute(
+                text(
+                    "INSERT INTO dns_records VALUES "
+                    "(:id, 'example.com', :hostname, :ip, 'A', NULL, :status, "
+                    "'2025-01-01 00:00:00', '2025-01-01 00:00:00')"
+                ),
+                {"id": index, "hostname": hostname, "ip": ip_address, "status": status},
+            )
+
+
+def test_fresh_database_upgrades_to_head(engine):
+    runner = MigrationRunner(engine)
+    assert runner.current_version() == 0
+
+    applied = runner.upgrade()
+
+    assert applied == [migration.version for migration in MIGRATIONS]
+    assert runner.is_current()
+    assert runner.pending() == []
+    assert "dns_records" in inspect(engine).get_table_names()
+    assert runner.upgrade() == []
+
+
+def test_startup_skips_create_all_when_current(engine, monkeypatch):
+    from app import database
+
+    MigrationRunner(engine).upgrade()
+    monkeypatch.setattr(database, "engine", engine)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("create_all should not run for a current schema")
+
+    monkeypatch.setattr(SQLModel.metadata, "create_all", fail)
+    database.create_db_and_tables()
+
+
+def test_legacy_database_gets_column_and_resumable_backfill(engine):
+    _legacy_database(
+        engine,
+        [("a", "10.0.0.10", "active"), ("b", "10.0.0.2", "active"), ("c", "10.0.0.1", "active")],
+    )
+    runner = MigrationRunner(engine)
+    runner.upgrade()
+
+    columns = {column["name"] for column in inspect(engine).get_columns("dns_records")}
+    assert "ip_sort_key" in columns
+    indexes = {index["name"] for index in inspect(engine).get_indexes("dns_records")}
+    assert "idx_status_zone_hostname" in indexes
+    [backfill] = runner.pending_backfills()
+
+    # 中断后从记录的位置继续
+    assert runner.run_backfills(batch_size=2, max_batches=1, pause=0) is False
+    status = runner.status()["backfills"][0]
+    assert status == {"name": backfill.name, "processed": 2, "completed": False}
+
+    assert runner.run_backfills(batch_size=2, pause=0) is True
+    assert runner.pending_backfills() == []
+
+    with Session(engine) as session:
+        records = session.exec(select(DNSRecord).order_by(DNSRecord.ip_sort_key)).all()
+        assert [record.hostname for record in records] == ["c", "b", "a"]
+        assert all(record.ip_sort_key == ip_sort_key(record.ip_address) for record in records)
+
+
+def test_duplicate_active_records_block_unique_index(engine):
+    _legacy_database(
+        engine,
+        [("dup", "10.0.0.1", "active"), ("dup", "10.0.0.2", "active"), ("dup", "10.0.0.3", "deleted")],
+    )
+    runner = MigrationRunner(engine)
+
+    with pytest.raises(MigrationError, match="unique_active_zone_hostname") as error:
+        runner.upgrade()
+    # 列出冲突的记录，已删除的记录不计入
+    assert "dup.example.com (ids 1, 2)" in str(error.value)
+    assert runner.current_version() == 2
+
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE dns_records SET status = 'deleted' WHERE id = 1"))
+    assert runner.upgrade()[0] == 3
+    assert runner.is_current()
+
+
+def test_failed_migration_aborts_startup(engine, monkeypatch):
+    from app import database
+
+    _legacy_database(engine, [("dup", "10.0.0.1", "active"), ("dup", "10.0.0.2", "active")])
+    monkeypatch.setattr(database, "engine", engine)
+
+    with pytest.raises(MigrationError):
+        database.create_db_and_tables()
+    assert MigrationRunner(engine).current_version() == 2
+
+
+def test_legacy_zones_table_gets_cache_ttl(engine):
+    with engine.begin() as connection:
+        connection.execute(text(LEGACY_ZONES_SCHEMA))
+    MigrationRunner(engine).upgrade()
+    columns = {column["name"] for column in inspect(engine).get_columns("zones")}
+    assert "cache_ttl" in columns
+
+
+def test_zone_cache_ttl_applies_after_earlier_failure_is_resolved(engine, monkeypatch):
+    from app import database
+    from app.services.corefile_service import CorefileService
+
+    _legacy_database(engine, [("dup", "10.0.0.1", "active"), ("dup", "10.0.0.2", "active")])
+    with engine.begin() as connection:
+        connection.execute(text(LEGACY_ZONES_SCHEMA))
+    monkeypatch.setattr(database, "engine", engine)
+
+    # 前面的迁移失败时启动中止，不会在缺少 zones.cache_ttl 的结构上生成 Corefile
+    with pytest.raises(MigrationError, match="unique_active_zone_hostname"):
+        database.create_db_and_tables()
+    columns = {column["name"] for column in inspect(engine).get_columns("zones")}
+    assert "cache_ttl" not in columns
+
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE dns_records SET status = 'deleted' WHERE id = 2"))
+    database.create_db_and_tables()
+    assert MigrationRunner(engine).is_current()
+
+    with Session(engine) as session:
+        result = CorefileService().generate_corefile(session=session)
+    assert "10.0.0.1 dup.example.com" in result["content"]
+
+
+def test_ip_sort_key_orders_numerically():
+    keys = [ip_sort_key(value) for value in ("10.0.0.2", "10.0.0.10", "9.255.0.1", "::1")]
+    assert sorted(keys) == [keys[2], keys[0], keys[1], keys[3]]
+
+
+def test_cli_status_and_upgrade(engine, monkeypatch, capsys):
+    import app.migrations.__main__ as cli
+
+    monkeypatch.setattr(cli, "engine", engine)
+
+    assert migrations_cli(["upgrade", "--target", "1"]) == 0
+    assert "current version: 1" in capsys.readouterr().out
+
+    assert migrations_cli(["status"]) == 0
+    output = capsys.readouterr().out
+    assert '"current_version": 1' in output
+    assert "dns_records_ip_sort_key" in output
+
+    assert migrations_cli(["upgrade"]) == 0
+    assert migrations_cli(["backfill", "--pause", "0"]) == 0
+    assert "backfills completed" in capsys.readouterr().out
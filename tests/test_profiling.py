@@ -0,0 +1,106 @@
+"""Tests for the per-request profiling middleware"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, Session, create_engine
+
+from app.config import settings
+from app.database import get_read_session, get_session
+from app.main import application
+from app.services.coredns_service import CoreDNSService
+
+
+@pytest.fixture(scope="function")
+def session(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        yield session
+
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def client(session, tmp_path, monkeypatch):
+    def get_session_override():
+        return session
+
+    application.dependency_overrides[get_session] = get_session_override
+    application.dependency_overrides[get_read_session] = get_session_override
+    monkeypatch.setattr(settings, "corefile_path", str(tmp_path / "Corefile"))
+    monkeypatch.setattr(settings, "corefile_backup_dir", str(tmp_path / "backups"))
+    monkeypatch.setattr(CoreDNSService, "_reload_process", lambda self: {"status": "success"})
+    monkeypatch.setattr(CoreDNSService, "_reload_docker", lambda self: {"status": "success"})
+
+    client = TestClient(application)
+    yield client
+    application.dependency_overrides.clear()
+
+
+def _create(client, headers=None):
+    return client.post(
+        "/api/records",
+        json={"zone": "profile.com", "hostname": "www", "ip_address": "10.0.0.1"},
+        headers=headers or {},
+    )
+
+
+@pytest.fixture(scope="function")
+def header_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "profiling_header_enabled", True)
+
+
+def test_profiling_disabled_by_default(client):
+    response = _create(client)
+    assert response.status_code == 201
+    assert "server-timing" not in response.headers
+    assert "x-profile-id" not in response.headers
+
+
+def test_profile_header_ignored_unless_enabled(client):
+    stored = len(client.get("/api/profiles").json()["data"])
+    response = _create(client, headers={"X-Profile": "trace"})
+    assert response.status_code == 201
+    assert "server-timing" not in response.headers
+    assert "x-profile-id" not in response.headers
+    assert len(client.get("/api/profiles").json()["data"]) == stored
+
+
+def test_server_timing_header_breaks_down_write_path(client, header_enabled):
+    response = _create(client, headers={"X-Profile": "1"})
+    assert response.status_code == 201
+
+    timing = response.headers["server-timing"]
+    assert timing.startswith("sql;dur=")
+    for phase in ("db.commit", "corefile.update", "corefile.render", "total"):
+        assert f"{phase};dur=" in timing
+    assert "x-profile-id" not in response.headers
+
+
+def test_trace_mode_stores_json_trace(client, header_enabled):
+    response = _create(client, headers={"X-Profile": "trace"})
+    profile_id = response.headers["x-profile-id"]
+
+    trace = client.get(f"/api/profiles/{profile_id}").json()["data"]
+    assert trace["path"] == "/api/records"
+    assert trace["status_code"] == 201
+    assert trace["query_count"] == len(trace["queries"]) > 0
+    assert any(query["statement"].startswith("INSERT INTO dns_records") for query in trace["queries"])
+    assert {"db.commit", "corefile.write"} <= {item["name"] for item in trace["spans"]}
+
+    listing = client.get("/api/profiles").json()["data"]
+    assert listing[0]["id"] == profile_id
+    assert "queries" not in listing[0]
+
+
+def test_unknown_profile_returns_404(client):
+    assert client.get("/api/profiles/doesnotexist").status_code == 404
+
+
+def test_profiling_enabled_by_config(client, monkeypatch):
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+    response = client.get("/api/records")
+    assert "sql;dur=" in response.headers["server-timing"]
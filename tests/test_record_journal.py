@@ -0,0 +1,138 @@
+"""Tests for the DNS record change journal and point-in-time restore"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, Session, create_engine, select
+
+from app.config import settings
+from app.database import get_read_session, get_session
+from app.main import application
+from app.models.dns_record import DNSRecord
+from app.models.record_change import RecordChange
+from app.services.journal_service import JournalService
+
+
+@pytest.fixture(scope="function")
+def session(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        yield session
+
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def client(session, tmp_path, monkeypatch):
+    def get_session_override():
+        return session
+
+    application.dependency_overrides[get_session] = get_session_override
+    application.dependency_overrides[get_read_session] = get_session_override
+    monkeypatch.setattr(settings, "corefile_path", str(tmp_path / "Corefile"))
+    monkeypatch.setattr(settings, "corefile_backup_dir", str(tmp_path / "backups"))
+
+    client = TestClient(application)
+    yield client
+    application.dependency_overrides.clear()
+
+
+def _create(client: TestClient, hostname: str, ip_address: str) -> int:
+    response = client.post(
+        "/api/records",
+        json={"zone": "example.com", "hostname": hostname, "ip_address": ip_address},
+    )
+    assert response.status_code == 201
+    return response.json()["data"]["id"]
+
+
+def _checkpoint() -> str:
+    time.sleep(0.01)
+    timestamp = datetime.now(timezone.utc)
+    time.sleep(0.01)
+    return timestamp.isoformat()
+
+
+def test_mutations_are_journaled(client, session):
+    record_id = _create(client, "www", "10.0.0.1")
+    client.patch(f"/api/records/{record_id}", json={"ip_address": "10.0.0.2"})
+    client.delete(f"/api/records/{record_id}?mode=hard")
+
+    changes = session.exec(
+        select(RecordChange).where(RecordChange.record_id == record_id).order_by(RecordChange.id)
+    ).all()
+    assert [change.operation for change in changes] == ["create", "update", "delete"]
+    assert changes[0].before is None
+    assert '"ip_address":"10.0.0.2"' in changes[1].after
+    assert changes[2].after is None
+
+
+def test_restore_records_to_timestamp(client, session):
+    www = _create(client, "www", "10.0.0.1")
+    mail = _create(client, "mail", "10.0.0.2")
+    timestamp = _checkpoint()
+
+    client.patch(f"/api/records/{www}", json={"ip_address": "10.0.0.9"})
+    api = _create(client, "api", "10.0.0.3")
+    client.delete(f"/api/records/{mail}?mode=hard")
+
+    snapshot = client.get("/api/records/as-of", params={"timestamp": timestamp}).json()
+    assert [(item["id"], item["ip_address"]) for item in snapshot["data"]] == [
+        (www, "10.0.0.1"),
+        (mail, "10.0.0.2"),
+    ]
+
+    dry_run = client.post("/api/records/restore", params={"timestamp": timestamp, "dry_run": True})
+    assert dry_run.json()["data"] == {
+        "timestamp": datetime.fromisoformat(timestamp).isoformat(),
+        "created": 1,
+        "updated": 1,
+        "deleted": 1,
+        "dry_run": True,
+    }
+    assert session.get(DNSRecord, api) is not None
+
+    response = client.post("/api/records/restore", params={"timestamp": timestamp})
+    assert response.status_code == 200
+
+    session.expire_all()
+    records = {record.id: record for record in session.exec(select(DNSRecord))}
+    assert set(records) == {www, mail}
+    assert records[www].ip_address == "10.0.0.1"
+    assert records[mail].hostname == "mail"
+
+    with open(settings.corefile_path, encoding="utf-8") as handle:
+        corefile = handle.read()
+    assert "10.0.0.9" not in corefile
+    assert "mail.example.com" in corefile
+
+
+def test_compact_keeps_state_reconstructible(client, session):
+    record_id = _create(client, "www", "10.0.0.1")
+    for index in range(2, 6):
+        client.patch(f"/api/records/{record_id}", json={"ip_address": f"10.0.0.{index}"})
+    removed_id = _create(client, "old", "10.0.1.1")
+    client.delete(f"/api/records/{removed_id}?mode=hard")
+    cutoff = _checkpoint()
+
+    removed = JournalService.compact(session, datetime.fromisoformat(cutoff))
+
+    assert removed == 6
+    changes = session.exec(select(RecordChange)).all()
+    assert [(change.record_id, change.operation) for change in changes] == [
+        (record_id, "checkpoint")
+    ]
+    state = JournalService.state_at(session, datetime.now(timezone.utc))
+    assert state[record_id]["ip_address"] == "10.0.0.5"
+
+
+def test_restore_rejects_timestamp_outside_retention(client):
+    too_old = datetime.now(timezone.utc) - timedelta(days=settings.record_journal_retention_days + 1)
+    response = client.post("/api/records/restore", params={"timestamp": too_old.isoformat()})
+    assert response.status_code == 400
@@ -1,11 +1,15 @@
 """Tests for upstream DNS settings"""
 
+import json
+
 import pytest
+from pydantic import ValidationError
 from sqlmodel import Session, create_engine
 from sqlmodel.pool import StaticPool
 
 from app.config import settings
 from app.models.setting import SystemSetting
+from app.schemas.settings import CorefilePluginSettings
 from app.services.settings_service import SettingsService
 
 
@@ -88,3 +92,39 @@ def test_initialize_default_settings(session: Session):
     primary, secondary = service.get_upstream_dns()
     assert primary == settings.upstream_primary_dns_default
     assert secondary == settings.upstream_secondary_dns_default
+
+
+def test_plugin_settings_default_and_persist(session: Session):
+    """Test Corefile plugin settings round-trip"""
+    service = SettingsService(session)
+    assert service.get_plugin_settings() == CorefilePluginSettings()
+
+    plugins = CorefilePluginSettings(cache_ttl=300, forward_policy="round_robin", log_mode="errors")
+    service.set_plugin_settings(plugins)
+    assert service.get_plugin_settings() == plugins
+    # 只存储与默认值不同的项
+    stored = json.loads(service.get_setting(SettingsService.KEY_COREFILE_PLUGINS))
+    assert stored == {"cache_ttl": 300, "forward_policy": "round_robin", "log_mode": "errors"}
+
+
+def test_invalid_stored_plugin_settings_fall_back_to_defaults(session: Session):
+    """Test that a corrupted plugin setting does not break generation"""
+    service = SettingsService(session)
+    service.set_setting(SettingsService.KEY_COREFILE_PLUGINS, '{"cache_ttl": -1}')
+    assert service.get_plugin_settings() == CorefilePluginSettings()
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        {"cache_ttl": 0},
+        {"cache_prefetch_percentage": 101},
+        {"forward_policy": "fastest"},
+        {"forward_health_check_ms": 10},
+        {"log_mode": "verbose"},
+    ],
+)
+def test_plugin_settings_validation(values):
+    """Test server-side validation of plugin settings"""
+    with pytest.raises(ValidationError):
+        CorefilePluginSettings(**values)
@@ -0,0 +1,65 @@
+"""Tests for the shared Corefile template environment"""
+
+import os
+
+import pytest
+
+from app.services.corefile_service import CorefileService
+from app.services.corefile_template import TemplateCache, get_template_cache
+
+
+def _write(path, text, mtime_offset=0):
+    path.write_text(text, encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset))
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    directory = tmp_path / "templates"
+    directory.mkdir()
+    _write(directory / "Corefile.j2", "v1 {{ value }}")
+    return directory
+
+
+def test_services_share_compiled_template():
+    first = CorefileService()
+    second = CorefileService()
+    assert first.templates is second.templates is get_template_cache("app/templates")
+    assert first.template is second.template
+
+
+def test_bytecode_cache_is_written(template_dir, tmp_path):
+    bytecode_dir = tmp_path / "bytecode"
+    cache = TemplateCache(str(template_dir), bytecode_dir=str(bytecode_dir), auto_reload=False)
+    assert cache.get("Corefile.j2").render(value=1) == "v1 1"
+    assert list(bytecode_dir.iterdir())
+
+    # 新环境直接从字节码缓存加载
+    warm = TemplateCache(str(template_dir), bytecode_dir=str(bytecode_dir), auto_reload=False)
+    assert warm.get("Corefile.j2").render(value=2) == "v1 2"
+
+
+def test_template_is_swapped_when_file_changes(template_dir):
+    cache = TemplateCache(str(template_dir), bytecode_dir="", auto_reload=False, check_interval=0)
+    original = cache.get("Corefile.j2")
+    assert cache.get("Corefile.j2") is original
+
+    _write(template_dir / "Corefile.j2", "v2 {{ value }}", mtime_offset=1_000_000_000)
+    assert cache.get("Corefile.j2").render(value=1) == "v2 1"
+
+
+def test_check_interval_throttles_reloads(template_dir):
+    cache = TemplateCache(str(template_dir), bytecode_dir="", auto_reload=False, check_interval=3600)
+    original = cache.get("Corefile.j2")
+
+    _write(template_dir / "Corefile.j2", "v2 {{ value }}", mtime_offset=1_000_000_000)
+    assert cache.get("Corefile.j2") is original
+
+
+def test_broken_template_keeps_previous_version(template_dir):
+    cache = TemplateCache(str(template_dir), bytecode_dir="", auto_reload=False, check_interval=0)
+    original = cache.get("Corefile.j2")
+
+    _write(template_dir / "Corefile.j2", "{% if %}", mtime_offset=1_000_000_000)
+    assert cache.get("Corefile.j2") is original
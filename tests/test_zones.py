@@ -0,0 +1,138 @@
+"""Tests for zone configuration CRUD and zone-aware Corefile generation"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, Session, create_engine
+
+from app.config import settings
+from app.database import get_read_session, get_session
+from app.main import application
+from app.models.dns_record import DNSRecord
+
+
+@pytest.fixture(scope="function")
+def session(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        yield session
+
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def client(session, tmp_path, monkeypatch):
+    def get_session_override():
+        return session
+
+    application.dependency_overrides[get_session] = get_session_override
+    application.dependency_overrides[get_read_session] = get_session_override
+    monkeypatch.setattr(settings, "corefile_path", str(tmp_path / "Corefile"))
+    monkeypatch.setattr(settings, "corefile_backup_dir", str(tmp_path / "backups"))
+
+    client = TestClient(application)
+    yield client
+    application.dependency_overrides.clear()
+
+
+def _add_record(session: Session, zone: str, hostname: str, ip_address: str = "10.0.0.1"):
+    session.add(DNSRecord(zone=zone, hostname=hostname, ip_address=ip_address))
+    session.commit()
+
+
+def _zone_block(content: str, zone: str) -> str:
+    start = content.index(f"{zone} {{")
+    return content[start : content.index("\n}", start)]
+
+
+def test_zone_crud(client):
+    response = client.post(
+        "/api/zones",
+        json={"name": "Internal.Example.", "log_enabled": False, "upstream_dns": "10.0.0.53, 10.0.0.54:5353"},
+    )
+    assert response.status_code == 201
+    zone = response.json()["data"]
+    assert zone["name"] == "internal.example"
+    assert zone["upstream_dns"] == "10.0.0.53 10.0.0.54:5353"
+
+    assert client.post("/api/zones", json={"name": "internal.example"}).status_code == 409
+
+    patched = client.patch(
+        f"/api/zones/{zone['id']}", json={"cache_ttl": 60, "upstream_dns": None}
+    ).json()["data"]
+    assert patched["cache_ttl"] == 60
+    assert patched["upstream_dns"] is None
+    assert patched["log_enabled"] is False
+
+    assert [item["name"] for item in client.get("/api/zones").json()["data"]] == ["internal.example"]
+    assert client.get(f"/api/zones/{zone['id']}").status_code == 200
+
+    assert client.delete(f"/api/zones/{zone['id']}").status_code == 200
+    assert client.get(f"/api/zones/{zone['id']}").status_code == 404
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"name": "bad zone"},
+        {"name": "example.com", "upstream_dns": "dns.google"},
+        {"name": "example.com", "upstream_dns": "8.8.8.8:99999"},
+        {"name": "example.com", "cache_ttl": 0},
+        {"name": "example.com", "status": "deleted"},
+    ],
+)
+def test_zone_validation(client, payload):
+    assert client.post("/api/zones", json=payload).status_code == 422
+
+
+def test_generation_honors_zone_options(client, session):
+    _add_record(session, "hot.internal", "api")
+    _add_record(session, "plain.com", "www")
+    _add_record(session, "off.com", "old")
+    client.post(
+        "/api/zones",
+        json={
+            "name": "hot.internal",
+            "log_enabled": False,
+            "fallthrough": False,
+            "upstream_dns": "10.0.0.53",
+            "cache_ttl": 300,
+        },
+    )
+    client.post("/api/zones", json={"name": "off.com", "status": "inactive"})
+    client.post("/api/zones", json={"name": "corp.lan", "upstream_dns": "[fd00::53]:53"})
+
+    content = client.get("/api/corefile/preview").text
+
+    hot = _zone_block(content, "hot.internal")
+    assert "10.0.0.1 api.hot.internal" in hot
+    assert "forward . 10.0.0.53" in hot
+    assert "cache 300" in hot
+    assert "log" not in hot
+    assert "fallthrough" not in hot
+
+    # 没有配置的 zone 保持默认选项
+    plain = _zone_block(content, "plain.com")
+    assert "fallthrough" in plain and "log" in plain
+    assert "forward" not in plain and "cache" not in plain
+
+    # 停用的 zone 不生成；只有配置没有记录的 zone 用于转发
+    assert "off.com" not in content
+    assert "forward . [fd00::53]:53" in _zone_block(content, "corp.lan")
+
+    preview = client.get("/api/corefile/preview?zone=corp.lan")
+    assert preview.status_code == 200
+    assert preview.headers["x-corefile-zones"] == "1"
+    assert client.get("/api/corefile/preview?zone=off.com").status_code == 404
+
+
+def test_zone_change_regenerates_corefile(client, session, tmp_path):
+    _add_record(session, "auto.com", "www")
+    zone = client.post("/api/zones", json={"name": "auto.com", "log_enabled": False}).json()["data"]
+    assert "log" not in _zone_block((tmp_path / "Corefile").read_text(), "auto.com")
+
+    client.delete(f"/api/zones/{zone['id']}")
+    assert "log" in _zone_block((tmp_path / "Corefile").read_text(), "auto.com")